@@ -1,6 +1,8 @@
 import logging
 import sys
 
+__version__ = '0.0'
+
 logger = logging.getLogger()
 def setup_doctest_logger(log_level: int = logging.DEBUG, create_file=True):
     """
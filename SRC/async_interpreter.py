@@ -0,0 +1,165 @@
+""" Asyncio execution mode for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  ASYNC INTERPRETER                                                          #
+#                                                                             #
+###############################################################################
+import asyncio
+import inspect
+
+from interpreter import Interpreter, TREE
+
+
+class OutputBuffer(object):
+    """Collects what GCodeMaker writes during one statement, so the async
+    interpreter can hand it to the backend with an await."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class AsyncInput(object):
+    """Awaitable view of a gpiozero input device, e.g. a limit switch.
+    The device's when_activated/when_deactivated callbacks, which gpiozero
+    calls from its own thread, wake the waiting task; nothing polls."""
+    def __init__(self, device):
+        self.device = device
+        self.waiters = []
+        device.when_activated = lambda *args: self.changed(True)
+        device.when_deactivated = lambda *args: self.changed(False)
+
+    def changed(self, active):
+        for loop, future, wanted in list(self.waiters):
+            if wanted == active:
+                loop.call_soon_threadsafe(self.resolve, future)
+
+    @staticmethod
+    def resolve(future):
+        if not future.done():
+            future.set_result(True)
+
+    async def wait_for(self, active=True, timeout=None):
+        """Returns once the input is active (or inactive), raises
+        asyncio.TimeoutError after timeout seconds."""
+        if bool(self.device.is_active) == active:
+            return
+        loop = asyncio.get_running_loop()
+        entry = (loop, loop.create_future(), active)
+        self.waiters.append(entry)
+        try:
+            if bool(self.device.is_active) != active:     # it may have changed meanwhile
+                await asyncio.wait_for(entry[1], timeout)
+        finally:
+            self.waiters.remove(entry)
+
+
+class AsyncInterpreter(Interpreter):
+    """Runs the AST as a coroutine on an asyncio event loop. Expressions and
+    assignments are evaluated as in the tree walk; the statements that put
+    G-code out await the backend, so the loop serves other tasks (reading
+    responses, monitoring) while the firmware's receive buffer is full.
+    backend: an AsyncGCodeStreamer, or any object whose write() and
+    flush() are coroutines or plain functions.
+    home_switches: AsyncInputs awaited after a HOME until each is active,
+    where a blocking program would poll the limit inputs.
+    home_timeout: seconds to wait for the home switches.
+    """
+    def __init__(self, parser, backend=None, home_switches=(), home_timeout=60.0, **kwargs):
+        Interpreter.__init__(self, parser, engine=TREE, **kwargs)
+        self.backend = backend
+        self.output = OutputBuffer()
+        self.gcode.serial = self.output
+        self.home_switches = list(home_switches)
+        self.home_timeout = home_timeout
+        self.statements = 0
+
+    async def interpret(self):
+        start = self.clock.now()
+        try:
+            return await self.run()
+        finally:
+            self.run_time = self.clock.now() - start
+
+    async def run(self):
+        tree = self.prepare()
+        if tree is None:
+            return ''
+        result = await self.execute(tree)
+        await self.call(self.backend, 'flush')
+        return result
+
+    @staticmethod
+    async def call(backend, name, *args):
+        method = getattr(backend, name, None)
+        if method is None:
+            return None
+        result = method(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def drain(self):
+        """Hands the statement's G-code to the backend."""
+        data = self.output.take()
+        if not data:
+            return
+        if self.backend is None:
+            print(data.decode('ascii'), end='')
+        else:
+            await self.call(self.backend, 'write', data)
+
+    async def execute(self, node):
+        executor = getattr(self, 'execute_' + type(node).__name__, None)
+        if executor is not None:
+            return await executor(node)
+        self.statements += 1
+        result = self.visit(node)
+        await self.drain()
+        return result
+
+    async def execute_Program(self, node):
+        self.declarations = node.block.declarations
+        self.waypointDict = node.block.waypoint_list
+        self.io_Dict = node.block.io_list
+        await self.execute(node.block)
+
+    async def execute_Block(self, node):
+        for declaration in node.declarations + node.io_list + node.waypoint_list:
+            self.visit(declaration)
+        await self.execute(node.compound_statement)
+
+    async def execute_Compound(self, node):
+        for child in node.children:
+            if self.abort is not None:
+                self.stop()
+            await self.execute(child)
+
+    async def execute_IfNode(self, node):
+        if self.visit(node.logicNode) is True:
+            await self.execute(node.true)
+        else:
+            await self.execute(node.false)
+
+    async def execute_Loop(self, node):
+        while True:
+            await self.execute(node.statements)
+            if self.visit(node.logicNode) is True:
+                break
+            await asyncio.sleep(0)      # a loop without output still lets other tasks run
+
+    async def execute_Home(self, node):
+        self.statements += 1
+        self.visit_Home(node)
+        await self.drain()
+        if self.home_switches:
+            await self.call(self.backend, 'flush')
+            for switch in self.home_switches:
+                await switch.wait_for(True, self.home_timeout)
@@ -0,0 +1,70 @@
+""" Clocks and simulated I/O for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  CLOCK                                                                      #
+#                                                                             #
+###############################################################################
+import time
+
+
+class RealClock(object):
+    """Wall-clock time; sleeping blocks the thread."""
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock(object):
+    """Simulated time that only moves when something sleeps on it,
+    so waiting costs nothing."""
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.time += seconds
+
+    def advance_to(self, when):
+        self.time = max(self.time, when)
+
+
+class SimulatedMachine(object):
+    """I/O backend that hands the G-code straight to an in-process
+    emulator.Firmware instead of a serial port. Whenever the firmware would
+    hold back its 'ok' (full planner, dwell, homing) the clock sleeps for as
+    long, so with a VirtualClock a whole program runs at once and the clock
+    still ends at the machine's simulated time.
+    """
+    def __init__(self, clock, firmware=None):
+        if firmware is None:
+            # imported here: the emulator's pseudo-terminal needs POSIX
+            from emulator import Firmware
+            firmware = Firmware()
+        self.clock = clock
+        self.firmware = firmware
+        self.start = clock.now()
+        self.errors = []
+
+    def write(self, data):
+        firmware = self.firmware
+        for line in data.decode('ascii').splitlines():
+            firmware.now = max(firmware.now, self.clock.now() - self.start)
+            response, held = firmware.process(line)
+            self.clock.sleep(held)
+            if response.startswith('error'):
+                self.errors.append((line, response))
+
+    def finish_time(self):
+        """Clock time at which the machine has finished every command."""
+        return self.start + self.firmware.finish_time()
+
+    def flush(self):
+        """Waits until the machine has finished every command."""
+        self.clock.sleep(self.finish_time() - self.clock.now())
@@ -0,0 +1,337 @@
+""" Closure compiler for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  COMPILER                                                                   #
+#                                                                             #
+###############################################################################
+import math
+import operator
+
+from token_types import *
+from io_pins import pin_level
+
+
+def _float_div(left, right):
+    return float(left) / float(right)
+
+
+BINARY_OPS = {
+    PLUS: operator.add,
+    MINUS: operator.sub,
+    MUL: operator.mul,
+    INTEGER_DIV: operator.floordiv,
+    FLOAT_DIV: _float_div,
+    EQUAL: operator.eq,
+    LT: operator.lt,
+    GT: operator.gt,
+    LTE: operator.le,
+    GTE: operator.ge,
+    NEQUAL: operator.ne,
+}
+
+
+# AND and OR on operand values, for constant folding; running code
+# short-circuits them instead
+LOGICAL_OPS = {
+    AND: lambda left, right: pin_level(left) and pin_level(right),
+    OR: lambda left, right: pin_level(left) or pin_level(right),
+}
+
+TYPE_CONVERSIONS = {
+    INTEGER: math.trunc,
+    REAL: float,
+    BOOL: lambda value: False if value == 0 else True,
+}
+
+
+def _noop(rt):
+    pass
+
+
+def is_constant_expr(node):
+    """True when node can be evaluated without any runtime state."""
+    name = type(node).__name__
+    if name in ('Num', 'Bool'):
+        return True
+    if name == 'UnaryOp':
+        return is_constant_expr(node.expr)
+    if name == 'BinOp':
+        return is_constant_expr(node.left) and is_constant_expr(node.right)
+    return False
+
+
+class Compiler(object):
+    """Compiles a Program tree once into nested Python closures.
+    Every closure takes the running Interpreter (rt) and touches only
+    rt.slots, rt.declaredDict, rt.pins and rt.gcode, so running the result gives
+    the same scope and G-code as Interpreter.visit() on the tree.
+    Node dispatch by name and name lookup in the SymbolTable from
+    semantic.SemanticAnalyzer happen here, at compile time, so the run only
+    does indexed loads and stores into rt.slots.
+    Given a GCodeMaker, HOME, WAIT and MOVETO statements with constant
+    operands are rendered to gcode_maker.Rendered steps here, once, and the run
+    only writes their pre-encoded bytes.
+    Given a profiler.NodeProfiler, every closure is wrapped to be measured
+    under its node's label, the class name or for a profiler.LineProfiler
+    the source line; without one nothing is added.
+    """
+    def __init__(self, symbols, gcode=None, profiler=None):
+        self.symbols = symbols
+        self.gcode = gcode
+        self.profiler = profiler
+        self.waypoints = {}
+        self.rendered = 0
+
+    def compile(self, node):
+        method_name = 'compile_' + type(node).__name__
+        compiler = getattr(self, method_name, self.generic_compile)
+        if self.profiler is not None:
+            return self.profiler.wrap_node(node, compiler(node))
+        return compiler(node)
+
+    def generic_compile(self, node):
+        raise Exception('No compile_{} method'.format(type(node).__name__))
+
+    def compile_Program(self, node):
+        return self.compile(node.block)
+
+    def compile_Block(self, node):
+        declarations = [self.compile(declaration)
+                        for declaration in node.declarations + node.io_list + node.waypoint_list]
+        body = self.compile(node.compound_statement)
+
+        def block(rt):
+            for declaration in declarations:
+                declaration(rt)
+            body(rt)
+        return block
+
+    def compile_VarDecl(self, node):
+        name = node.var_node.value
+        type_ = node.type_node.value
+
+        def var_decl(rt):
+            rt.declaredDict[name] = type_
+        return var_decl
+
+    def compile_IO_(self, node):
+        name, direction, pin = node.value, node.direction, node.pin
+
+        def io_decl(rt):
+            if rt.pins is not None:
+                rt.pins.declare(name, direction, pin)
+        return io_decl
+
+    def compile_Type(self, node):
+        return _noop
+
+    def compile_NoOp(self, node):
+        return _noop
+
+    def compile_Waypoint(self, node):
+        slot = self.symbols.lookup(node.value).slot
+        point = node.point
+        self.waypoints[node.value] = self.compile_point(point['distance'], point['angle'])
+        self.waypoints[node.value] += (self.render_point(point['distance'], point['angle']),)
+
+        def waypoint(rt):
+            rt.slots[slot] = point
+        return waypoint
+
+    def compile_point(self, distance, angle):
+        """Returns (distance, relative, angle, relative) for a move.
+        Only signed (UnaryOp) or computed axes are relative."""
+        return (self.compile(distance), type(distance).__name__ != 'Num',
+                self.compile(angle), type(angle).__name__ != 'Num')
+
+    def render_point(self, distance, angle):
+        """The G-code of a move to a constant point, or None."""
+        if self.gcode is None or not (is_constant_expr(distance) and is_constant_expr(angle)):
+            return None
+        return self.gcode.render_move(self.evaluate(distance), type(distance).__name__ != 'Num',
+                                      self.evaluate(angle), type(angle).__name__ != 'Num')
+
+    @staticmethod
+    def evaluate(node):
+        """The value of a constant expression, computed at compile time
+        (unprofiled, so it does not count as a run-time visit)."""
+        return Compiler(None).compile(node)(None)
+
+    def compile_Num(self, node):
+        value = node.value
+        return lambda rt: value
+
+    def compile_Bool(self, node):
+        value = node.value
+        return lambda rt: value
+
+    def compile_Var(self, node):
+        name = node.value
+        symbol = self.symbols.lookup(name)
+        slot = symbol.slot
+        if symbol.kind == IO:
+            return self.compile_pin_read(name, slot)
+
+        def var(rt):
+            value = rt.slots[slot]
+            if value is None:
+                raise NameError(f'{repr(name)} is not in the GLOBAL Table.')
+            return value
+        return var
+
+    def compile_BinOp(self, node):
+        if node.op.type == AND:
+            return self.compile_And(node)
+        if node.op.type == OR:
+            return self.compile_Or(node)
+        op = BINARY_OPS.get(node.op.type)
+        if op is None:
+            return lambda rt: False
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        def binop(rt):
+            rightvalue = right(rt)
+            return op(left(rt), rightvalue)
+        return binop
+
+    def compile_And(self, node):
+        """AND: the right operand only runs when the left one is true."""
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        return lambda rt: pin_level(left(rt)) and pin_level(right(rt))
+
+    def compile_Or(self, node):
+        """OR: the right operand only runs when the left one is false."""
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        return lambda rt: pin_level(left(rt)) or pin_level(right(rt))
+
+    def compile_UnaryOp(self, node):
+        expr = self.compile(node.expr)
+        if node.op.type == PLUS:
+            return lambda rt: +expr(rt)
+        elif node.op.type == MINUS:
+            return lambda rt: -expr(rt)
+        elif node.op.type == NOT:
+            return lambda rt: not pin_level(expr(rt))
+        return _noop
+
+    def compile_Compound(self, node):
+        children = [self.compile(child) for child in node.children
+                    if type(child).__name__ != 'NoOp']
+
+        def compound(rt):
+            for child in children:
+                if rt.abort is not None:
+                    rt.stop()
+                child(rt)
+        return compound
+
+    def compile_pin_read(self, name, slot):
+        """An IO read: the PinBank's snapshot, or the level last assigned
+        when no PinBank is connected."""
+        def pin_read(rt):
+            pins = rt.pins
+            if pins is not None and name in pins:
+                value = pins.read(name)
+            else:
+                value = rt.slots[slot]
+            if value is None:
+                raise NameError(f'{repr(name)} is not in the GLOBAL Table.')
+            return value
+        return pin_read
+
+    def compile_Assign(self, node):
+        symbol = self.symbols.lookup(node.left.value)
+        slot = symbol.slot
+        if symbol.kind == IO:
+            return self.compile_pin_write(symbol.name, slot, self.compile(node.right))
+        convert = TYPE_CONVERSIONS[symbol.type]
+        right = self.compile(node.right)
+
+        def assign(rt):
+            rt.slots[slot] = convert(right(rt))
+        return assign
+
+    def compile_pin_write(self, name, slot, right):
+        def pin_write(rt):
+            level = pin_level(right(rt))
+            if rt.pins is not None:
+                rt.pins.write(name, level)
+            rt.slots[slot] = level
+        return pin_write
+
+    def compile_IfNode(self, node):
+        test = self.compile(node.logicNode)
+        true = self.compile(node.true)
+        false = self.compile(node.false)
+
+        def if_node(rt):
+            if test(rt) is True:
+                true(rt)
+            else:
+                false(rt)
+        return if_node
+
+    def compile_Loop(self, node):
+        body = self.compile(node.statements)
+        test = self.compile(node.logicNode)
+
+        def loop(rt):
+            while True:
+                body(rt)
+                if test(rt) is True:
+                    break
+        return loop
+
+    def compile_Wait(self, node):
+        pause = self.compile(node.token.value)
+        if self.gcode is not None and is_constant_expr(node.token.value):
+            value = self.evaluate(node.token.value)
+            rendered = self.gcode.render_wait(value)
+            self.rendered += 1
+
+            def wait_rendered(rt):
+                rt.gcode.send_rendered(rendered)
+                return value
+            return wait_rendered
+
+        def wait(rt):
+            value = pause(rt)
+            rt.gcode.wait(value)
+            return value
+        return wait
+
+    def compile_Moveto(self, node):
+        distance = node.value['distance']
+        angle = node.value['angle']
+        if type(distance).__name__ == 'Var':
+            lin, lin_relative, rot, rot_relative, rendered = self.waypoints[distance.value]
+        else:
+            lin, lin_relative, rot, rot_relative = self.compile_point(distance, angle)
+            rendered = self.render_point(distance, angle)
+        if rendered is not None:
+            self.rendered += 1
+
+            def moveto_rendered(rt):
+                rt.gcode.send_rendered(rendered)
+            return moveto_rendered
+
+        def moveto(rt):
+            rt.gcode.move(lin(rt), lin_relative, rot(rt), rot_relative)
+        return moveto
+
+    def compile_Home(self, node):
+        if self.gcode is not None:
+            rendered = self.gcode.render_home()
+            self.rendered += 1
+
+            def home_rendered(rt):
+                rt.gcode.send_rendered(rendered)
+            return home_rendered
+
+        def home(rt):
+            rt.gcode.go_home()
+        return home
@@ -0,0 +1,218 @@
+""" Firmware emulator for CLIQ test robot interpreter
+
+Runs a simulated motion controller on a pseudo-terminal, so the whole
+pipeline can be run and benchmarked without the robot:
+
+    python emulator.py            prints the port name to pass to main.py
+"""
+
+###############################################################################
+#                                                                             #
+#  EMULATOR                                                                   #
+#                                                                             #
+###############################################################################
+import math
+import os
+import re
+import select
+import threading
+import time
+import tty
+from collections import deque
+
+import gcode
+
+EMERGENCY = gcode._gcodes[gcode.HALT].encode('ascii')
+PLANNER_SIZE = 16   # moves the firmware queues before it holds back the 'ok'
+
+_WORD_RE = re.compile(r'([A-Z])\s*([-+]?\d*\.?\d+)?')
+
+
+class Firmware(object):
+    """The controller model: positions, modal state and a motion timeline.
+    process() takes one G-code line and returns the response and the
+    simulated seconds the controller held back the response (a full
+    planner, a dwell or homing)."""
+    def __init__(self, planner_size=PLANNER_SIZE):
+        self.planner_size = planner_size
+        self.limits = {'X': gcode.linlimit, 'Z': gcode.rotatlimit}
+        self.max_feed = {'X': gcode.flow['linMaxFlow'], 'Z': gcode.flow['rotMaxFlow']}
+        self.position = {'X': 0.0, 'Z': 0.0}
+        self.relative = False
+        self.feed = None
+        self.homed = False
+        self.halted = False     # after an M112, until the controller is reset
+        self.now = 0.0          # simulated seconds, when the last response went out
+        self.motion_end = 0.0   # simulated seconds, when the queued motion is done
+        self.planner = deque()  # end times of the queued moves
+        self.lines = 0
+        self.moves = 0
+        self.errors = 0
+
+    def finish_time(self):
+        """Simulated time at which everything received so far is done."""
+        return max(self.now, self.motion_end)
+
+    def process(self, line):
+        self.lines += 1
+        words = dict(_WORD_RE.findall(line.strip().upper()))
+        if not line.strip():
+            return 'ok', 0.0
+        command = line.split()[0].upper()
+        start = self.now
+        try:
+            if command == 'M112':
+                self.halt()
+            elif self.halted:
+                raise ValueError('Halted')
+            elif command == 'G28':
+                self.home()
+            elif command == 'G90':
+                self.relative = False
+            elif command == 'G91':
+                self.relative = True
+            elif command in ('G0', 'G1'):
+                self.move(words)
+            elif command == 'G4':
+                self.dwell(line)
+            else:
+                raise ValueError(f'Unknown command {command}')
+        except ValueError as ex:
+            self.errors += 1
+            return f'error:{ex}', self.now - start
+        return 'ok', self.now - start
+
+    def halt(self):
+        """Emergency stop: motion ends where it is and queued moves are dropped."""
+        self.halted = True
+        self.homed = False
+        self.motion_end = self.now
+        self.planner.clear()
+
+    def wait_for_motion(self):
+        self.now = self.finish_time()
+        self.planner.clear()
+
+    def home(self):
+        self.wait_for_motion()
+        self.now += max(abs(self.position[axis]) * 60.0 / self.max_feed[axis] for axis in self.position)
+        self.motion_end = self.now
+        self.position = {'X': 0.0, 'Z': 0.0}
+        self.homed = True
+
+    def dwell(self, line):
+        argument = line.split()[1:] or ['0']
+        text = argument[0].upper()
+        if text.startswith('P'):
+            seconds = float(text[1:]) / 1000.0
+        else:
+            seconds = float(text.lstrip('S'))
+        self.wait_for_motion()
+        self.now += seconds
+        self.motion_end = self.now
+
+    def move(self, words):
+        if 'F' in words:
+            self.feed = float(words['F'])
+        targets = {}
+        for axis in ('X', 'Z'):
+            if axis in words:
+                value = float(words[axis])
+                target = self.position[axis] + value if self.relative else value
+                if not 0 <= target <= self.limits[axis]:
+                    raise ValueError(f'{axis} {target:g} outside 0..{self.limits[axis]}')
+                targets[axis] = target
+        if not self.homed:
+            raise ValueError('Not homed')
+        if not targets:
+            return
+        if self.feed is None:
+            raise ValueError('No feed rate')
+        # F is the feed along the move vector, held down so that no axis
+        # goes over its own maximum feed
+        offsets = {axis: abs(target - self.position[axis]) for axis, target in targets.items()}
+        length = math.hypot(*offsets.values())
+        feed = min([self.feed] + [self.max_feed[axis] * length / offset
+                                  for axis, offset in offsets.items() if offset])
+        duration = length * 60.0 / feed
+        self.position.update(targets)
+        self.motion_end = self.finish_time() + duration
+        self.planner.append(self.motion_end)
+        self.moves += 1
+        while self.planner and self.planner[0] <= self.now:
+            self.planner.popleft()
+        if len(self.planner) > self.planner_size:
+            self.now = self.planner.popleft()
+
+
+class FirmwareEmulator(threading.Thread):
+    """Serves a Firmware on a pseudo-terminal; open port_name with pyserial.
+    time_scale: real seconds slept per simulated second, 0 answers at once.
+    """
+    def __init__(self, time_scale=0.0, planner_size=PLANNER_SIZE):
+        super().__init__(name='FirmwareEmulator', daemon=True)
+        self.firmware = Firmware(planner_size)
+        self.time_scale = time_scale
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port_name = os.ttyname(self.slave)
+        self.running = True
+        self.received = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def run(self):
+        pending = b''
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:
+                return
+            if EMERGENCY in data:
+                self.firmware.halt()    # the emergency parser acts before the buffered lines
+            pending += data
+            while b'\n' in pending:
+                line, pending = pending.split(b'\n', 1)
+                line = line.decode('ascii', 'replace')
+                self.received.append(line)
+                response, held = self.firmware.process(line)
+                if held and self.time_scale:
+                    time.sleep(held * self.time_scale)
+                os.write(self.master, response.encode('ascii') + b'\n')
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def report(self):
+        firmware = self.firmware
+        return (f'{firmware.lines} lines, {firmware.moves} moves, {firmware.errors} errors, '
+                f'simulated time {firmware.finish_time():.1f} s')
+
+
+if __name__ == '__main__':
+    emulator = FirmwareEmulator(time_scale=1.0)
+    emulator.start()
+    print(f'Firmware emulator on {emulator.port_name}, Ctrl-C to stop')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        print(emulator.report())
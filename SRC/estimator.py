@@ -0,0 +1,196 @@
+""" Static cycle-time estimator for CLIQ test robot programs
+
+    python estimator.py program.txt [--coordinated]
+"""
+
+###############################################################################
+#                                                                             #
+#  ESTIMATOR                                                                  #
+#                                                                             #
+###############################################################################
+import gcode
+from token_types import NOT
+from compiler import is_constant_expr, Compiler
+
+
+class StatementTime(object):
+    """One line of the estimate: seconds is None when it depends on values
+    only known at run time, children break down a LOOP or IF."""
+    def __init__(self, description, seconds, depth, children=None):
+        self.description = description
+        self.seconds = seconds
+        self.depth = depth
+        self.children = children or []
+
+    def __str__(self):
+        seconds = '?' if self.seconds is None else f'{self.seconds:8.2f}'
+        return f'{seconds:>8} s  {"    " * self.depth}{self.description}'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def add(*seconds):
+    return None if any(value is None for value in seconds) else sum(seconds)
+
+
+def describe(node):
+    """Source-like text of an expression."""
+    name = type(node).__name__
+    if name == 'Bool':
+        return 'TRUE' if node.value else 'FALSE'
+    if name in ('Num', 'Var'):
+        return str(node.value)
+    if name == 'UnaryOp':
+        return node.op.value + (' ' if node.op.type == NOT else '') + describe(node.expr)
+    if name == 'BinOp':
+        return f'{describe(node.left)} {node.op.value} {describe(node.right)}'
+    return ''
+
+
+class CycleEstimator(object):
+    """Walks a Program tree and estimates how long each statement keeps the
+    machine busy, without running it: WAIT durations plus MOVETO motion time
+    at the gcode.flow feed rates scaled like GCodeMaker.motorspeed().
+    Absolute moves are timed from the tracked axis positions, which are known
+    from the first HOME on. A LOOP body is walked twice and the second pass,
+    which starts where the previous iteration ended, is its per-iteration time.
+    """
+    LIN = 'distance'
+    ROT = 'angle'
+
+    def __init__(self, coordinated=False, speed=10):
+        self.coordinated = coordinated
+        scale = speed if speed <= 10 else 10    # as in GCodeMaker.motorspeed()
+        self.feed = {self.LIN: gcode.flow['linMaxFlow'] * speed / scale,
+                     self.ROT: gcode.flow['rotMaxFlow'] * speed / scale}
+        self.waypoints = {}
+        self.position = {self.LIN: None, self.ROT: None}
+
+    def estimate(self, tree):
+        """Returns a StatementTime for every statement of the program."""
+        return self.visit(tree, 0)
+
+    def visit(self, node, depth):
+        method_name = 'estimate_' + type(node).__name__
+        estimator = getattr(self, method_name, None)
+        return [] if estimator is None else estimator(node, depth)
+
+    @staticmethod
+    def total(rows):
+        return add(*[row.seconds for row in rows])
+
+    def value(self, node):
+        """The value of a constant expression, or None."""
+        if not is_constant_expr(node):
+            return None
+        return Compiler.evaluate(node)
+
+    def estimate_Program(self, node, depth):
+        return self.visit(node.block, depth)
+
+    def estimate_Block(self, node, depth):
+        for waypoint in node.waypoint_list:
+            self.waypoints[waypoint.value] = waypoint.point
+        return self.visit(node.compound_statement, depth)
+
+    def estimate_Compound(self, node, depth):
+        rows = []
+        for child in node.children:
+            rows.extend(self.visit(child, depth))
+        return rows
+
+    def estimate_Home(self, node, depth):
+        distances = [self.position[self.LIN], self.position[self.ROT]]
+        seconds = None
+        if None not in distances:
+            seconds = max(abs(distances[0]) * 60.0 / self.feed[self.LIN],
+                          abs(distances[1]) * 60.0 / self.feed[self.ROT])
+        self.position = {self.LIN: 0, self.ROT: 0}
+        return [StatementTime('HOME', seconds, depth)]
+
+    def estimate_Wait(self, node, depth):
+        return [StatementTime(f'WAIT {describe(node.token.value)}', self.value(node.token.value), depth)]
+
+    def axis_time(self, axis, node):
+        """Seconds to move one axis to node, which is relative unless a bare Num."""
+        value = self.value(node)
+        start = self.position[axis]
+        relative = type(node).__name__ != 'Num'
+        if value is None:
+            self.position[axis] = None
+            return None
+        if relative:
+            self.position[axis] = None if start is None else start + value
+            return abs(value) * 60.0 / self.feed[axis]
+        self.position[axis] = value
+        return None if start is None else abs(value - start) * 60.0 / self.feed[axis]
+
+    def estimate_Moveto(self, node, depth):
+        distance = node.value['distance']
+        angle = node.value['angle']
+        if type(distance).__name__ == 'Var':
+            description = f'MOVETO {distance.value}'
+            point = self.waypoints[distance.value]
+            distance, angle = point['distance'], point['angle']
+        else:
+            description = f'MOVETO {describe(distance)}, {describe(angle)}'
+        lin = self.axis_time(self.LIN, distance)
+        rot = self.axis_time(self.ROT, angle)
+        same_mode = (type(distance).__name__ == 'Num') == (type(angle).__name__ == 'Num')
+        if lin is None or rot is None:
+            seconds = None
+        elif self.coordinated and same_mode:
+            seconds = max(lin, rot)
+        else:
+            seconds = lin + rot
+        return [StatementTime(description, seconds, depth)]
+
+    def estimate_IfNode(self, node, depth):
+        start = dict(self.position)
+        true_rows = self.visit(node.true, depth + 2)
+        true_end = dict(self.position)
+        self.position = dict(start)
+        false_rows = self.visit(node.false, depth + 2)
+        if self.position != true_end:
+            self.position = {axis: value if value == true_end[axis] else None
+                             for axis, value in self.position.items()}
+        times = [self.total(true_rows), self.total(false_rows)]
+        seconds = None if None in times else max(times)
+        children = [StatementTime('THEN', times[0], depth + 1, true_rows)]
+        if false_rows:
+            children.append(StatementTime('ELSE', times[1], depth + 1, false_rows))
+        return [StatementTime(f'IF {describe(node.logicNode)} (longer branch)', seconds, depth, children)]
+
+    def estimate_Loop(self, node, depth):
+        self.visit(node.statements, depth + 1)      # first pass sets the positions
+        rows = self.visit(node.statements, depth + 1)
+        seconds = self.total(rows)
+        rate = '' if not seconds else f', {3600.0 / seconds:.1f} cycles/hour'
+        return [StatementTime(f'LOOP UNTIL {describe(node.logicNode)} (per iteration{rate})',
+                              seconds, depth, rows)]
+
+    def report(self, rows):
+        lines = []
+        for row in rows:
+            lines.append(str(row))
+            lines.extend(self.report(row.children).splitlines())
+        return '\n'.join(lines)
+
+
+def main():
+    import argparse
+    from lexer import Lexer
+    from parser import Parser
+    argparser = argparse.ArgumentParser(description='Estimate the cycle time of a CLIQ test robot program')
+    argparser.add_argument('program')
+    argparser.add_argument('--coordinated', action='store_true', help='both axes move at once')
+    args = argparser.parse_args()
+    tree = Parser(Lexer(open(args.program, 'r').read())).parse()
+    estimator = CycleEstimator(coordinated=args.coordinated)
+    rows = estimator.estimate(tree)
+    print(estimator.report(rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,9 @@ ABSOLUTE = 'ABSOLUTE'
 RELATIVE = 'RELATIVE'
 MOVE_LIN = 'MOVE_LIN'
 MOVE_ROT = 'MOVE_ROT'
+MOVE_XZ  = 'MOVE_XZ'
 WAIT     = 'WAIT'
+HALT     = 'HALT'
 
 _gcodes = {
     HOME:     'G28 X,Z',
@@ -16,5 +18,7 @@ _gcodes = {
     RELATIVE: 'G91',
     MOVE_LIN: 'G1 X',
     MOVE_ROT: 'G1 Z',
+    MOVE_XZ:  'G1 X',   # followed by the distance, ' Z' and the angle
     WAIT:     'G4 ',
+    HALT:     'M112',  # emergency stop, acted on as soon as it is received
 }
\ No newline at end of file
@@ -1,6 +1,6 @@
 import os, sys
 import contextlib
-import serial
+import math
 import gcode
 from gcode import _gcodes
 
@@ -8,21 +8,18 @@ usable_gpio = [0, 3, 4, 13, 14, 15, 17, 18, 19, 20, 21, 22, 26]
 linlimit_io = 5
 rotatlimit_io = 6
 
-try:
-    import gpiozero as gpio
-except Exception as e:
-    print(f"No Pi GPIO {e}")
-    print(f"GPIO UNAVAILABLE {e}")
-    raise ImportError
+# pyserial and gpiozero are imported when a port or pin is opened, not here,
+# so programs can be checked and simulated on machines without them.
 
 global serialPort
 
 @contextlib.contextmanager
-def open_serial_port():
-    if os.name == 'nt':
-        port = 'COM1'
-    else:
-        port = '/dev/ttyUSB0'
+def open_serial_port(port=None):
+    """port: device name, defaults to the fixture's USB serial adapter."""
+    import serial
+    if port is None:
+        port = 'COM1' if os.name == 'nt' else '/dev/ttyUSB0'
+    serialPort = None
     try:
         serialPort = _openSerialPort(port)
         print(f"Serial Port name={serialPort.name}.")
@@ -37,11 +34,13 @@ def open_serial_port():
     except Exception as ex:
         print(f'{ex}')
     finally:
-        serialPort.close()
+        if serialPort is not None:
+            serialPort.close()
 
 
 def _openSerialPort(comport):
     """Opens the serial port name passed in comport. Returns the stream id"""
+    import serial
     #debuglog.info("Check if serial module is available in sys {}".format(sys.modules["serial"]))
     s = None
     try:
@@ -60,41 +59,273 @@ def _openSerialPort(comport):
         return s
 
 
+class Rendered(object):
+    """A sequence of G-code steps made once, e.g. at compile time, and shared
+    by every GCodeMaker and thread that sends it. Each GCodeMaker keeps the
+    bytes it built for it, see GCodeMaker.send_rendered().
+    Steps are tuples headed by a gcode command name, see GCodeMaker.plan()."""
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+
+
 class GCodeMaker:
-    def __init__(self):
+    def __init__(self, modal=True, coordinated=False, serial=None):
+        """modal: track the firmware's modal state and leave out commands
+        that would not change it.
+        coordinated: send a MOVETO whose axes share a positioning mode as one
+        G1 X.. Z.. line, so both axes move at once.
+        serial: where the G-code goes, e.g. a streamer.GCodeStreamer.
+        Without one the commands are printed."""
+        self.serial = serial
         self.linear_limit = gcode.linlimit
         self.rotation_limit = gcode.rotatlimit
+        self.modal = modal
+        self.coordinated = coordinated
+        self.suppressed = 0
+        self.moves = 0
+        self.coordinated_moves = 0
+        self.motion_time = 0.0          # estimated seconds of motion sent
+        self.coordinated_saving = 0.0   # estimated seconds saved by coordinated moves
+        self.variants = {}              # (Rendered, state, path feeds): what send_rendered() writes
+        self.reset_state()
+
+    def reset_state(self):
+        """Forget the firmware state, e.g. after a reconnect."""
+        self.relative_mode = None   # positioning mode, None until one is sent
+        self.feed = None            # last F word sent
+        self.at_home = False        # True from a G28 until the next move
+        self.position = {gcode.MOVE_LIN: None, gcode.MOVE_ROT: None}  # None until homed
+
+    def state(self):
+        return self.relative_mode, self.feed, self.at_home
 
     def motorspeed(self, value, axis):
         scale = value if value <= 10 else 10
         return str(gcode.flow.get(axis) * value/scale)
 
+    @staticmethod
+    def encode(command):
+        """The bytes put on the wire for one command line."""
+        return (command + '\n').encode('ascii')
+
     def send(self, command):
+        self.write(self.encode(command))
+
+    def write(self, data):
         try:
-            self.serial.write(command)
+            self.serial.write(data)
         except (NameError, AttributeError):
-            print(command)
+            print(data.decode('ascii'), end='')
+
+    def plan(self, steps, state, path_feeds=()):
+        """Returns the command lines for steps when the firmware starts in
+        state (relative_mode, feed, at_home), the state they leave it in and
+        the number of commands left out because they would not change it.
+        steps: (HOME,) | (ABSOLUTE,) | (RELATIVE,) | (WAIT, value)
+             | (MOVE_LIN, value, feed) | (MOVE_ROT, value, feed)
+             | (MOVE_XZ, distance, angle, linear feed, rotary feed)
+        path_feeds: the F word of each MOVE_XZ in turn, as track() returns them.
+        """
+        relative_mode, feed, at_home = state
+        path_feeds = iter(path_feeds)
+        lines = []
+        suppressed = 0
+        for step in steps:
+            kind = step[0]
+            if kind == gcode.HOME:
+                if self.modal and at_home:
+                    suppressed += 1
+                    continue
+                lines.append(_gcodes.get(gcode.HOME))
+                at_home = True
+            elif kind in (gcode.ABSOLUTE, gcode.RELATIVE):
+                relative = kind == gcode.RELATIVE
+                if self.modal and relative_mode is relative:
+                    suppressed += 1
+                    continue
+                lines.append(_gcodes.get(kind))
+                relative_mode = relative
+            elif kind == gcode.WAIT:
+                lines.append(_gcodes.get(gcode.WAIT) + str(step[1]))
+            else:
+                if kind == gcode.MOVE_XZ:
+                    move_feed = next(path_feeds)
+                    line = _gcodes.get(kind) + str(step[1]) + ' Z' + str(step[2])
+                else:
+                    move_feed = step[-1]
+                    line = _gcodes.get(kind) + str(step[1])
+                if self.modal and move_feed == feed:
+                    suppressed += 1
+                else:
+                    line += ' F' + move_feed
+                    feed = move_feed
+                lines.append(line)
+                at_home = False
+        return lines, (relative_mode, feed, at_home), suppressed
+
+    @staticmethod
+    def move_time(start, target, relative, feed):
+        """Estimated seconds to move one axis at feed (units/minute),
+        or None when the start position is unknown."""
+        if relative:
+            return abs(target) * 60.0 / float(feed)
+        if start is None:
+            return None
+        return abs(target - start) * 60.0 / float(feed)
+
+    @staticmethod
+    def path_feed(offsets, feeds):
+        """The F word of a coordinated move: the feed along the move vector
+        offsets at which no axis goes over its own feed, i.e. the minimum of
+        feed * |vector| / |offset| over the moving axes. When the vector is
+        unknown only the slowest axis feed keeps every axis within its own."""
+        feeds = [float(feed) for feed in feeds]
+        if None in offsets or not any(offsets):
+            return str(min(feeds))
+        length = math.hypot(*offsets)
+        feed = min(feed * length / abs(offset) for offset, feed in zip(offsets, feeds) if offset)
+        return str(math.floor(feed * 10) / 10)     # rounded down to stay within the axis feeds
+
+    def track(self, steps):
+        """Follows the axis positions through steps and adds up the estimated
+        motion time and the time coordinated moves save over separate ones.
+        Returns the F word of each coordinated move, which depends on where
+        it starts from."""
+        relative = self.relative_mode
+        path_feeds = []
+        for step in steps:
+            kind = step[0]
+            if kind == gcode.HOME:
+                self.position = {gcode.MOVE_LIN: 0, gcode.MOVE_ROT: 0}
+            elif kind in (gcode.ABSOLUTE, gcode.RELATIVE):
+                relative = kind == gcode.RELATIVE
+            elif kind in (gcode.MOVE_LIN, gcode.MOVE_ROT):
+                self.moves += 1
+                seconds = self.move_axis(kind, step[1], relative, step[2])
+                self.motion_time += seconds or 0.0
+            elif kind == gcode.MOVE_XZ:
+                self.moves += 1
+                self.coordinated_moves += 1
+                offsets = [self.offset(axis, target, relative)
+                           for axis, target in ((gcode.MOVE_LIN, step[1]), (gcode.MOVE_ROT, step[2]))]
+                feed = self.path_feed(offsets, step[3:5])
+                path_feeds.append(feed)
+                lin = self.move_axis(gcode.MOVE_LIN, step[1], relative, step[3])
+                rot = self.move_axis(gcode.MOVE_ROT, step[2], relative, step[4])
+                if lin is not None and rot is not None:
+                    seconds = math.hypot(*offsets) * 60.0 / float(feed)
+                    self.motion_time += seconds
+                    self.coordinated_saving += lin + rot - seconds
+        return path_feeds
+
+    def offset(self, axis, target, relative):
+        """How far axis moves to target, or None when that is unknown."""
+        if relative:
+            return target
+        start = self.position[axis]
+        return None if start is None or target is None else target - start
+
+    def move_axis(self, axis, value, relative, feed):
+        start = self.position[axis]
+        try:
+            seconds = self.move_time(start, value, relative, feed)
+            if relative:
+                self.position[axis] = None if start is None else start + value
+            else:
+                self.position[axis] = value
+        except TypeError:   # an axis without a value
+            return None
+        return seconds
+
+    def run(self, steps):
+        """Sends steps from the current modal state."""
+        path_feeds = self.track(steps)
+        lines, state, suppressed = self.plan(steps, self.state(), path_feeds)
+        self.relative_mode, self.feed, self.at_home = state
+        self.suppressed += suppressed
+        for line in lines:
+            self.send(line)
+
+    def send_rendered(self, rendered):
+        """Writes the bytes of a Rendered for the current modal state, built
+        on its first send from that state and then reused. They are kept by
+        this maker, not the Rendered, which other threads may be sending."""
+        path_feeds = tuple(self.track(rendered.steps))
+        key = rendered, self.state(), path_feeds
+        variant = self.variants.get(key)
+        if variant is None:
+            lines, state, suppressed = self.plan(rendered.steps, self.state(), path_feeds)
+            variant = b''.join(self.encode(line) for line in lines), state, suppressed
+            self.variants[key] = variant
+        data, state, suppressed = variant
+        self.relative_mode, self.feed, self.at_home = state
+        self.suppressed += suppressed
+        self.write(data)
 
     def go_home(self):
-        self.send(_gcodes.get(gcode.HOME))
+        self.run(self.home_steps())
 
     def set_absolute(self):
-        self.relative_mode = False
-        self.send(_gcodes.get(gcode.ABSOLUTE))
+        self.run([(gcode.ABSOLUTE,)])
 
     def set_relative(self):
-        self.relative_mode = True
-        self.send(_gcodes.get(gcode.RELATIVE))
+        self.run([(gcode.RELATIVE,)])
 
     def move_lin(self, value, rmode=False, speed=10):
-        flow = ' F' + str(self.motorspeed(speed, 'linMaxFlow'))
-        self.set_relative() if rmode is True else self.set_absolute()
-        self.send(_gcodes.get(gcode.MOVE_LIN) + str(value) + flow)
+        self.run(self.lin_steps(value, rmode, speed))
 
     def move_rot(self, value, rmode=False, speed=10):
-        flow = ' F' + str(self.motorspeed(speed, 'rotMaxFlow'))
-        self.set_relative() if rmode is True else self.set_absolute()
-        self.send(_gcodes.get(gcode.MOVE_ROT) + str(value) + flow)
+        self.run(self.rot_steps(value, rmode, speed))
+
+    def move(self, distance, lin_relative, angle, rot_relative, speed=10):
+        """MOVETO: both axes, as one coordinated line when enabled and possible."""
+        self.run(self.move_steps(distance, lin_relative, angle, rot_relative, speed))
 
     def wait(self, value):
-        self.send(_gcodes.get(gcode.WAIT) + str(value))
+        self.run(self.wait_steps(value))
+
+    def report(self):
+        return (f'{self.moves} moves, {self.coordinated_moves} coordinated, '
+                f'{self.suppressed} commands suppressed, estimated motion {self.motion_time:.1f} s, '
+                f'coordinated moves saved {self.coordinated_saving:.1f} s')
+
+    @staticmethod
+    def home_steps():
+        return [(gcode.HOME,)]
+
+    @staticmethod
+    def wait_steps(value):
+        return [(gcode.WAIT, value)]
+
+    @staticmethod
+    def mode_step(rmode):
+        return (gcode.RELATIVE,) if rmode is True else (gcode.ABSOLUTE,)
+
+    def lin_steps(self, value, rmode=False, speed=10):
+        return [self.mode_step(rmode), (gcode.MOVE_LIN, value, self.motorspeed(speed, 'linMaxFlow'))]
+
+    def rot_steps(self, value, rmode=False, speed=10):
+        return [self.mode_step(rmode), (gcode.MOVE_ROT, value, self.motorspeed(speed, 'rotMaxFlow'))]
+
+    def render_home(self):
+        """The Rendered of go_home()."""
+        return Rendered(self.home_steps())
+
+    def render_wait(self, value):
+        """The Rendered of wait(value)."""
+        return Rendered(self.wait_steps(value))
+
+    def move_steps(self, distance, lin_relative, angle, rot_relative, speed=10):
+        """A MOVETO is one G1 X.. Z.. when coordinated moves are on and both
+        axes use the same positioning mode, otherwise a linear then a rotary
+        move. The step carries both axis feeds; its F word is worked out from
+        the move vector when it is sent, see path_feed()."""
+        if self.coordinated and lin_relative == rot_relative and angle is not None:
+            return [self.mode_step(lin_relative),
+                    (gcode.MOVE_XZ, distance, angle,
+                     self.motorspeed(speed, 'linMaxFlow'), self.motorspeed(speed, 'rotMaxFlow'))]
+        return self.lin_steps(distance, lin_relative, speed) + self.rot_steps(angle, rot_relative, speed)
+
+    def render_move(self, distance, lin_relative, angle, rot_relative, speed=10):
+        """The Rendered of move(distance, lin_relative, angle, rot_relative)."""
+        return Rendered(self.move_steps(distance, lin_relative, angle, rot_relative, speed))
@@ -7,13 +7,22 @@
 ###############################################################################
 from __init__ import logger
 from token_types import *
-from parser import Parser
-from lexer import Lexer
+from compiler import Compiler
+from semantic import SemanticAnalyzer
+from optimizer import Optimizer
+from clock import RealClock
+from io_pins import pin_level
+from safety import ProgramAborted
+from profiler import SEND
 from gcode_maker import GCodeMaker
-from gcode_maker import open_serial_port
 
+import logging
+import math
 import time
 
+# Execution engines
+TREE    = 'tree'      # NodeVisitor walk of the AST
+CLOSURE = 'closure'   # AST compiled once into closures by compiler.Compiler
 
 class NodeVisitor(object):
     def __init__(self):
@@ -22,25 +31,69 @@ class NodeVisitor(object):
     def visit(self, node):
         method_name = 'visit_' + type(node).__name__
         visitor = getattr(self, method_name, self.generic_visit)
-        try:
-            logger.info(f'method name {method_name} attr {node.__dict__.keys()}')
-        except Exception:
-            logger.info(f'method name {method_name}')
+        if logger.isEnabledFor(logging.INFO):
+            # nodes have __slots__, not a __dict__; their state lists the fields
+            logger.info(f'method name {method_name} attr {list(node.__getstate__())}')
         return visitor(node)
 
+    def profile_with(self, profiler):
+        """Measures every visit with a profiler.NodeProfiler from now on.
+        Only this instance's visit is replaced; unprofiled visitors are untouched."""
+        self.visit = profiler.wrap_visit(self.visit)
+
     def generic_visit(self, node):
         raise Exception('No visit_{} method'.format(type(node).__name__))
 
 
 class Interpreter(NodeVisitor):
-    def __init__(self, parser):
+    def __init__(self, parser, cache=None, engine=TREE, optimize=False, coordinated=False,
+                 clock=None, backend=None, pins=None, profiler=None):
+        """parser: a Parser, or a program.CompiledProgram shared with other
+        interpreters; it is parsed, checked and optimized (by its own
+        optimize setting) once for all of them, and so is its CLOSURE code.
+        cache: optional ProgramCache consulted before parsing.
+        engine: TREE walks the AST, CLOSURE compiles it first and runs the closures.
+        optimize: fold constants and constant branches before the run,
+        self.optimizer.report() then tells what was removed.
+        coordinated: send each MOVETO as one two-axis move where possible,
+        self.gcode.report() then tells the estimated time saved.
+        clock: time source of the run, a clock.RealClock by default. With a
+        clock.VirtualClock and a clock.SimulatedMachine backend waits and moves
+        take no real time.
+        backend: where the G-code goes, e.g. a SimulatedMachine or a
+        GCodeStreamer; flushed when the program ends.
+        pins: an io_pins.PinBank the IO declarations are set up on. Without one
+        IO is not connected: output levels are only kept in the scope and
+        reading an input raises NameError.
+        profiler: a profiler.NodeProfiler counting and timing every node and
+        the G-code writes (under profiler.SEND), or a profiler.LineProfiler
+        doing so per source line; it dumps its report when the run ends.
+        None, the default, leaves the interpreter unmeasured.
+        self.run_time holds the clock time the run took.
+        """
+        if engine not in (TREE, CLOSURE):
+            raise ValueError(f'Unknown engine {engine}')
         NodeVisitor.__init__(self)
-        self.gcode = GCodeMaker()
+        self.gcode = GCodeMaker(coordinated=coordinated, serial=backend)
+        self.clock = clock if clock is not None else RealClock()
+        self.backend = backend
+        self.pins = pins
+        self.abort = None       # set to a safety.Trip to stop before the next statement, see SafetyMonitor
+        self.run_time = None
         self.parser = parser
+        self.cache = cache
+        self.engine = engine
+        self.optimizer = Optimizer() if optimize else None
         self.GLOBAL_SCOPE = {}
         self.declaredDict = {}
         self.waypointDict = {}
         self.io_Dict = {}
+        self.symbols = None
+        self.slots = []
+        self.profiler = profiler
+        if profiler is not None:
+            self.profile_with(profiler)
+            self.gcode.write = profiler.wrap(SEND, self.gcode.write)
 
     def getType(self, node):
         """Recursive call to find terminal node.
@@ -69,7 +122,6 @@ class Interpreter(NodeVisitor):
 
     def handleTypeConversion(self, lType, rValue):
         """ This code is be used if type conversion is NOT allowed."""
-        import math
         if lType == INTEGER:
             rValue = math.trunc(rValue)
         elif lType == REAL:
@@ -98,15 +150,19 @@ class Interpreter(NodeVisitor):
     def visit_VarDecl(self, node):
         self.declaredDict[node.var_node.value] = node.type_node.value
 
-    def visit_IO_(self,node):
-        # TODO add IO functionality
-        pass
+    def visit_IO_(self, node):
+        if self.pins is not None:
+            self.pins.declare(node.value, node.direction, node.pin)
 
     def visit_Type(self, node):
         pass
 
     def visit_BinOp(self, node):
         try:
+            if node.op.type == AND:
+                return pin_level(self.visit(node.left)) and pin_level(self.visit(node.right))
+            elif node.op.type == OR:
+                return pin_level(self.visit(node.left)) or pin_level(self.visit(node.right))
             rightvalue = self.visit(node.right)
             leftvalue = self.visit(node.left)
 
@@ -135,8 +191,8 @@ class Interpreter(NodeVisitor):
             else:
                 return False
         except Exception as e:
-            print(e)
-            raise e
+            logger.info(f'{node.op.value} at line {node.line} column {node.column} failed: {e}')
+            raise
 
     def visit_Num(self, node):
         return node.value
@@ -147,10 +203,14 @@ class Interpreter(NodeVisitor):
             return +self.visit(node.expr)
         elif op == MINUS:
             return -self.visit(node.expr)
+        elif op == NOT:
+            return not pin_level(self.visit(node.expr))
 
     def visit_Compound(self, node):
         if hasattr(node, 'children'):
             for child in node.children:
+                if self.abort is not None:
+                    self.stop()
                 self.visit(child)
 
     def visit_Assign(self, node):
@@ -158,7 +218,14 @@ class Interpreter(NodeVisitor):
         try:
             lType = self.declaredDict[lVarName]  # test var has been declared
         except KeyError:
-            raise Exception(f"Variable {lVarName} not declared")
+            symbol = self.symbols.symbols.get(lVarName) if self.symbols is not None else None
+            if symbol is None or symbol.kind != IO:
+                raise Exception(f"Variable {lVarName} not declared")
+            level = pin_level(self.visit(node.right))
+            if self.pins is not None:
+                self.pins.write(lVarName, level)
+            self.GLOBAL_SCOPE[lVarName] = level
+            return
         rvalue = self.visit(node.right)
         rvalue = self.handleTypeConversion(lType, rvalue)
         self.GLOBAL_SCOPE[lVarName] = rvalue
@@ -171,6 +238,8 @@ class Interpreter(NodeVisitor):
         var_name = node.value
         var_value = self.GLOBAL_SCOPE.get(var_name)
         if var_value is None:
+            if self.pins is not None and var_name in self.pins:
+                return self.pins.read(var_name)
             raise NameError(f'{repr(var_name)} is not in the GLOBAL Table.')
         else:
             return var_value
@@ -206,10 +275,9 @@ class Interpreter(NodeVisitor):
             waypoint = self.visit(distance)
             distance = waypoint.get('distance')
             angle = waypoint.get('angle')
-        relative = False if type(distance).__name__ == 'Num' else True
-        self.gcode.move_lin(self.visit(distance), relative)
-        relative = False if type(angle).__name__ == 'Num' else True
-        self.gcode.move_rot(self.visit(angle), relative)
+        lin_relative = False if type(distance).__name__ == 'Num' else True
+        rot_relative = False if type(angle).__name__ == 'Num' else True
+        self.gcode.move(self.visit(distance), lin_relative, self.visit(angle), rot_relative)
 
     def visit_Turn(self, node):
         move = self.visit(node.moveTo)
@@ -223,10 +291,59 @@ class Interpreter(NodeVisitor):
         #     self.gcode.send(-1, 0)
         # self.gcode.send('ABSOLUTE')
 
+    def stop(self):
+        """Ends the run at a node boundary after a safety trip."""
+        trip = self.abort
+        trip.aborted = time.perf_counter()
+        raise ProgramAborted(str(trip))
+
     def interpret(self):
-        tree = self.parser.parse()
+        start = self.clock.now()
+        try:
+            return self.run()
+        finally:
+            self.run_time = self.clock.now() - start
+            if self.profiler is not None:
+                self.profiler.dump()
+
+    def prepare(self):
+        """The tree to run, parsed and checked, None for an empty program;
+        sets self.symbols."""
+        prepare = getattr(self.parser, 'prepare', None)
+        if prepare is not None:     # a shared program.CompiledProgram
+            tree, self.symbols = prepare()
+            return tree
+        if self.cache is not None:
+            tree = self.cache.parse(self.parser)
+        else:
+            tree = self.parser.parse()
+        if tree is None:
+            return None
+        self.symbols = SemanticAnalyzer().analyze(tree)
+        if self.optimizer is not None:
+            tree = self.optimizer.optimize(tree)
+            logger.info(self.optimizer.report())
+        return tree
+
+    def run(self):
+        tree = self.prepare()
         if tree is None:
             return ''
-        # TODO test the tree.GLOBAL_SCOPE and tree.declarations agree
-        return self.visit(tree)
+        if self.engine == CLOSURE:
+            shared = getattr(self.parser, 'compile', None)
+            if shared is not None and self.profiler is None:
+                program = shared(self.gcode)
+            else:
+                program = Compiler(self.symbols, self.gcode, self.profiler).compile(tree)
+            self.slots = self.symbols.new_store()
+            try:
+                result = program(self)
+            finally:
+                self.GLOBAL_SCOPE.update(self.symbols.scope(self.slots))
+        else:
+            result = self.visit(tree)
+        flush = getattr(self.backend, 'flush', None)
+        if flush is not None:
+            flush()
+        return result
 
@@ -0,0 +1,154 @@
+""" GPIO for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  IO PINS                                                                    #
+#                                                                             #
+###############################################################################
+import time
+
+from token_types import *
+
+
+def pin_level(value):
+    """The level an assigned value drives an output to; also the truth
+    NOT, AND and OR give their operands."""
+    return value not in (0, False, None)
+
+
+class EdgeStats(object):
+    """Count, mean and worst of a series of latencies in seconds."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return f'{self.count} edges, avg {self.mean() * 1e6:.1f} us, max {self.max * 1e6:.1f} us'
+
+
+class InputPin(object):
+    """A PININ: value is the level last reported by an edge callback, so
+    reading it costs an attribute load, not a GPIO read.
+    edge is the perf_counter() time of an edge the program has not read yet.
+    listeners are called with (InputPin, edge_time) on every edge."""
+    def __init__(self, name, device):
+        self.name = name
+        self.device = device
+        self.value = bool(device.is_active)
+        self.edge = None
+        self.listeners = []
+
+
+class PinBank(object):
+    """The IO declarations of a program on gpiozero devices.
+    Inputs are edge-triggered: gpiozero calls back from its own thread on
+    every change and the callback stores the new level in the pin's
+    snapshot. The interpreter reads the snapshot without a lock; a single
+    attribute store is atomic, so it sees either the old or the new level.
+    Outputs are written straight to the device.
+    pin_factory: a gpiozero pin factory, e.g. gpiozero.pins.mock.MockFactory()
+    for tests; None uses gpiozero's default.
+    on_edge: called with (InputPin, edge_time) from the callback thread.
+    self.callback_latency: physical edge to callback, from gpiozero's edge ticks.
+    self.read_latency: physical edge to the first read by the program.
+    """
+    def __init__(self, pin_factory=None, pull_up=False, on_edge=None):
+        self.pin_factory = pin_factory
+        self.pull_up = pull_up
+        self.on_edge = on_edge
+        self.inputs = {}
+        self.outputs = {}
+        self.levels = {}    # output device: last level written to it
+        self.by_pin = {}    # pin number: (direction, name set up first)
+        self.callback_latency = EdgeStats()
+        self.read_latency = EdgeStats()
+
+    def declare(self, name, direction, pin):
+        """Sets up the device of one IO declaration; a name set up already
+        is kept as it is, a second name for a pin shares its device."""
+        import gpiozero
+        if name in self.inputs or name in self.outputs:
+            return
+        if pin in self.by_pin:
+            used_as, first = self.by_pin[pin]
+            if used_as != direction:
+                raise ValueError(f'Pin {pin} of {name} is already {used_as} {first}')
+            if direction == PININ:
+                self.inputs[name] = self.inputs[first]
+            else:
+                self.outputs[name] = self.outputs[first]
+            return
+        self.by_pin[pin] = (direction, name)
+        if direction == PININ:
+            device = gpiozero.DigitalInputDevice(pin, pull_up=self.pull_up, pin_factory=self.pin_factory)
+            entry = self.inputs[name] = InputPin(name, device)
+            device.when_activated = lambda device: self.changed(entry, True, device.active_time)
+            device.when_deactivated = lambda device: self.changed(entry, False, device.inactive_time)
+        elif direction == PINOUT:
+            device = self.outputs[name] = gpiozero.DigitalOutputDevice(pin, pin_factory=self.pin_factory)
+            self.levels[device] = False
+        else:
+            raise ValueError(f'Unknown pin direction {direction} of {name}')
+
+    def changed(self, entry, value, age):
+        """Edge callback; age is the seconds since gpiozero saw the edge."""
+        age = age or 0.0
+        edge = time.perf_counter() - age
+        entry.value = value
+        entry.edge = edge
+        self.callback_latency.add(age)
+        for listener in entry.listeners:
+            listener(entry, edge)
+        if self.on_edge is not None:
+            self.on_edge(entry, edge)
+
+    def watch(self, name, listener):
+        """Calls listener(InputPin, edge_time) from the callback thread on
+        every edge of the input name."""
+        self.inputs[name].listeners.append(listener)
+
+    def read(self, name):
+        entry = self.inputs.get(name)
+        if entry is None:
+            return self.levels[self.outputs[name]]
+        edge = entry.edge
+        if edge is not None:
+            entry.edge = None
+            self.read_latency.add(time.perf_counter() - edge)
+        return entry.value
+
+    def write(self, name, value):
+        level = pin_level(value)
+        device = self.outputs[name]
+        if level:
+            device.on()
+        else:
+            device.off()
+        self.levels[device] = level
+        return level
+
+    def __contains__(self, name):
+        return name in self.inputs or name in self.outputs
+
+    def close(self):
+        devices = [entry.device for entry in self.inputs.values()] + list(self.outputs.values())
+        for device in set(devices):
+            device.close()
+        self.inputs = {}
+        self.outputs = {}
+        self.levels = {}
+        self.by_pin = {}
+
+    def report(self):
+        return (f'{len(self.inputs)} input names, {len(self.outputs)} output names; '
+                f'edge to callback {self.callback_latency}; edge to program {self.read_latency}')
@@ -6,13 +6,29 @@
 #                                                                             #
 ###############################################################################
 
+import re
+from operator import itemgetter
+
 from token_types import *
 
 
-class Token(object):
-    def __init__(self, type_, value):
-        self.type = type_
-        self.value = value
+class Token(tuple):
+    """A lexeme: (type, value, line, column) as an immutable tuple, so tokens
+    can be shared by any number of parsed trees and threads.
+    line, column: 1-based source position of the token's first character,
+    None for tokens made up after lexing. They are not part of the comparison."""
+    __slots__ = ()
+
+    def __new__(cls, type_, value, line=None, column=None):
+        return tuple.__new__(cls, (type_, value, line, column))
+
+    type = property(itemgetter(0))
+    value = property(itemgetter(1))
+    line = property(itemgetter(2))
+    column = property(itemgetter(3))
+
+    def __getnewargs__(self):
+        return tuple(self)
 
     def __eq__(self, other):
         if self.type == other.type and self.value == other.value:
@@ -20,6 +36,11 @@ class Token(object):
         else:
             return False
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
     def __str__(self):
         """String representation of the class instance.
 
@@ -40,13 +61,14 @@ class Token(object):
 VAR_TYPES = [INTEGER, BOOL, REAL, INTEGER_CONST, BOOL_CONST, REAL_CONST]
 
 RESERVED_KEYWORDS = {
+    'AND': Token('AND', 'AND'),
     'BEGIN': Token('BEGIN', 'BEGIN'),
     'BOOL': Token('BOOL', 'BOOL'),
     'DIV': Token('INTEGER_DIV', 'DIV'),
     'ELSE': Token('ELSE', 'ELSE'),
     'END': Token('END', 'END'),
     'ENDIF': Token('ENDIF', 'ENDIF'),
-    'FALSE': Token('BOOL_CONST', 'FALSE'),
+    'FALSE': Token('BOOL_CONST', False),
     'HOME': Token('HOME', 'HOME'),
     'IF': Token('IF', 'IF'),
     'INTEGER': Token('INTEGER', 'INTEGER'),
@@ -55,10 +77,11 @@ RESERVED_KEYWORDS = {
     'LOOP': Token('LOOP', 'LOOP'),
     'MOVETO': Token('MOVETO', 'MOVETO'),
     'NOT': Token('NOT', 'NOT'),
+    'OR': Token('OR', 'OR'),
     'PROGRAM': Token('PROGRAM', 'PROGRAM'),
     'REAL': Token('REAL', 'REAL'),
     'THEN': Token('THEN', 'THEN'),
-    'TRUE': Token('BOOL_CONST', 'TRUE'),
+    'TRUE': Token('BOOL_CONST', True),
     'TURN': Token('TURN', 'TURN'),
     'UNTIL': Token('UNTIL', 'UNTIL'),
     'VAR': Token('VAR', 'VAR'),
@@ -67,88 +90,113 @@ RESERVED_KEYWORDS = {
 }
 
 
+# Whole-token patterns tried by the Lexer in a single regex match. Leading
+# whitespace is consumed by the same match. A comment only matches its
+# opening brace; skip_comment() finds the end.
+_TOKEN_PATTERNS = [
+    ('COMMENT', r'\{'),
+    ('REAL', r'\d+\.\d*'),
+    ('INT', r'\d+'),
+    ('ID', r'[^\W\d]+'),
+    ('OP', r':=|==|!=|<=|>=|[<>;:,+\-*/().]'),
+    ('END', r'\Z'),
+]
+_MASTER_RE = re.compile(r'(?P<WS>\s*)(?:' + '|'.join(
+    f'(?P<{name}>{pattern})' for name, pattern in _TOKEN_PATTERNS) + ')')
+_WS_RE = re.compile(r'\s*')
+_NUMBER_RE = re.compile(r'\d+(\.\d*)?')
+_ID_RE = re.compile(r'[^\W\d]+')
+
+OPERATORS = {
+    ':=': ASSIGN,
+    '==': EQUAL,
+    '!=': NEQUAL,
+    '<=': LTE,
+    '>=': GTE,
+    '<': LT,
+    '>': GT,
+    ';': SEMI,
+    ':': COLON,
+    ',': COMMA,
+    '+': PLUS,
+    '-': MINUS,
+    '*': MUL,
+    '/': FLOAT_DIV,
+    '(': LPAREN,
+    ')': RPAREN,
+    '.': DOT,
+}
+
+
 class Lexer(object):
     def __init__(self, text):
         """Tokenize string, e.g. '(4 + 2) * 3 - 6 / 2'.
+           Matches one whole token per step with a compiled master regex and
+           dispatches on the name of the matching group.
            self.pos:  an index into self.text
-           self.line: the line number count used to report error location.
+           self.line_count: the line number count used to report error location.
            self.line_pos: index within active line used to report position of error.
         """
         self.text = text
-        # self.pos is an index into self.text
         self.line_count = 0
-        self.line_pos = 0
+        self.line_start = 0  # index of the newline that started the active line
+        self.line_origin = -1  # same, but -1 on the first line: columns count from 1
         self.pos = 0
-        self.current_char = self.text[self.pos]
+
+    @property
+    def current_char(self):
+        return self.text[self.pos] if self.pos < len(self.text) else None
+
+    @property
+    def line_pos(self):
+        return self.pos - self.line_start
 
     def error(self):
         """ Reports the location of an invalid character in the input text
         """
         raise ValueError(f"Invalid character '{self.current_char}' in line {self.line_count} at position {self.line_pos}")
 
-    def advance(self):
-        """Advance the `pos` pointer and set the `current_char` variable.
-           Also keeps track of where we are in the line
-        """
-        self.pos += 1
-        self.line_pos += 1
+    def position(self, index):
+        """1-based (line, column) of text[index] on the active line."""
+        return self.line_count + 1, index - self.line_origin
 
-        if self.pos > len(self.text) - 1:
-            self.current_char = None  # Indicates end of input
-        else:
-            self.current_char = self.text[self.pos]
-
-    def peek(self):
-        """Look at next character in text without consuming it.
-        """
-        peek_pos = self.pos + 1
-        if peek_pos > len(self.text) - 1:
-            return None
-        else:
-            return self.text[peek_pos]
-
-    def skip_whitespace(self):
-        while self.current_char is not None and self.current_char.isspace():
-            if self.current_char == '\n':
-                self.line_count += 1
-                self.line_pos = 0
-            self.advance()
+    def skip_whitespace(self, end):
+        """Consumes text up to end, counting the newlines on the way."""
+        newline = self.text.rfind('\n', self.pos, end)
+        if newline != -1:
+            self.line_count += self.text.count('\n', self.pos, newline + 1)
+            self.line_start = self.line_origin = newline
+        self.pos = end
 
     def skip_comment(self):
         """Scans text for closing brace. Raises exception on EOL.
         """
-        while self.current_char != '}':
-            self.advance()
-            if self.current_char == '\n':
-                raise Exception(f'Missing closing brace at line {self.line_count} position {self.line_pos}')
-        self.advance()  # the closing curly brace
+        close = self.text.find('}', self.pos)
+        newline = self.text.find('\n', self.pos)
+        if close == -1 or -1 < newline < close:
+            self.pos = newline if newline != -1 else len(self.text)
+            raise Exception(f'Missing closing brace at line {self.line_count} position {self.line_pos}')
+        self.pos = close + 1
 
     def number(self):
         """Return a (multidigit) integer or float consumed from the input."""
-        result = ''
-        while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-        if self.current_char == '.':
-            result += self.current_char
-            self.advance()
-            while self.current_char is not None and self.current_char.isdigit():
-                result += self.current_char
-                self.advance()
-            token = Token('REAL_CONST', float(result))
-        else:
-            token = Token('INTEGER_CONST', int(result))
-        return token
+        line, column = self.position(self.pos)
+        match = _NUMBER_RE.match(self.text, self.pos)
+        self.pos = match.end()
+        if match.group(1) is None:
+            return Token(INTEGER_CONST, int(match.group()), line, column)
+        return Token(REAL_CONST, float(match.group()), line, column)
 
     def _id(self):
         """Handle identifiers and reserved keywords"""
-        result = ''
-        while self.current_char is not None and self.current_char.isidentifier():
-            result += self.current_char
-            self.advance()
-
-        token = RESERVED_KEYWORDS.get(result, Token(ID, result))
-        return token
+        line, column = self.position(self.pos)
+        match = _ID_RE.match(self.text, self.pos)
+        self.pos = match.end()
+        result = match.group()
+        keyword = RESERVED_KEYWORDS.get(result)
+        if keyword is None:
+            return Token(ID, result, line, column)
+        return Token(keyword.type, keyword.value, line, column)
 
     def get_next_token(self):
         """Lexical analyzer (also known as scanner or tokenizer)
@@ -156,96 +204,32 @@ class Lexer(object):
         This method is responsible for breaking a sentence
         apart into tokens. One token at a time.
         """
-        while self.current_char is not None:
-
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
-
-            if self.current_char == '{':
-                self.advance()
+        text = self.text
+        while True:
+            match = _MASTER_RE.match(text, self.pos)
+            if match is None:
+                self.skip_whitespace(_WS_RE.match(text, self.pos).end())
+                self.error()
+            kind = match.lastgroup
+            start, end = match.span(kind)
+            if start != self.pos:
+                self.skip_whitespace(start)
+            if kind == 'COMMENT':
                 self.skip_comment()
                 continue
-
-            if self.current_char.isidentifier():
-                return self._id()
-
-            if self.current_char.isdigit():
-                return self.number()
-
-            if self.current_char == ':' and self.peek() == '=':
-                self.advance()
-                self.advance()
-                return Token(ASSIGN, ':=')
-
-            if self.current_char == '=' and self.peek() == '=':
-                self.advance()
-                self.advance()
-                return Token(EQUAL, '==')
-
-            if self.current_char == '!' and self.peek() == '=':
-                self.advance()
-                self.advance()
-                return Token(NEQUAL, '!=')
-
-            if self.current_char == '<' and self.peek() == '=':
-                self.advance()
-                self.advance()
-                return Token(LTE, '<=')
-
-            if self.current_char == '>' and self.peek() == '=':
-                self.advance()
-                self.advance()
-                return Token(GTE, '>=')
-
-            if self.current_char == '<' and self.peek() != '=':
-                self.advance()
-                return Token(LT, '<')
-
-            if self.current_char == '>' and self.peek() != '=':
-                self.advance()
-                return Token(GT, '>')
-
-            if self.current_char == ';':
-                self.advance()
-                return Token(SEMI, ';')
-
-            if self.current_char == ':':
-                self.advance()
-                return Token(COLON, ':')
-
-            if self.current_char == ',':
-                self.advance()
-                return Token(COMMA, ',')
-
-            # TODO need to test for typo like * instead of +
-            if self.current_char == '+':
-                self.advance()
-                return Token(PLUS, '+')
-
-            if self.current_char == '-':
-                self.advance()
-                return Token(MINUS, '-')
-
-            if self.current_char == '*':
-                self.advance()
-                return Token(MUL, '*')
-
-            if self.current_char == '/':
-                self.advance()
-                return Token(FLOAT_DIV, '/')
-
-            if self.current_char == '(':
-                self.advance()
-                return Token(LPAREN, '(')
-
-            if self.current_char == ')':
-                self.advance()
-                return Token(RPAREN, ')')
-
-            if self.current_char == '.':
-                self.advance()
-                return Token(DOT, '.')
-            else:
-                self.error()
-        return Token(EOF, None)
+            self.pos = end
+            line, column = self.line_count + 1, start - self.line_origin
+            if kind == 'OP':
+                value = text[start:end]
+                return Token(OPERATORS[value], value, line, column)
+            if kind == 'ID':
+                value = text[start:end]
+                keyword = RESERVED_KEYWORDS.get(value)
+                if keyword is None:
+                    return Token(ID, value, line, column)
+                return Token(keyword.type, keyword.value, line, column)
+            if kind == 'INT':
+                return Token(INTEGER_CONST, int(text[start:end]), line, column)
+            if kind == 'REAL':
+                return Token(REAL_CONST, float(text[start:end]), line, column)
+            return Token(EOF, None, line, column)
@@ -1,23 +1,132 @@
+""" Runs a CLIQ test robot program
+
+    python main.py program.txt --port /dev/ttyUSB0
+    python main.py program.txt --check      only validates, loads no hardware support
+"""
+import sys
+
 from parser import Parser
 from lexer import Lexer
-from gcode_maker import open_serial_port
-from interpreter import Interpreter
+
+
+async def run_async(interpreter, streamer):
+    async with streamer:
+        await interpreter.interpret()
+
+
+def check(text):
+    """Lexes, parses and name-checks a program. Imports the lexer, the parser
+    and the semantic checks only: no serial, GPIO or interpreter modules."""
+    from semantic import SemanticAnalyzer
+    tree = Parser(Lexer(text)).parse()
+    symbols = SemanticAnalyzer().analyze(tree)
+    return tree, symbols
+
 
 def main():
-    import sys
-    try:
-        text = open(sys.argv[1], 'r').read()
-    except IndexError:
-        text = open('../cliq_test.txt', 'r').read()
+    import argparse
+    argparser = argparse.ArgumentParser(description='Run a CLIQ test robot program')
+    argparser.add_argument('program', nargs='?', default='../cliq_test.txt')
+    argparser.add_argument('--port', help='serial port of the controller, e.g. the emulator pty')
+    argparser.add_argument('--coordinated', action='store_true', help='move both axes at once')
+    argparser.add_argument('--async', dest='use_async', action='store_true',
+                           help='run on an asyncio event loop, awaiting the firmware instead of blocking')
+    argparser.add_argument('--gpio', action='store_true', help='connect the IO declarations to the GPIO pins')
+    argparser.add_argument('--profile', action='store_true',
+                           help='time every node class and the G-code output, report on exit or SIGUSR1')
+    argparser.add_argument('--profile-lines', action='store_true',
+                           help='count and time every program line, its waits and moves included')
+    argparser.add_argument('--check', action='store_true', help='only check the program, do not run it')
+    argparser.add_argument('--simulate', action='store_true',
+                           help='run against the firmware model in virtual time, no robot needed')
+    args = argparser.parse_args()
+    path = args.program
+    coordinated = args.coordinated
+    text = open(path, 'r').read()
+    if args.check:
+        try:
+            tree, symbols = check(text)
+        except Exception as ex:
+            print(f'{path}: {ex}')
+            sys.exit(1)
+        print(f'{path}: OK, {tree.name}, {len(symbols)} names')
+        return
+
+    # the hardware stacks are loaded only once a run starts
+    import asyncio
+    from gcode_maker import open_serial_port
+    from interpreter import Interpreter, CLOSURE
+    from clock import VirtualClock, SimulatedMachine
+    from program_cache import ProgramCache, cache_dir_for
+    from streamer import GCodeStreamer, AsyncGCodeStreamer
+    from serial_worker import SerialWorker
+    from async_interpreter import AsyncInterpreter
+    from io_pins import PinBank
+    from safety import SafetyMonitor, ProgramAborted
+    from profiler import NodeProfiler, LineProfiler
 
     try:
         lexer = Lexer(text)
         parser = Parser(lexer)
-        interpreter = Interpreter(parser)
-        with open_serial_port():
+        if args.simulate:
+            clock = VirtualClock()
+            machine = SimulatedMachine(clock)
+            profiler = None
+            if args.profile_lines:
+                profiler = LineProfiler(text, output=sys.stderr, clock=clock, machine=machine.finish_time)
+            interpreter = Interpreter(parser, cache=ProgramCache(cache_dir_for(path)), engine=CLOSURE,
+                                      optimize=True, coordinated=coordinated, clock=clock, backend=machine,
+                                      profiler=profiler)
             interpreter.interpret()
+            print(f'simulated time {interpreter.run_time:.1f} s, {len(machine.errors)} firmware errors')
+            return
+        if args.use_async:
+            with open_serial_port(args.port) as port:
+                streamer = AsyncGCodeStreamer(port)
+                interpreter = AsyncInterpreter(parser, backend=streamer, cache=ProgramCache(cache_dir_for(path)),
+                                               optimize=True, coordinated=coordinated)
+                asyncio.run(run_async(interpreter, streamer))
+                print(streamer.report())
+            print(interpreter.gcode.report())
+            return
+        pins = PinBank() if args.gpio else None
+        profiler = None
+        if args.profile_lines:
+            profiler = LineProfiler(text, output=sys.stderr)
+        elif args.profile:
+            profiler = NodeProfiler(output=sys.stderr)
+        if profiler is not None:
+            profiler.install_signal()
+        interpreter = Interpreter(parser, cache=ProgramCache(cache_dir_for(path)), optimize=True,
+                                  coordinated=coordinated, pins=pins, profiler=profiler)
+        aborted = None
+        with open_serial_port(args.port) as port:
+            streamer = GCodeStreamer(port)
+            with SerialWorker(streamer) as worker:
+                interpreter.gcode.serial = worker
+                monitor = None
+                if pins is not None:
+                    monitor = SafetyMonitor(pins, halt=streamer.halt, on_trip=[streamer.abort, worker.discard])
+                    monitor.attach(interpreter)
+                # caught in here, open_serial_port() would swallow it
+                try:
+                    interpreter.interpret()
+                except ProgramAborted as ex:
+                    aborted = ex
+            streamer.flush()
+            print(streamer.report())
+            print(worker.report())
+            if monitor is not None:
+                print(monitor.report())
         for k, v in sorted(interpreter.GLOBAL_SCOPE.items()):
             print('{} = {}'.format(k, v))
+        print(interpreter.gcode.report())
+        if pins is not None:
+            print(pins.report())
+            pins.close()
+        if aborted is not None:
+            print(f'{path}: aborted, {aborted}')
+            sys.exit(1)
     except Exception as ex:
         raise ex
 
@@ -0,0 +1,172 @@
+""" Constant folding optimizer for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  OPTIMIZER                                                                  #
+#                                                                             #
+###############################################################################
+from token_types import *
+from lexer import Token
+from parser import BinOp, UnaryOp, Compound, Assign, Bool, Num, IfNode, Loop, Wait, Moveto, \
+    Program, Block, Waypoint
+from compiler import BINARY_OPS, LOGICAL_OPS
+from io_pins import pin_level
+
+
+def children(node):
+    """The child nodes of any AST node."""
+    name = type(node).__name__
+    if name == 'Program':
+        return [node.block]
+    if name == 'Block':
+        return node.declarations + node.io_list + node.waypoint_list + (node.compound_statement,)
+    if name == 'VarDecl':
+        return [node.var_node, node.type_node]
+    if name == 'Waypoint':
+        return list(node.point.values())
+    if name == 'Compound':
+        return node.children
+    if name in ('Assign', 'BinOp'):
+        return [node.left, node.right]
+    if name == 'UnaryOp':
+        return [node.expr]
+    if name == 'IfNode':
+        return [node.logicNode, node.true, node.false]
+    if name == 'Loop':
+        return [node.statements, node.logicNode]
+    if name == 'Wait':
+        return [node.token.value]
+    if name == 'Moveto':
+        return list(node.value.values())
+    return []
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in children(node))
+
+
+def constant(value, at=None):
+    """A Num or Bool node holding value, at the source position of at."""
+    if isinstance(value, bool):
+        return Bool(Token(BOOL_CONST, value), at)
+    if isinstance(value, int):
+        return Num(Token(INTEGER_CONST, value), at)
+    return Num(Token(REAL_CONST, value), at)
+
+
+def is_constant(node):
+    return type(node).__name__ in ('Num', 'Bool')
+
+
+class Optimizer(object):
+    """Folds constant BinOp and UnaryOp subtrees into Num or Bool nodes,
+    replaces IF and LOOP statements whose test is constant with the branch
+    that runs, and drops NoOp statements from Compound lists.
+    Changed nodes are rebuilt at the source position of the node they
+    replace; the tree passed in is left untouched.
+    Runs after semantic analysis, so removed branches have been checked.
+    """
+    def __init__(self):
+        self.folded = 0
+        self.branches = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    def optimize(self, tree):
+        self.nodes_before += count_nodes(tree)
+        tree = self.visit(tree)
+        self.nodes_after += count_nodes(tree)
+        return tree
+
+    def report(self):
+        return (f'Optimizer: folded {self.folded} expressions, removed {self.branches} constant branches, '
+                f'{self.nodes_before} -> {self.nodes_after} nodes '
+                f'({self.nodes_before - self.nodes_after} removed)')
+
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__
+        visitor = getattr(self, method_name, None)
+        return node if visitor is None else visitor(node)
+
+    def visit_Program(self, node):
+        return Program(node.name, self.visit(node.block), node)
+
+    def visit_Block(self, node):
+        waypoints = [self.visit(waypoint) for waypoint in node.waypoint_list]
+        return Block(node.declarations, node.io_list, waypoints, self.visit(node.compound_statement), node)
+
+    def visit_Waypoint(self, node):
+        point = {axis: self.fold_axis(value) for axis, value in node.point.items()}
+        return Waypoint(node.token, point, node)
+
+    def fold_axis(self, node):
+        """Folds the operands of a move axis but keeps its top node, because a
+        signed or computed axis is a relative move and a bare Num is absolute."""
+        name = type(node).__name__
+        if name == 'UnaryOp':
+            return UnaryOp(node.op, self.visit(node.expr), node)
+        if name == 'BinOp':
+            return BinOp(self.visit(node.left), node.op, self.visit(node.right), node)
+        return node
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = BINARY_OPS.get(node.op.type) or LOGICAL_OPS.get(node.op.type)
+        if op is not None and is_constant(left) and is_constant(right):
+            try:
+                value = op(left.value, right.value)
+            except Exception:
+                value = None    # leave it to fail when it runs
+            if isinstance(value, (bool, int, float)):
+                self.folded += 1
+                return constant(value, node)
+        return BinOp(left, node.op, right, node)
+
+    def visit_UnaryOp(self, node):
+        expr = self.visit(node.expr)
+        if node.op.type in (PLUS, MINUS) and type(expr).__name__ == 'Num':
+            self.folded += 1
+            return constant(expr.value if node.op.type == PLUS else -expr.value, node)
+        if node.op.type == NOT and is_constant(expr):
+            self.folded += 1
+            return constant(not pin_level(expr.value), node)
+        return UnaryOp(node.op, expr, node)
+
+    def visit_Compound(self, node):
+        children = []
+        for child in node.children:
+            child = self.visit(child)
+            name = type(child).__name__
+            if name == 'NoOp':
+                continue
+            if name == 'Compound':
+                children.extend(child.children)
+            else:
+                children.append(child)
+        return Compound(children, node)
+
+    def visit_Assign(self, node):
+        return Assign(node.left, node.op, self.visit(node.right), node)
+
+    def visit_IfNode(self, node):
+        test = self.visit(node.logicNode)
+        if is_constant(test):
+            self.branches += 1
+            return self.visit(node.true if test.value is True else node.false)
+        return IfNode(node.token, test, self.visit(node.true), self.visit(node.false), node)
+
+    def visit_Loop(self, node):
+        test = self.visit(node.logicNode)
+        statements = self.visit(node.statements)
+        if is_constant(test) and test.value is True:
+            self.branches += 1
+            return statements
+        return Loop(node.token, test, statements, node)
+
+    def visit_Wait(self, node):
+        return Wait(Token(node.token.type, self.visit(node.token.value), node.token.line, node.token.column), node)
+
+    def visit_Moveto(self, node):
+        point = {axis: self.fold_axis(value) for axis, value in node.value.items()}
+        return Moveto(Token(node.token.type, point, node.token.line, node.token.column), node)
@@ -0,0 +1,190 @@
+""" Multi-fixture orchestrator for CLIQ test robot interpreter
+
+Runs one program per fixture, each fixture on its own serial port and
+thread, e.g. several fixtures on the USB ports of one Raspberry Pi:
+
+    python orchestrator.py --fixture cliq_test.txt /dev/ttyUSB0 --fixture cliq_test.txt /dev/ttyUSB1
+    python orchestrator.py --config fixtures.txt     lines of: name program port
+"""
+
+###############################################################################
+#                                                                             #
+#  ORCHESTRATOR                                                               #
+#                                                                             #
+###############################################################################
+import threading
+import time
+
+from __init__ import logger
+from program import CompiledProgram
+from interpreter import Interpreter, CLOSURE
+from gcode_maker import open_serial_port
+from streamer import GCodeStreamer, StreamError
+from serial_worker import SerialWorker
+
+# Fixture states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE    = 'done'
+FAULT   = 'fault'
+
+
+class Fixture(threading.Thread):
+    """Runs program on the controller at port. Any exception, including a
+    line the firmware rejects, faults this fixture only; the error is kept
+    in self.error and the thread ends.
+    connect: opens the port, a context manager like gcode_maker.open_serial_port.
+    """
+    def __init__(self, name, program, port, coordinated=False, connect=open_serial_port):
+        super().__init__(name=f'Fixture {name}', daemon=True)
+        self.fixture = name
+        self.program = program
+        self.port = port
+        self.coordinated = coordinated
+        self.connect = connect
+        self.status = PENDING
+        self.error = None
+        self.interpreter = None
+        self.streamer = None
+        self.started = None
+        self.finished = None
+
+    def run(self):
+        self.status = RUNNING
+        self.started = time.monotonic()
+        try:
+            self.interpreter = Interpreter(self.program, engine=CLOSURE, optimize=True,
+                                           coordinated=self.coordinated)
+            with self.connect(self.port) as port:
+                # caught in here, open_serial_port() would swallow it
+                try:
+                    self.stream(port)
+                except Exception as ex:
+                    self.error = ex
+        except Exception as ex:
+            self.error = ex
+        finally:
+            self.finished = time.monotonic()
+        if self.error is not None:
+            self.status = FAULT
+            logger.info(f'{self.name} faulted: {type(self.error).__name__}: {self.error}')
+        else:
+            self.status = DONE
+
+    def stream(self, port):
+        if port is None:
+            raise StreamError(f'Serial port {self.port} not available')
+        self.streamer = GCodeStreamer(port, on_ack=self.check_response)
+        with SerialWorker(self.streamer) as worker:
+            self.interpreter.gcode.serial = worker
+            self.interpreter.interpret()
+        self.streamer.flush()
+
+    def check_response(self, line, response):
+        if not response.startswith(b'ok'):
+            raise StreamError(f'Firmware rejected {line!r}: {response.decode("ascii", "replace")}')
+
+    def lines(self):
+        """Lines the firmware acknowledged so far."""
+        return self.streamer.acknowledged if self.streamer is not None else 0
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished if self.finished is not None else time.monotonic()) - self.started
+
+    def report(self):
+        error = f', {type(self.error).__name__}: {self.error}' if self.error is not None else ''
+        return f'{self.fixture:<12} {self.port:<16} {self.status:<8} {self.lines():6d} lines {self.elapsed():8.1f} s{error}'
+
+
+class Orchestrator(object):
+    """Runs a set of fixtures concurrently. Each program text is parsed once
+    however many fixtures run it."""
+    def __init__(self, coordinated=False, connect=open_serial_port):
+        self.coordinated = coordinated
+        self.connect = connect
+        self.programs = {}
+        self.fixtures = []
+        self.started = None
+
+    def add(self, name, text, port):
+        """Adds a fixture running the program text on port."""
+        program = self.programs.get(text)
+        if program is None:
+            program = self.programs[text] = CompiledProgram(text, optimize=True)
+        fixture = Fixture(name, program, port, self.coordinated, self.connect)
+        self.fixtures.append(fixture)
+        return fixture
+
+    def start(self):
+        self.started = time.monotonic()
+        for fixture in self.fixtures:
+            fixture.start()
+
+    def wait(self, timeout=None, interval=None, on_status=None):
+        """Waits for every fixture to end, calling on_status(self) every
+        interval seconds meanwhile. Returns True when all have ended."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(fixture.is_alive() for fixture in self.fixtures):
+            pause = interval if interval is not None else 0.1
+            if deadline is not None:
+                pause = min(pause, deadline - time.monotonic())
+                if pause <= 0:
+                    return False
+            time.sleep(pause)
+            if on_status is not None and interval is not None:
+                on_status(self)
+        return True
+
+    def run(self, timeout=None):
+        self.start()
+        return self.wait(timeout)
+
+    def faults(self):
+        return [fixture for fixture in self.fixtures if fixture.status == FAULT]
+
+    def throughput(self):
+        """Lines acknowledged per second over all fixtures, up to now or
+        until the last fixture ended."""
+        if self.started is None:
+            return 0.0
+        ends = [fixture.finished for fixture in self.fixtures]
+        end = max(ends) if None not in ends else time.monotonic()
+        elapsed = end - self.started
+        return sum(fixture.lines() for fixture in self.fixtures) / elapsed if elapsed else 0.0
+
+    def report(self):
+        counts = {state: 0 for state in (PENDING, RUNNING, DONE, FAULT)}
+        for fixture in self.fixtures:
+            counts[fixture.status] += 1
+        lines = [fixture.report() for fixture in self.fixtures]
+        lines.append(f'{len(self.fixtures)} fixtures: ' + ', '.join(f'{count} {state}' for state, count in counts.items())
+                     + f', {len(self.programs)} programs parsed once, {self.throughput():.1f} lines/s total')
+        return '\n'.join(lines)
+
+
+def main():
+    import argparse
+    argparser = argparse.ArgumentParser(description='Run CLIQ test robot programs on several fixtures')
+    argparser.add_argument('--fixture', nargs=2, action='append', default=[], metavar=('PROGRAM', 'PORT'))
+    argparser.add_argument('--config', help='file of lines: name program port')
+    argparser.add_argument('--coordinated', action='store_true', help='move both axes at once')
+    argparser.add_argument('--interval', type=float, default=5.0, help='seconds between status reports')
+    args = argparser.parse_args()
+    entries = [(f'fixture{i + 1}', program, port) for i, (program, port) in enumerate(args.fixture)]
+    if args.config:
+        for line in open(args.config, 'r'):
+            fields = line.split('#')[0].split()
+            if fields:
+                entries.append(tuple(fields))
+    orchestrator = Orchestrator(coordinated=args.coordinated)
+    for name, path, port in entries:
+        orchestrator.add(name, open(path, 'r').read(), port)
+    orchestrator.start()
+    orchestrator.wait(interval=args.interval, on_status=lambda o: print(o.report() + '\n'))
+    print(orchestrator.report())
+
+
+if __name__ == '__main__':
+    main()
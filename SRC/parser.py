@@ -7,149 +7,289 @@
 #  PARSER                                                                     #
 #                                                                             #
 ###############################################################################
+from types import MappingProxyType
+
 from token_types import *
+from lexer import Token
+
+_set = object.__setattr__   # how constructors fill in an Immutable
+
+
+def _frozen(mapping):
+    """A read-only view of a copy of mapping, for the mapping fields of nodes.
+    The views do not pickle: the nodes holding one store a dict instead."""
+    return MappingProxyType(dict(mapping))
+
+
+class Immutable(object):
+    """Base of objects whose fields are only set by their constructor, so
+    one instance can be shared by any number of interpreters and threads.
+    Subclasses declare their fields in __slots__ and set them with _set."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot delete '{name}'")
+
+    def __getstate__(self):
+        return {name: getattr(self, name)
+                for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            _set(self, name, value)
+
+
+class AST(Immutable):
+    """ Base class for all node entities.
+    Nodes are immutable and hold no run-time state, so one tree can be run
+    by any number of interpreters and threads at once. They have __slots__
+    and no __dict__: a large program holds hundreds of thousands of them.
+    line, column: 1-based source position of the node's first token,
+    None for nodes made up after parsing and for shared literals.
+    """
+    __slots__ = ('line', 'column')
+
+    def __init__(self, at=None):
+        """at: the token or node the source position is taken from."""
+        _set(self, 'line', None if at is None else at.line)
+        _set(self, 'column', None if at is None else at.column)
 
-class AST(object):
-    """ Base class for all node entities"""
-    pass
 
 class BinOp(AST):
     """ Binary operation node """
-    def __init__(self, left, op, right):
-        self.left = left
-        self.token = self.op = op
-        self.right = right
+    __slots__ = ('left', 'token', 'op', 'right')
+
+    def __init__(self, left, op, right, at=None):
+        AST.__init__(self, at)
+        _set(self, 'left', left)
+        _set(self, 'token', op)
+        _set(self, 'op', op)
+        _set(self, 'right', right)
 
 
-#TODO 'Not' operation should be handled as unaryop
 class UnaryOp(AST):
     """ Negation or inversion op node"""
-    def __init__(self, op, expr):
-        self.token = self.op = op
-        self.expr = expr
+    __slots__ = ('token', 'op', 'expr')
+
+    def __init__(self, op, expr, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', op)
+        _set(self, 'op', op)
+        _set(self, 'expr', expr)
 
 
 class Compound(AST):
     """Represents a 'BEGIN ... END' block node
-    The children are the block statements"""
-    def __init__(self):
-        self.children = []
+    The children are the block statements, a tuple"""
+    __slots__ = ('children',)
+
+    def __init__(self, children=(), at=None):
+        AST.__init__(self, at)
+        _set(self, 'children', tuple(children))
 
 
 class Assign(AST):
     """ Var assingment node"""
-    def __init__(self, left, op, right):
-        self.left = left
-        self.token = self.op = op
-        self.right = right
+    __slots__ = ('left', 'token', 'op', 'right')
+
+    def __init__(self, left, op, right, at=None):
+        AST.__init__(self, at)
+        _set(self, 'left', left)
+        _set(self, 'token', op)
+        _set(self, 'op', op)
+        _set(self, 'right', right)
 
 
 class Bool(AST):
-    """The Bool node type_ bool with value TRUE/FALSE."""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    """The Bool node type_ bool with value True/False."""
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'value', token.value)
 
 class Num(AST):
     """The Num node is type_ integer/real with value numeric."""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'value', token.value)
 
 
 class Var(AST):
     """The Var node has type_ ID with value of varname."""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'value', token.value)
 
 
 class IO_(Var):
     """The IO node has type_ IO with pin type and value of IO name."""
-    def __init__(self, token, in_out, pin):
-        token.type = IO
-        super(IO_, self).__init__(token)
-        self.direction = in_out
-        self.pin = pin
+    __slots__ = ('direction', 'pin')
+
+    def __init__(self, token, in_out, pin, at=None):
+        super(IO_, self).__init__(Token(IO, token.value, token.line, token.column), at)
+        _set(self, 'direction', in_out)
+        _set(self, 'pin', pin)
 
 class Waypoint(Var):
-    """The Var node has type_ WP with value of waypoint name."""
-    def __init__(self, token, point):
-        token.type = WAYPOINT
-        super(Waypoint, self).__init__(token)
-        self.point = point
+    """The Var node has type_ WP with value of waypoint name.
+    point: read-only mapping of 'distance' and 'angle' to their nodes."""
+    __slots__ = ('point',)
+
+    def __init__(self, token, point, at=None):
+        super(Waypoint, self).__init__(Token(WAYPOINT, token.value, token.line, token.column), at)
+        _set(self, 'point', _frozen(point))
+
+    def __getstate__(self):
+        state = super(Waypoint, self).__getstate__()
+        state['point'] = dict(self.point)
+        return state
+
+    def __setstate__(self, state):
+        super(Waypoint, self).__setstate__(state)
+        _set(self, 'point', _frozen(self.point))
 
 class IfNode(AST):
     """The If node is constructed from a logic test
     followed by a 'true' statement list and a 'false' statement list.
     If no ELSE present the 'false' statement will be no op.
     """
-    def __init__(self, token, logicNode, truestatements, falsestatements):
-        self.token = token
-        self.logicNode = logicNode
-        self.true = truestatements
-        self.false = falsestatements
+    __slots__ = ('token', 'logicNode', 'true', 'false')
+
+    def __init__(self, token, logicNode, truestatements, falsestatements, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'logicNode', logicNode)
+        _set(self, 'true', truestatements)
+        _set(self, 'false', falsestatements)
 
 class Loop(AST):
     """The Loop node contains a statement list followed by a logic test.
     """
-    def __init__(self, token, logicNode, statements):
-        self.token = token
-        self.logicNode = logicNode
-        self.statements = statements
+    __slots__ = ('token', 'logicNode', 'statements')
+
+    def __init__(self, token, logicNode, statements, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'logicNode', logicNode)
+        _set(self, 'statements', statements)
 
 
 class Wait(AST):
     """The Wait node type_ WAIT with value wait time."""
-    def __init__(self, token):
-        self.token = token
+    __slots__ = ('token',)
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
 
 class Home(AST):
     """The Home node type_ HOME with value NoOp."""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'value', token.value)
 
 
 class Moveto(AST):
-    """The Moveto node type_ MOVETO with value waypoint name."""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    """The Moveto node type_ MOVETO with value the read-only mapping of
+    'distance' and 'angle' to their nodes, a waypoint Var as the distance."""
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        point = _frozen(token.value)
+        _set(self, 'token', Token(token.type, point, token.line, token.column))
+        _set(self, 'value', point)
+
+    def __getstate__(self):
+        state = AST.__getstate__(self)
+        token = self.token
+        state['token'] = Token(token.type, dict(token.value), token.line, token.column)
+        state['value'] = None   # the token's value, set again on unpickling
+        return state
+
+    def __setstate__(self, state):
+        AST.__setstate__(self, state)
+        point = _frozen(self.token.value)
+        _set(self, 'token', Token(self.token.type, point, self.token.line, self.token.column))
+        _set(self, 'value', point)
 
 
 class NoOp(AST):
     """Dead end node to stop recursion"""
-    pass
+    __slots__ = ()
 
 class Program(AST):
     """Program (top of tree) node, with value program name"""
-    def __init__(self, name, block):
-        self.name = name
-        self.block = block
+    __slots__ = ('name', 'block')
+
+    def __init__(self, name, block, at=None):
+        AST.__init__(self, at)
+        _set(self, 'name', name)
+        _set(self, 'block', block)
 
 
 class Block(AST):
     """Block node holds in-scope variable declarations and is the top of the tree
-     for all statements in the block"""
-    def __init__(self, declarations: list, io_list: list, waypoint_list: list, compound_statement: Compound):
-        self.declarations = declarations
-        self.io_list = io_list
-        self.waypoint_list = waypoint_list
-        self.compound_statement = compound_statement
+     for all statements in the block. The declaration lists are kept as tuples."""
+    __slots__ = ('declarations', 'io_list', 'waypoint_list', 'compound_statement')
+
+    def __init__(self, declarations: list, io_list: list, waypoint_list: list, compound_statement: Compound,
+                 at=None):
+        AST.__init__(self, at)
+        _set(self, 'declarations', tuple(declarations))
+        _set(self, 'io_list', tuple(io_list))
+        _set(self, 'waypoint_list', tuple(waypoint_list))
+        _set(self, 'compound_statement', compound_statement)
 
 class VarDecl(AST):
     """Declared variable node with var type and var name"""
-    def __init__(self, var_node, type_node):
-        self.var_node = var_node
-        self.type_node = type_node
+    __slots__ = ('var_node', 'type_node')
+
+    def __init__(self, var_node, type_node, at=None):
+        AST.__init__(self, at)
+        _set(self, 'var_node', var_node)
+        _set(self, 'type_node', type_node)
 
 
 class Type(AST):
     """ creates a type aware node"""
-    def __init__(self, token):
-        self.token = token
-        self.value = token.value
+    __slots__ = ('token', 'value')
+
+    def __init__(self, token, at=None):
+        AST.__init__(self, at)
+        _set(self, 'token', token)
+        _set(self, 'value', token.value)
+
+
+# Binding power of the operators, higher binds tighter
+BINARY_PRECEDENCE = {
+    OR: 1,
+    AND: 2,
+    EQUAL: 4, NEQUAL: 4, LT: 4, LTE: 4, GT: 4, GTE: 4,
+    PLUS: 5, MINUS: 5,
+    MUL: 6, INTEGER_DIV: 6, FLOAT_DIV: 6,
+}
+PREFIX_PRECEDENCE = {
+    NOT: 3,
+    PLUS: 7, MINUS: 7,
+}
+COMPARISONS = frozenset((EQUAL, NEQUAL, LT, LTE, GT, GTE))
+
+_PREFIX = object()  # marks a pending prefix operator or parenthesis
 
 
 class Parser(object):
@@ -158,6 +298,7 @@ class Parser(object):
     placed lower in the tree."""
     def __init__(self, lexer):
         self.lexer = lexer
+        self.literals = {}
         # set current token to the first token taken from the input
         self.current_token = self.lexer.get_next_token()
 
@@ -180,12 +321,13 @@ class Parser(object):
         """Lexeme
         program : PROGRAM variable SEMI block DOT
         """
+        token = self.current_token
         self.eat(PROGRAM)
         var_node = self.variable()
         prog_name = var_node.value
         self.eat(SEMI)
         block_node = self.block()
-        program_node = Program(prog_name, block_node)
+        program_node = Program(prog_name, block_node, at=token)
         self.eat(DOT)
         return program_node
 
@@ -193,11 +335,12 @@ class Parser(object):
         """Lexeme
         block : declarations compound_statement
         """
+        token = self.current_token
         declaration_list = self.declarations()
         io_list = self.declarations()
         waypoint_list = self.declarations()
         compound_list = self.compound_statement()
-        node = Block(declaration_list, io_list, waypoint_list, compound_list)
+        node = Block(declaration_list, io_list, waypoint_list, compound_list, at=token)
         return node
 
     def compound_statement(self, beginBlock=True):
@@ -205,16 +348,14 @@ class Parser(object):
         compound_statement: (BEGIN statement_list END) | statement_list
         'if' and 'loop' have compound statements without BEGIN/END.
         """
+        token = self.current_token
         if beginBlock:
             self.eat(BEGIN)
             nodes = self.statement_list()
             self.eat(END)
         else:
             nodes = self.statement_list()
-        compound_node = Compound()
-        for node in nodes:
-            compound_node.children.append(node)
-        return compound_node
+        return Compound(nodes, at=token)
 
     def assignment_statement(self):
         """Lexeme
@@ -224,7 +365,7 @@ class Parser(object):
         token = self.current_token
         self.eat(ASSIGN)
         right = self.expr()
-        node = Assign(left, token, right)
+        node = Assign(left, token, right, at=left)
         return node
 
     def if_statement(self):
@@ -245,7 +386,7 @@ class Parser(object):
             statement_false = self.compound_statement(False)
         else:
             statement_false = NoOp()
-        node = IfNode(tokenIf, logic_exr, statement_true, statement_false)
+        node = IfNode(tokenIf, logic_exr, statement_true, statement_false, at=tokenIf)
         self.eat(ENDIF)
         return node
 
@@ -259,7 +400,7 @@ class Parser(object):
         statements = self.compound_statement(False)
         self.eat(UNTIL)
         logic_exr = self.expr()
-        node = Loop(looptoken, logic_exr, statements)
+        node = Loop(looptoken, logic_exr, statements, at=looptoken)
         return node
 
     def wait_statement(self):
@@ -268,8 +409,7 @@ class Parser(object):
         """
         waittoken = self.current_token
         self.eat(WAIT)
-        waittoken.value = self.expr()
-        node = Wait(waittoken)
+        node = Wait(Token(WAIT, self.expr(), waittoken.line, waittoken.column), at=waittoken)
         return node
 
     def moveto_statement(self):
@@ -284,15 +424,14 @@ class Parser(object):
             varnode_a = self.factor()
         else:
             varnode_a = self.empty()
-        movetoken.value = self.point(varnode_d, varnode_a)
-        node = Moveto(movetoken)
+        point = self.point(varnode_d, varnode_a)
+        node = Moveto(Token(MOVETO, point, movetoken.line, movetoken.column), at=movetoken)
         return node
 
     def home_statement(self):
         hometoken = self.current_token
         self.eat(HOME)
-        hometoken.value = self.empty()
-        node = Home(hometoken)
+        node = Home(Token(HOME, self.empty(), hometoken.line, hometoken.column), at=hometoken)
         return node
 
     def declarations(self):
@@ -321,7 +460,6 @@ class Parser(object):
                 wp_decl = self.waypoint_declaration()
                 declarations.append(wp_decl)
                 self.eat(SEMI)
-# TODO parser declarations: any time a var is used it needs to be checked that it has been declared
         return declarations
 
     def io_declaration(self):
@@ -335,7 +473,7 @@ class Parser(object):
         self.eat(ID)
         pin = self.current_token.value
         self.eat(INTEGER_CONST)
-        io_node = IO_(io_name, io_type, pin)  # first ID
+        io_node = IO_(io_name, io_type, pin, at=io_name)  # first ID
         return io_node
 
     def waypoint_declaration(self):
@@ -349,7 +487,7 @@ class Parser(object):
         waypoint['distance'] = self.factor()
         self.eat(COMMA)
         waypoint['angle'] = self.factor()
-        wp_node = Waypoint(waypoint_token, waypoint)  # first ID
+        wp_node = Waypoint(waypoint_token, waypoint, at=waypoint_token)  # first ID
         return wp_node
 
 
@@ -357,17 +495,15 @@ class Parser(object):
         """Lexeme
         variable_declaration : ID (COMMA ID)* COLON type_spec
         """
-        var_nodes = [Var(self.current_token)]  # first ID
-        self.eat(ID)
+        var_nodes = [self.variable()]  # first ID
 
         while self.current_token.type == COMMA:
             self.eat(COMMA)
-            var_nodes.append(Var(self.current_token))
-            self.eat(ID)
+            var_nodes.append(self.variable())
         self.eat(COLON)
         type_node = self.type_spec()
         var_declarations = [
-            VarDecl(var_node, type_node)
+            VarDecl(var_node, type_node, at=var_node)
             for var_node in var_nodes
         ]
         return var_declarations
@@ -389,7 +525,7 @@ class Parser(object):
             self.eat(REAL)
         else:
             self.error('type_spec', 'unknown type')
-        node = Type(token)
+        node = Type(token, at=token)
         return node
 
     def statement_list(self):
@@ -440,8 +576,18 @@ class Parser(object):
         """Lexeme
         variable : ID
         """
-        node = Var(self.current_token)
+        token = self.current_token
         self.eat(ID)
+        return Var(token, at=token)
+
+    def literal(self, node_class, token):
+        """Num or Bool node of a literal. Literals are flyweights, one node per
+        distinct value shared by every use in the program, so they carry no
+        source position; they are timed and reported with their statement."""
+        key = (token.type, token.value)
+        node = self.literals.get(key)
+        if node is None:
+            node = self.literals[key] = node_class(Token(token.type, token.value))
         return node
 
     @staticmethod
@@ -461,81 +607,94 @@ class Parser(object):
 
     def expr(self):
         """Lexeme
-        expr : term ((PLUS | MINUS | logical op) term)*
-        Evaluates current token as a logical or arithmetic operator.
-        Eats the op token and returns Binary Op node.
+        expr : expression of any precedence
         """
-        ops = [LT, LTE, GT, GTE, EQUAL, NEQUAL]
-        node = self.term()
-        token = self.current_token
-        if token.type in ops:
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.term())
-            return node
-
-        while token.type in (PLUS, MINUS):
-            if token.type == PLUS:
-                self.eat(PLUS)
-            elif token.type == MINUS:
-                self.eat(MINUS)
-            node = BinOp(left=node, op=token, right=self.term())
-            token = self.current_token
-        return node
+        return self.expression(BINARY_PRECEDENCE[OR])
 
     def term(self):
         """Lexeme
-        term : factor ((MUL | INTEGER_DIV | FLOAT_DIV) factor)*
+        term : expression of operators binding at least as tight as MUL
         """
-        node = self.factor()
-
-        while self.current_token.type in (MUL, INTEGER_DIV, FLOAT_DIV):
-            token = self.current_token
-            if token.type == MUL:
-                self.eat(MUL)
-            elif token.type == INTEGER_DIV:
-                self.eat(INTEGER_DIV)
-            elif token.type == FLOAT_DIV:
-                self.eat(FLOAT_DIV)
-            node = BinOp(left=node, op=token, right=self.factor())
-        return node
+        return self.expression(BINARY_PRECEDENCE[MUL])
 
     def factor(self):
         """Lexeme
-        factor : PLUS factor
-                  | MINUS factor
-                  | INTEGER_CONST
-                  | REAL_CONST
-                  | BOOL_CONST
-                  | BOOL_OP
-                  | LPAREN expr RPAREN
-                  | variable
+        factor : expression without binary operators outside parentheses,
+                 e.g. a MOVETO or WAYPOINT operand
         """
-        token = self.current_token
-        if token.type == PLUS:
-            self.eat(PLUS)
-            node = UnaryOp(token, self.factor())
-            return node
-        elif token.type == MINUS:
-            self.eat(MINUS)
-            node = UnaryOp(token, self.factor())
-            return node
-        elif token.type == INTEGER_CONST:
-            self.eat(INTEGER_CONST)
-            return Num(token)
-        elif token.type == BOOL_CONST:
-            self.eat(BOOL_CONST)
-            return Bool(token)
-        elif token.type == REAL_CONST:
-            self.eat(REAL_CONST)
-            return Num(token)
-        elif token.type == LPAREN:
-            self.eat(LPAREN)
-            node = self.expr()
-            self.eat(RPAREN)
-            return node
-        else:
-            node = self.variable()
-            return node
+        return self.expression(PREFIX_PRECEDENCE[PLUS] + 1)
+
+    def expression(self, min_precedence):
+        """Lexeme
+        expression : prefix* primary (binary prefix* primary)*
+        prefix : NOT | PLUS | MINUS | LPAREN
+        primary : INTEGER_CONST | REAL_CONST | BOOL_CONST | variable
+        Precedence climbing driven by BINARY_PRECEDENCE and PREFIX_PRECEDENCE.
+        Pending operators are kept on an explicit stack instead of the call
+        stack, so neither nesting nor length of an expression recurses.
+        Binary operators are left associative. Comparisons chain:
+        a < b <= c parses as (a < b) AND (b <= c); parentheses end a chain.
+        Only binary operators binding at least min_precedence are taken
+        outside parentheses. A prefix operator binds no looser than where it
+        stands, so a * NOT b + c is (a * NOT b) + c and factor() reads
+        NOT a == b as NOT a.
+        """
+        # pending entries: (_PREFIX, token, bound) for a prefix operator or an
+        # open parenthesis, or (left, op, first, comparison, precedence); the
+        # last item is the precedence a following binary operator must exceed
+        binary = BINARY_PRECEDENCE
+        prefix = PREFIX_PRECEDENCE
+        pending = []
+        while True:
+            token = self.current_token
+            while token.type in prefix or token.type == LPAREN:
+                self.eat(token.type)
+                if token.type == LPAREN:
+                    bound = 0
+                else:
+                    bound = max(prefix[token.type], pending[-1][-1] if pending else min_precedence - 1)
+                pending.append((_PREFIX, token, bound))
+                token = self.current_token
+            first = token
+            if token.type == INTEGER_CONST or token.type == REAL_CONST:
+                self.eat(token.type)
+                node = self.literal(Num, token)
+            elif token.type == BOOL_CONST:
+                self.eat(BOOL_CONST)
+                node = self.literal(Bool, token)
+            else:
+                node = self.variable()
+            comparison = None   # last comparison of the chain node ends
+            while True:
+                token = self.current_token
+                precedence = binary.get(token.type)
+                bound = pending[-1][-1] if pending else min_precedence - 1
+                if precedence is not None and precedence > bound:
+                    self.eat(token.type)
+                    pending.append((node, token, first, comparison, precedence))
+                    break
+                if not pending:
+                    return node
+                entry = pending.pop()
+                if entry[0] is _PREFIX:
+                    opener = entry[1]
+                    if opener.type == LPAREN:
+                        self.eat(RPAREN)
+                    else:
+                        node = UnaryOp(opener, node, at=opener)
+                    first = opener
+                    comparison = None
+                    continue
+                left, op, first, chained, precedence = entry
+                if op.type not in COMPARISONS:
+                    node = BinOp(left=left, op=op, right=node, at=first)
+                    comparison = None
+                elif chained is None:
+                    node = comparison = BinOp(left=left, op=op, right=node, at=first)
+                else:
+                    comparison = BinOp(left=chained.right, op=op, right=node, at=op)
+                    node = BinOp(left=left, op=Token(AND, AND, op.line, op.column), right=comparison,
+                                 at=first)
 
     def parse(self):
         """Lexemes
@@ -562,14 +721,14 @@ class Parser(object):
                   | empty
         assignment_statement : variable ASSIGN expr
         empty :
-        expr : term ((PLUS | MINUS) term)*
-        term : factor ((MUL | INTEGER_DIV | FLOAT_DIV) factor)*
-        factor : PLUS factor
-               | MINUS factor
-               | INTEGER_CONST
-               | REAL_CONST
-               | LPAREN expr RPAREN
-               | variable
+        expr : prefix* primary (binary prefix* primary)*
+        binary : OR | AND | EQUAL | NEQUAL | LT | LTE | GT | GTE
+               | PLUS | MINUS | MUL | INTEGER_DIV | FLOAT_DIV
+        prefix : NOT | PLUS | MINUS | LPAREN
+        primary : INTEGER_CONST
+                | REAL_CONST
+                | BOOL_CONST
+                | variable
         variable: ID
         """
         node = self.program()
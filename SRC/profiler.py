@@ -0,0 +1,202 @@
+""" Node profiler for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  PROFILER                                                                   #
+#                                                                             #
+###############################################################################
+import signal
+import sys
+import time
+
+SEND = 'GCodeMaker.send'    # label of the time spent writing G-code out
+
+
+class NodeProfiler(object):
+    """Counts calls and accumulates inclusive and exclusive time per label,
+    a node class name or SEND. Only what is wrapped is measured, so an
+    interpreter that never wraps anything pays nothing.
+    Exclusive time leaves out the time of wrapped calls made inside, so the
+    G-code writes of a MOVETO show up under SEND, not under Moveto.
+    output: stream dump() writes the report to, None for no dump.
+    """
+    def __init__(self, output=None, timer=time.perf_counter):
+        self.output = output
+        self.timer = timer
+        self.counts = {}
+        self.inclusive = {}
+        self.exclusive = {}
+        self.children = []      # per active call, time spent in wrapped callees
+
+    def wrap(self, label, function):
+        """function, measured under label."""
+        timer = self.timer
+        children = self.children
+        counts, inclusive, exclusive = self.counts, self.inclusive, self.exclusive
+        for table in (counts, inclusive, exclusive):
+            table.setdefault(label, 0)
+
+        def profiled(*args):
+            children.append(0.0)
+            start = timer()
+            try:
+                return function(*args)
+            finally:
+                elapsed = timer() - start
+                inner = children.pop()
+                counts[label] += 1
+                inclusive[label] += elapsed
+                exclusive[label] += elapsed - inner
+                if children:
+                    children[-1] += elapsed
+        return profiled
+
+    def label(self, node):
+        """What node is measured under, None for not measured."""
+        return type(node).__name__
+
+    def wrap_node(self, node, function):
+        """function, e.g. a compiled closure, measured under node's label."""
+        label = self.label(node)
+        return function if label is None else self.wrap(label, function)
+
+    def wrap_visit(self, visit):
+        """A NodeVisitor.visit that measures each node under its label."""
+        wrapped = {}
+
+        def profiled_visit(node):
+            label = self.label(node)
+            if label is None:
+                return visit(node)
+            function = wrapped.get(label)
+            if function is None:
+                function = wrapped[label] = self.wrap(label, visit)
+            return function(node)
+        return profiled_visit
+
+    def host_time(self):
+        """Exclusive time of everything but the G-code writes."""
+        return sum(seconds for label, seconds in self.exclusive.items() if label != SEND)
+
+    def report(self):
+        lines = [f'{"node":<16} {"calls":>9} {"inclusive ms":>13} {"exclusive ms":>13} {"us/call":>9}']
+        for label in sorted(self.exclusive, key=self.exclusive.get, reverse=True):
+            count = self.counts[label]
+            if not count:
+                continue
+            lines.append(f'{label:<16} {count:9d} {self.inclusive[label] * 1e3:13.3f} '
+                         f'{self.exclusive[label] * 1e3:13.3f} {self.exclusive[label] / count * 1e6:9.2f}')
+        send = self.exclusive.get(SEND, 0.0)
+        lines.append(f'host evaluation {self.host_time() * 1e3:.3f} ms, G-code out {send * 1e3:.3f} ms')
+        return '\n'.join(lines)
+
+    def dump(self):
+        """Writes the report to self.output, e.g. at the end of a run."""
+        if self.output is not None:
+            print(self.report(), file=self.output, flush=True)
+
+    def install_signal(self, signum=None):
+        """Dumps the report, to self.output or stderr, whenever signum
+        (SIGUSR1) arrives; returns the previous handler."""
+        signum = signum if signum is not None else signal.SIGUSR1
+
+        def dump(received, frame):
+            print(self.report(), file=self.output or sys.stderr, flush=True)
+        return signal.signal(signum, dump)
+
+
+class LineProfiler(NodeProfiler):
+    """Maps a run back to the lines of the program source. Per line it
+    counts the hits, how often execution came to the line from another one,
+    and accumulates the host time spent evaluating the line's nodes and the
+    machine time of the G-code the line sent. Nodes are placed by their
+    parser position; a LOOP's test is charged to its UNTIL line.
+    text: the program source.
+    machine: optional callable returning the time at which everything sent
+    so far is done, e.g. clock.SimulatedMachine.finish_time; a line is then
+    charged with how far its G-code pushed that out, i.e. the length of its
+    waits and moves. Without it a line is charged with the clock time its
+    writes were held up, which on a buffered controller falls on the line
+    that waits for room rather than on the slow move.
+    clock: time base of machine and of the run, the timer by default.
+    """
+    def __init__(self, text, output=None, timer=time.perf_counter, clock=None, machine=None):
+        NodeProfiler.__init__(self, output, timer)
+        self.source = text.splitlines()
+        self.now = clock.now if clock is not None else timer
+        self.machine = machine
+        self.machine_time = {}
+        self.lines = []         # lines being executed, innermost last
+
+    def label(self, node):
+        return node.line
+
+    def wrap(self, label, function):
+        if label == SEND:
+            return self.wrap_send(function)
+        timer = self.timer
+        children = self.children
+        lines = self.lines
+        counts, inclusive, exclusive = self.counts, self.inclusive, self.exclusive
+        for table in (counts, inclusive, exclusive):
+            table.setdefault(label, 0)
+
+        def profiled(*args):
+            entered = not lines or lines[-1] != label
+            lines.append(label)
+            children.append(0.0)
+            start = timer()
+            try:
+                return function(*args)
+            finally:
+                elapsed = timer() - start
+                inner = children.pop()
+                lines.pop()
+                if entered:     # nested nodes on the same line are one hit
+                    counts[label] += 1
+                    inclusive[label] += elapsed
+                exclusive[label] += elapsed - inner
+                if children:
+                    children[-1] += elapsed
+        return profiled
+
+    def wrap_send(self, function):
+        """The G-code writes: not host time, their machine time goes to the
+        line that sent them."""
+        timer, now, machine = self.timer, self.now, self.machine
+        children = self.children
+        lines = self.lines
+        machine_time = self.machine_time
+
+        def sent(*args):
+            before = now() if machine is None else max(now(), machine())
+            start = timer()
+            try:
+                return function(*args)
+            finally:
+                elapsed = timer() - start
+                after = now() if machine is None else machine()
+                line = lines[-1] if lines else None
+                machine_time[line] = machine_time.get(line, 0.0) + max(0.0, after - before)
+                if children:
+                    children[-1] += elapsed
+        return sent
+
+    def host_time(self):
+        return sum(self.exclusive.values())
+
+    def hotspots(self, count=10):
+        """The count lines with the most host plus machine time, slowest first."""
+        lines = (set(self.exclusive) | set(self.machine_time)) - {None}
+        return sorted(lines, key=lambda line: self.exclusive.get(line, 0.0) + self.machine_time.get(line, 0.0),
+                      reverse=True)[:count]
+
+    def report(self):
+        lines = [f'{"line":>5} {"hits":>9} {"host ms":>10} {"machine s":>10}  source']
+        for line in sorted((set(self.exclusive) | set(self.machine_time)) - {None}):
+            source = self.source[line - 1].strip() if 0 < line <= len(self.source) else ''
+            lines.append(f'{line:5d} {self.counts.get(line, 0):9d} {self.exclusive.get(line, 0.0) * 1e3:10.3f} '
+                         f'{self.machine_time.get(line, 0.0):10.3f}  {source}')
+        lines.append(f'host evaluation {self.host_time() * 1e3:.3f} ms, '
+                     f'machine {sum(self.machine_time.values()):.3f} s')
+        return '\n'.join(lines)
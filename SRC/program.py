@@ -0,0 +1,70 @@
+""" Shared programs for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  PROGRAM                                                                    #
+#                                                                             #
+###############################################################################
+import threading
+
+from lexer import Lexer
+from parser import Parser
+from semantic import SemanticAnalyzer
+from optimizer import Optimizer
+from compiler import Compiler
+
+
+class CompiledProgram(object):
+    """A program parsed, checked and optionally optimized once, then run by
+    any number of Interpreters and threads at the same time, e.g. by every
+    fixture testing with it. Pass it where an Interpreter takes its parser.
+    The tree is immutable and each Interpreter keeps its own run-time state
+    (scope, slots, G-code modal state), so runs share the tree as it is.
+    The CLOSURE engine's closures are compiled once per G-code setup too.
+    optimize: fold constants and constant branches, once for every run.
+    """
+    def __init__(self, text, optimize=False):
+        self.text = text
+        self.optimize = optimize
+        self.lock = threading.Lock()
+        self.tree = None
+        self.symbols = None
+        self.optimizer = None
+        self.error = None
+        self.parses = 0
+        self.compiled = {}
+
+    def prepare(self):
+        """(tree, symbols), made on the first call. A program that does
+        not parse or check raises the same error on every call."""
+        with self.lock:
+            if self.tree is None and self.error is None:
+                self.parses += 1
+                try:
+                    tree = Parser(Lexer(self.text)).parse()
+                    self.symbols = SemanticAnalyzer().analyze(tree)
+                    if self.optimize:
+                        self.optimizer = Optimizer()
+                        tree = self.optimizer.optimize(tree)
+                    self.tree = tree
+                except Exception as ex:
+                    self.error = ex
+        if self.error is not None:
+            raise self.error
+        return self.tree, self.symbols
+
+    def parse(self):
+        """The tree, so a CompiledProgram can stand in for a Parser."""
+        return self.prepare()[0]
+
+    def compile(self, gcode):
+        """The closure program for a GCodeMaker set up like gcode, compiled
+        on the first call for each setup. The closures keep their state in
+        the Interpreter they are run with."""
+        tree, symbols = self.prepare()
+        key = (gcode.modal, gcode.coordinated)
+        with self.lock:
+            program = self.compiled.get(key)
+            if program is None:
+                program = self.compiled[key] = Compiler(symbols, gcode).compile(tree)
+        return program
@@ -0,0 +1,117 @@
+""" On-disk cache of parsed programs for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  PROGRAM CACHE                                                              #
+#                                                                             #
+###############################################################################
+import hashlib
+import os
+import pickle
+
+import token_types
+import lexer
+import parser
+from __init__ import logger, __version__
+
+CACHE_DIR = '__t3001cache__'
+
+
+def source_hash(paths):
+    """Short hash of the contents of the files at paths."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# the code that decides the shape of a cached tree: any change to the tokens,
+# the grammar or the node classes gives a new version, so old entries miss
+FORMAT_VERSION = f'{__version__}+{source_hash(module.__file__ for module in (token_types, lexer, parser))}'
+
+
+class ProgramCache(object):
+    """Stores the Program tree built by Parser.parse() in `directory`, keyed on
+    a hash of the source text and the tree format version. A missing, stale
+    or unreadable entry is a miss, and the caller parses the source again.
+    Loading an entry unpickles it, which can run any code the file names, so
+    entries are only loaded from a directory that belongs to the current
+    user and that nobody else can write to, see trusted()."""
+    def __init__(self, directory=CACHE_DIR, version=FORMAT_VERSION):
+        self.directory = directory
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(b'\0')
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def path(self, text):
+        return os.path.join(self.directory, self.key(text) + '.pickle')
+
+    def trusted(self):
+        """Whether only the current user can have written the entries.
+        Platforms without file owners trust the directory."""
+        getuid = getattr(os, 'getuid', None)
+        if getuid is None:
+            return True
+        try:
+            status = os.stat(self.directory)
+        except OSError:
+            return False
+        return status.st_uid == getuid() and not status.st_mode & 0o022
+
+    def load(self, text):
+        """Returns the cached tree for text or None."""
+        if not os.path.isdir(self.directory):
+            return None
+        if not self.trusted():
+            logger.info(f'Not loading the program cache from {self.directory}: '
+                        f'not owned by this user or writable by others')
+            return None
+        try:
+            with open(self.path(text), 'rb') as f:
+                tree = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.info(f'Discarding unreadable program cache entry: {ex}')
+            return None
+        return tree
+
+    def store(self, text, tree):
+        """Writes tree to the cache. Failures only cost the next run a parse."""
+        path = self.path(text)
+        temp = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(temp, 'wb') as f:
+                pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except Exception as ex:
+            logger.info(f'Program cache not written: {ex}')
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def parse(self, parser):
+        """Returns the tree for the parser's source, from the cache if valid,
+        otherwise from parser.parse()."""
+        text = parser.lexer.text
+        tree = self.load(text)
+        if tree is not None:
+            self.hits += 1
+            return tree
+        self.misses += 1
+        tree = parser.parse()
+        self.store(text, tree)
+        return tree
+
+
+def cache_dir_for(program_path):
+    """The cache directory kept next to a program file."""
+    return os.path.join(os.path.dirname(os.path.abspath(program_path)), CACHE_DIR)
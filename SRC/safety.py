@@ -0,0 +1,123 @@
+""" Safety monitor for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  SAFETY                                                                     #
+#                                                                             #
+###############################################################################
+import threading
+import time
+
+import gcode
+from gcode_maker import linlimit_io, rotatlimit_io
+from token_types import *
+
+HALT_LINE = ('\n' + gcode._gcodes[gcode.HALT] + '\n').encode('ascii')   # ends any partly sent line first
+
+
+class ProgramAborted(Exception):
+    """The program was stopped by a safety trip."""
+    pass
+
+
+class Trip(object):
+    """One safety trip: perf_counter() times of the pin edge, of the halt
+    reaching the port and of the program stopping at a node boundary."""
+    def __init__(self, name, edge):
+        self.name = name
+        self.edge = edge
+        self.halted = None
+        self.aborted = None
+
+    def halt_latency(self):
+        return None if self.halted is None else self.halted - self.edge
+
+    def abort_latency(self):
+        return None if self.aborted is None else self.aborted - self.edge
+
+    def __str__(self):
+        return f'safety input {self.name} tripped'
+
+
+class SafetyMonitor(object):
+    """Watches the safety inputs of an io_pins.PinBank, by default the limit
+    switches on the linlimit_io and rotatlimit_io pins. The edge callback,
+    on gpiozero's thread, does the stop itself instead of leaving it to the
+    interpreter: it writes the firmware halt straight to the port, ahead of
+    the G-code still queued, then drops the queued commands and flags every
+    attached Interpreter. An Interpreter checks the flag before each
+    statement and raises ProgramAborted there, so the statement running at
+    the trip, e.g. a MOVETO waiting on a full queue, still makes its write;
+    the on_trip callbacks, e.g. GCodeStreamer.abort, are what drop it. Motion
+    already sent is stopped by the halt alone.
+    halt: writes bytes to the controller bypassing any queue and between two
+    lines, e.g. streamer.GCodeStreamer.halt.
+    on_trip: callables run after the halt, e.g. SerialWorker.discard.
+    inputs: {name: pin} of the safety inputs.
+    active: the level that trips, True for normally open switches.
+    """
+    def __init__(self, pins, halt, inputs=None, active=True, on_trip=()):
+        self.pins = pins
+        self.halt = halt
+        self.active = active
+        self.on_trip = list(on_trip)
+        self.interpreters = []
+        self.trips = []
+        self.tripped = None
+        self.lock = threading.Lock()
+        if inputs is None:
+            inputs = {'linlimit': linlimit_io, 'rotatlimit': rotatlimit_io}
+        self.inputs = list(inputs)
+        for name, pin in inputs.items():
+            pins.declare(name, PININ, pin)
+            pins.watch(name, self.edge)
+
+    def attach(self, interpreter):
+        """Interpreter to abort on a trip; one attached after a trip stops at once."""
+        self.interpreters.append(interpreter)
+        if self.tripped is not None:
+            interpreter.abort = self.tripped
+
+    def edge(self, entry, edge):
+        if entry.value == self.active:
+            self.trip(entry.name, edge)
+
+    def trip(self, name, edge=None):
+        """Stops everything; also callable by hand, e.g. from an e-stop button handler."""
+        trip = Trip(name, edge if edge is not None else time.perf_counter())
+        with self.lock:
+            first = self.tripped is None
+            if first:
+                self.tripped = trip
+        if not first:
+            return
+        try:
+            self.halt(HALT_LINE)
+        finally:
+            trip.halted = time.perf_counter()
+            self.trips.append(trip)
+            for interpreter in self.interpreters:
+                interpreter.abort = trip
+            for callback in self.on_trip:
+                callback()
+
+    def check(self):
+        """True while every safety input is at rest."""
+        return all(self.pins.read(name) != self.active for name in self.inputs)
+
+    def reset(self):
+        """Re-arms the monitor once the inputs are back at rest."""
+        if not self.check():
+            raise ProgramAborted('Safety input still active')
+        self.tripped = None
+        for interpreter in self.interpreters:
+            interpreter.abort = None
+
+    def report(self):
+        lines = []
+        for trip in self.trips:
+            halt = trip.halt_latency()
+            abort = trip.abort_latency()
+            lines.append(f'{trip.name}: halt sent after {halt * 1e6:.1f} us'
+                         + ('' if abort is None else f', program stopped after {abort * 1e6:.1f} us'))
+        return '\n'.join(lines) if lines else 'no safety trips'
@@ -0,0 +1,155 @@
+""" Semantic analysis for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  SEMANTIC ANALYSIS                                                          #
+#                                                                             #
+###############################################################################
+from token_types import *
+
+
+class SemanticError(Exception):
+    """A name is used in a way its declaration does not allow."""
+    pass
+
+
+class Symbol(object):
+    """A declared name: kind is VAR, IO or WAYPOINT, type_ is the declared
+    var type, the pin direction of an IO, or WAYPOINT.
+    slot is the index of the value in the interpreter's store."""
+    def __init__(self, name, kind, type_, slot):
+        self.name = name
+        self.kind = kind
+        self.type = type_
+        self.slot = slot
+
+    def __str__(self):
+        return f'Symbol({self.name}, {self.kind}, {self.type}, slot={self.slot})'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class SymbolTable(object):
+    """All the names of a program, one slot each, in declaration order."""
+    def __init__(self):
+        self.symbols = {}
+        self.names = []
+
+    def define(self, name, kind, type_):
+        if name in self.symbols:
+            raise SemanticError(f'Duplicate declaration of {name}')
+        symbol = Symbol(name, kind, type_, len(self.names))
+        self.symbols[name] = symbol
+        self.names.append(name)
+        return symbol
+
+    def lookup(self, name):
+        symbol = self.symbols.get(name)
+        if symbol is None:
+            raise SemanticError(f'Variable {name} not declared')
+        return symbol
+
+    def new_store(self):
+        """An empty value store, None marks a slot not assigned yet."""
+        return [None] * len(self.names)
+
+    def scope(self, store):
+        """The assigned slots of store as a name:value dict (GLOBAL_SCOPE)."""
+        return {name: value for name, value in zip(self.names, store) if value is not None}
+
+    def __len__(self):
+        return len(self.names)
+
+
+class SemanticAnalyzer(object):
+    """Checks a Program tree before it runs and builds its SymbolTable.
+    Every Var, Waypoint and IO_ name is resolved here, so undeclared names and
+    assignments to waypoints or input pins are rejected before the first statement runs.
+    """
+    def __init__(self):
+        self.symbols = SymbolTable()
+
+    def analyze(self, node):
+        method_name = 'analyze_' + type(node).__name__
+        analyzer = getattr(self, method_name, self.generic_analyze)
+        analyzer(node)
+        return self.symbols
+
+    def generic_analyze(self, node):
+        raise Exception('No analyze_{} method'.format(type(node).__name__))
+
+    def analyze_Program(self, node):
+        self.analyze(node.block)
+
+    def analyze_Block(self, node):
+        for declaration in node.declarations + node.io_list + node.waypoint_list:
+            self.analyze(declaration)
+        self.analyze(node.compound_statement)
+
+    def analyze_VarDecl(self, node):
+        self.symbols.define(node.var_node.value, VAR, node.type_node.value)
+
+    def analyze_IO_(self, node):
+        self.symbols.define(node.value, IO, node.direction)
+
+    def analyze_Waypoint(self, node):
+        self.analyze(node.point['distance'])
+        self.analyze(node.point['angle'])
+        self.symbols.define(node.value, WAYPOINT, WAYPOINT)
+
+    def analyze_Compound(self, node):
+        for child in node.children:
+            self.analyze(child)
+
+    def analyze_Assign(self, node):
+        symbol = self.symbols.lookup(node.left.value)
+        if symbol.kind == IO and symbol.type == PININ:
+            raise SemanticError(f'Cannot assign to input pin {symbol.name}')
+        if symbol.kind not in (VAR, IO):
+            raise SemanticError(f'Cannot assign to {symbol.kind} {symbol.name}')
+        self.analyze(node.right)
+
+    def analyze_Var(self, node):
+        self.symbols.lookup(node.value)
+
+    def analyze_BinOp(self, node):
+        self.analyze(node.left)
+        self.analyze(node.right)
+
+    def analyze_UnaryOp(self, node):
+        self.analyze(node.expr)
+
+    def analyze_IfNode(self, node):
+        self.analyze(node.logicNode)
+        self.analyze(node.true)
+        self.analyze(node.false)
+
+    def analyze_Loop(self, node):
+        self.analyze(node.statements)
+        self.analyze(node.logicNode)
+
+    def analyze_Wait(self, node):
+        self.analyze(node.token.value)
+
+    def analyze_Moveto(self, node):
+        distance = node.value['distance']
+        if type(distance).__name__ == 'Var':
+            symbol = self.symbols.lookup(distance.value)
+            if symbol.kind != WAYPOINT:
+                raise SemanticError(f'MOVETO {symbol.name} is not a waypoint')
+        else:
+            self.analyze(distance)
+            self.analyze(node.value['angle'])
+
+    def analyze_Num(self, node):
+        pass
+
+    def analyze_Bool(self, node):
+        pass
+
+    def analyze_Home(self, node):
+        pass
+
+    def analyze_NoOp(self, node):
+        pass
@@ -0,0 +1,112 @@
+""" Background serial writer for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  SERIAL WORKER                                                              #
+#                                                                             #
+###############################################################################
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 256        # commands waiting for the worker before write() blocks
+COALESCE_LIMIT = 64     # commands joined into one write
+
+
+class SerialWorker(threading.Thread):
+    """Owns the output sink (a serial port or a streamer.GCodeStreamer) and
+    writes to it from a background thread, so the interpreter only enqueues.
+    The queue is bounded: write() blocks while it is full (backpressure).
+    Commands already waiting are joined into one sink write, in order.
+    Use as a context manager, or call close(), to drain the queue on exit.
+    """
+    _STOP = object()
+
+    def __init__(self, sink, maxsize=QUEUE_SIZE, coalesce=COALESCE_LIMIT):
+        super().__init__(name='SerialWorker', daemon=True)
+        self.sink = sink
+        self.queue = queue.Queue(maxsize)
+        self.coalesce = coalesce
+        self.error = None
+        self.enqueued = 0
+        self.writes = 0
+        self.max_depth = 0
+        self.enqueue_time = 0.0
+        self.max_enqueue_latency = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, data):
+        """Queues data for the sink, blocking while the queue is full."""
+        if self.error is not None:
+            raise self.error
+        start = time.perf_counter()
+        self.queue.put(data)
+        latency = time.perf_counter() - start
+        self.enqueued += 1
+        self.enqueue_time += latency
+        self.max_enqueue_latency = max(self.max_enqueue_latency, latency)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self.queue.get()
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.coalesce:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch and self.error is None:
+                try:
+                    self.sink.write(b''.join(batch))
+                    self.writes += 1
+                except Exception as ex:
+                    self.error = ex     # reported to the interpreter by the next write()
+
+    def close(self):
+        """Writes everything queued, stops the thread and re-raises a write error."""
+        if self.is_alive():
+            self.queue.put(self._STOP)
+            self.join()
+        if self.error is not None:
+            raise self.error
+
+    def discard(self):
+        """Drops the commands still waiting, e.g. after an emergency stop,
+        and returns how many there were."""
+        dropped = 0
+        stopping = False
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                stopping = True
+            else:
+                dropped += 1
+        if stopping:
+            self.queue.put(self._STOP)
+        return dropped
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def report(self):
+        average = self.enqueue_time / self.enqueued if self.enqueued else 0.0
+        return (f'{self.enqueued} commands queued in {self.writes} writes, depth {self.depth()}, '
+                f'max depth {self.max_depth}, enqueue latency avg {average * 1e6:.1f} us '
+                f'max {self.max_enqueue_latency * 1e6:.1f} us')
@@ -0,0 +1,252 @@
+""" Flow-controlled G-code streaming for CLIQ test robot interpreter"""
+
+###############################################################################
+#                                                                             #
+#  STREAMER                                                                   #
+#                                                                             #
+###############################################################################
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from __init__ import logger
+
+RX_BUFFER_SIZE = 128    # bytes, the firmware's serial receive buffer
+ACK_TIMEOUT = 60.0      # seconds without any response before giving up, plus the dwells in flight
+
+
+class StreamError(Exception):
+    """The firmware stopped answering or rejected a line."""
+    pass
+
+
+def dwell_seconds(line):
+    """Seconds a G4 line holds the firmware's 'ok' back, 0 for other lines.
+    The pause is in seconds, or in milliseconds after a P."""
+    words = line.split()
+    if not words or words[0].upper() != b'G4':
+        return 0.0
+    argument = words[1].upper() if len(words) > 1 else b'0'
+    try:
+        if argument.startswith(b'P'):
+            return float(argument[1:]) / 1000.0
+        return float(argument.lstrip(b'S'))
+    except ValueError:
+        return 0.0
+
+
+class GCodeStreamer(object):
+    """Streams G-code to the firmware with character-counting flow control.
+    Lines are sent while the bytes not yet acknowledged fit in the firmware's
+    receive buffer, so the buffer stays full without overrunning it. Every 'ok'
+    (or 'error') acknowledges the oldest line in flight.
+    After abort(), e.g. on a safety trip, nothing more is sent.
+    Every write to the port holds port_lock, so a halt() from another thread
+    goes out between two lines, never inside one.
+    port: an open serial.Serial, or anything with write() and readline().
+    """
+    def __init__(self, port, rx_buffer=RX_BUFFER_SIZE, timeout=ACK_TIMEOUT, on_ack=None):
+        self.port = port
+        self.rx_buffer = rx_buffer
+        self.timeout = timeout
+        self.on_ack = on_ack    # called with (line, response) for each acknowledged line
+        self.in_flight = deque()
+        self.in_flight_bytes = 0
+        self.sent = 0
+        self.acknowledged = 0
+        self.max_depth = 0
+        self.errors = []
+        self.aborted = False
+        self.dropped = 0
+        self.port_lock = threading.Lock()
+
+    def write(self, data):
+        """Streams data, one or more newline terminated G-code lines."""
+        for line in data.splitlines(keepends=True):
+            self.send_line(line)
+
+    def send_line(self, line):
+        if len(line) > self.rx_buffer:
+            raise StreamError(f'Line longer than the receive buffer: {line!r}')
+        while self.in_flight_bytes + len(line) > self.rx_buffer and not self.aborted:
+            self.read_response()
+        with self.port_lock:
+            if self.aborted:
+                self.dropped += 1
+                return
+            self.port.write(line)
+        self.in_flight.append(line)
+        self.in_flight_bytes += len(line)
+        self.sent += 1
+        self.max_depth = max(self.max_depth, len(self.in_flight))
+
+    def ack_timeout(self):
+        """Seconds to wait for the next acknowledgement: the timeout, plus
+        the dwells in flight, as the firmware answers a G4 when it is over."""
+        return self.timeout + sum(dwell_seconds(line) for line in self.in_flight)
+
+    def read_response(self):
+        """Reads responses until one acknowledges the oldest line in flight,
+        and returns that line; returns None once aborted."""
+        deadline = time.monotonic() + self.ack_timeout()
+        while not self.aborted:
+            response = self.port.readline()
+            if not response:
+                if time.monotonic() > deadline:
+                    raise StreamError(f'No response from firmware, {len(self.in_flight)} lines unacknowledged')
+                continue
+            line = self.handle_response(response.strip())
+            if line is not None:
+                return line
+
+    def handle_response(self, response):
+        """Acknowledges the oldest line in flight on 'ok' or 'error' and
+        returns it; other responses, and any after an abort, are logged and
+        return None."""
+        if self.aborted:
+            logger.info(f'Firmware after abort: {response!r}')
+            return None
+        if response.startswith(b'ok'):
+            return self.acknowledge(response)
+        if response.lower().startswith(b'error'):
+            line = self.acknowledge(response)
+            self.errors.append((line, response))
+            logger.info(f'Firmware rejected {line!r}: {response!r}')
+            return line
+        logger.info(f'Firmware: {response!r}')
+        return None
+
+    def acknowledge(self, response):
+        if not self.in_flight:
+            raise StreamError(f'Unexpected response {response!r}, no line in flight')
+        line = self.in_flight.popleft()
+        self.in_flight_bytes -= len(line)
+        self.acknowledged += 1
+        if self.on_ack is not None:
+            self.on_ack(line, response)
+        return line
+
+    def flush(self):
+        """Waits until the firmware acknowledged every line sent."""
+        while self.in_flight and not self.aborted:
+            self.read_response()
+
+    def halt(self, data):
+        """Writes data, e.g. safety.HALT_LINE, to the port at once, ahead of
+        the lines not sent yet and outside flow control; callable from any
+        thread."""
+        with self.port_lock:
+            self.port.write(data)
+
+    def abort(self):
+        """Stops streaming after an emergency stop; callable from any thread.
+        The lines in flight are forgotten, as a halted firmware does not
+        acknowledge them, later lines are dropped, and a writer waiting for
+        an acknowledgement returns."""
+        self.aborted = True
+        self.dropped += len(self.in_flight)
+        self.in_flight.clear()
+        self.in_flight_bytes = 0
+        cancel_read = getattr(self.port, 'cancel_read', None)
+        if cancel_read is not None:
+            cancel_read()     # ends a readline() blocked on the port
+
+    def queue_depth(self):
+        """(lines, bytes) sent and not acknowledged yet."""
+        return len(self.in_flight), self.in_flight_bytes
+
+    def report(self):
+        lines, size = self.queue_depth()
+        return (f'{self.sent} lines sent, {self.acknowledged} acknowledged, {len(self.errors)} errors, '
+                f'in flight {lines} lines/{size} bytes, max depth {self.max_depth} lines'
+                + (f', aborted, {self.dropped} lines dropped' if self.aborted else ''))
+
+
+class AsyncGCodeStreamer(GCodeStreamer):
+    """GCodeStreamer for an asyncio event loop: write() and flush() are
+    coroutines that await acknowledgements instead of blocking on readline(),
+    so the loop keeps serving other tasks while the firmware is busy.
+    Responses are read by a reader callback on the port's file descriptor.
+    port: an open serial.Serial or anything with write() and fileno().
+    Use as an async context manager, or call start() and close().
+    """
+    def __init__(self, port, rx_buffer=RX_BUFFER_SIZE, timeout=ACK_TIMEOUT, on_ack=None):
+        super().__init__(port, rx_buffer, timeout, on_ack)
+        self.pending = b''
+        self.acked = None
+        self.error = None
+        self.loop = None
+        self.fd = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.acked = asyncio.Event()
+        self.fd = self.port.fileno()
+        self.loop.add_reader(self.fd, self.readable)
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove_reader(self.fd)
+            self.loop = None
+
+    def readable(self):
+        try:
+            self.pending += os.read(self.fd, 4096)
+            while b'\n' in self.pending:
+                response, self.pending = self.pending.split(b'\n', 1)
+                response = response.strip()
+                if response and self.handle_response(response) is not None:
+                    self.acked.set()
+        except Exception as ex:
+            self.error = ex     # raised in the task awaiting the acknowledgement
+            self.acked.set()
+
+    def abort(self):
+        super().abort()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.acked.set)
+
+    async def wait_for_ack(self):
+        if self.error is not None:
+            raise self.error
+        if self.aborted:
+            return
+        self.acked.clear()
+        try:
+            await asyncio.wait_for(self.acked.wait(), self.ack_timeout())
+        except asyncio.TimeoutError:
+            raise StreamError(f'No response from firmware, {len(self.in_flight)} lines unacknowledged')
+        if self.error is not None:
+            raise self.error
+
+    async def write(self, data):
+        for line in data.splitlines(keepends=True):
+            await self.send_line(line)
+
+    async def send_line(self, line):
+        if len(line) > self.rx_buffer:
+            raise StreamError(f'Line longer than the receive buffer: {line!r}')
+        while self.in_flight_bytes + len(line) > self.rx_buffer and not self.aborted:
+            await self.wait_for_ack()
+        with self.port_lock:
+            if self.aborted:
+                self.dropped += 1
+                return
+            self.port.write(line)
+        self.in_flight.append(line)
+        self.in_flight_bytes += len(line)
+        self.sent += 1
+        self.max_depth = max(self.max_depth, len(self.in_flight))
+
+    async def flush(self):
+        while self.in_flight and not self.aborted:
+            await self.wait_for_ack()
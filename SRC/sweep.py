@@ -0,0 +1,165 @@
+""" Parameter sweep for CLIQ test robot programs
+
+Runs a program template over a grid of parameter values in virtual time,
+one simulated machine per run, spread over a process pool:
+
+    python sweep.py template.txt -p depth=30,33.7,36 -p dwell=0.2,0.5 --coordinated both
+
+The template is a program in which $name (or ${name}) stands for a value,
+e.g. "inserted := +$depth, +0;" or "WAIT $dwell;".
+"""
+
+###############################################################################
+#                                                                             #
+#  SWEEP                                                                      #
+#                                                                             #
+###############################################################################
+import csv
+import itertools
+import os
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+COORDINATED = 'coordinated'     # setting swept alongside the template parameters
+
+OK = 'ok'
+LIMIT = 'limit'                 # the firmware refused a move outside the axis limits
+FAILED = 'failed'               # the program did not run, e.g. a SemanticError
+
+
+class SweepResult(object):
+    """Outcome of one combination of parameters."""
+    def __init__(self, params, outcome, seconds=None, detail=''):
+        self.params = params
+        self.outcome = outcome
+        self.seconds = seconds      # simulated machine time of the whole program
+        self.detail = detail
+
+    def __repr__(self):
+        return f'SweepResult({self.params}, {self.outcome}, {self.seconds})'
+
+
+def grid(parameters):
+    """Every combination of parameters {name: [values]}, as dicts."""
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*[parameters[name] for name in names])]
+
+
+def substitute(template, params):
+    """The program text with the template parameters filled in; raises
+    KeyError for a placeholder without a value."""
+    values = {name: value for name, value in params.items() if name != COORDINATED}
+    return string.Template(template).substitute(values)
+
+
+def simulate(template, params):
+    """Runs one combination against a SimulatedMachine on a VirtualClock."""
+    from lexer import Lexer
+    from parser import Parser
+    from interpreter import Interpreter, CLOSURE
+    from clock import VirtualClock, SimulatedMachine
+    try:
+        text = substitute(template, params)
+        clock = VirtualClock()
+        machine = SimulatedMachine(clock)
+        interpreter = Interpreter(Parser(Lexer(text)), engine=CLOSURE, optimize=True,
+                                  coordinated=bool(params.get(COORDINATED, False)),
+                                  clock=clock, backend=machine)
+        interpreter.interpret()
+    except Exception as ex:
+        return SweepResult(params, FAILED, detail=f'{type(ex).__name__}: {ex}')
+    if machine.errors:
+        line, response = machine.errors[0]
+        return SweepResult(params, LIMIT, interpreter.run_time,
+                           f'{len(machine.errors)} errors, first {line!r}: {response}')
+    return SweepResult(params, OK, interpreter.run_time)
+
+
+def _simulate(args):
+    return simulate(*args)
+
+
+class Sweep(object):
+    """Runs template over the grid of parameters and ranks the runs:
+    programs that ran within the axis limits first, fastest first.
+    workers: processes in the pool, None for one per CPU, 0 runs in this process.
+    """
+    def __init__(self, template, parameters, workers=None):
+        self.template = template
+        self.parameters = parameters
+        self.workers = workers
+        self.results = []
+
+    def run(self):
+        jobs = [(self.template, params) for params in grid(self.parameters)]
+        if self.workers == 0:
+            self.results = [_simulate(job) for job in jobs]
+        else:
+            workers = self.workers or os.cpu_count() or 1
+            chunksize = max(1, len(jobs) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                self.results = list(pool.map(_simulate, jobs, chunksize=chunksize))
+        return self.ranked()
+
+    def ranked(self):
+        order = {OK: 0, LIMIT: 1, FAILED: 2}
+        return sorted(self.results, key=lambda result: (order[result.outcome],
+                                                        result.seconds if result.seconds is not None else 0.0))
+
+    def write_csv(self, path):
+        names = list(self.parameters)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['rank'] + names + ['outcome', 'seconds', 'detail'])
+            for rank, result in enumerate(self.ranked(), 1):
+                seconds = '' if result.seconds is None else f'{result.seconds:.3f}'
+                writer.writerow([rank] + [result.params[name] for name in names]
+                                + [result.outcome, seconds, result.detail])
+
+    def report(self, limit=None):
+        names = list(self.parameters)
+        lines = ['rank  ' + '  '.join(f'{name:>12}' for name in names) + '   outcome     seconds']
+        for rank, result in enumerate(self.ranked()[:limit], 1):
+            values = '  '.join(f'{str(result.params[name]):>12}' for name in names)
+            seconds = '' if result.seconds is None else f'{result.seconds:10.1f}'
+            lines.append(f'{rank:4d}  {values}   {result.outcome:<7} {seconds:>10}  {result.detail}'.rstrip())
+        return '\n'.join(lines)
+
+
+def parse_values(text):
+    values = []
+    for item in text.split(','):
+        item = item.strip()
+        try:
+            values.append(int(item))
+        except ValueError:
+            values.append(float(item))
+    return values
+
+
+def main():
+    import argparse
+    argparser = argparse.ArgumentParser(description='Sweep the parameters of a CLIQ test robot program')
+    argparser.add_argument('template')
+    argparser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=V1,V2,...',
+                           help='values of one template parameter')
+    argparser.add_argument('--coordinated', choices=['off', 'on', 'both'], default='off',
+                           help='coordinated two-axis moves')
+    argparser.add_argument('--workers', type=int, default=None, help='processes, 0 runs in-process')
+    argparser.add_argument('--output', help='write the ranked table as CSV')
+    argparser.add_argument('--top', type=int, default=20, help='rows to print')
+    args = argparser.parse_args()
+    parameters = {}
+    for param in args.param:
+        name, _, values = param.partition('=')
+        parameters[name.strip()] = parse_values(values)
+    parameters[COORDINATED] = {'off': [False], 'on': [True], 'both': [False, True]}[args.coordinated]
+    sweep = Sweep(open(args.template, 'r').read(), parameters, workers=args.workers)
+    sweep.run()
+    print(sweep.report(args.top))
+    if args.output:
+        sweep.write_csv(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,9 @@ UNTIL         = 'UNTIL'
 WAIT          = 'WAIT'
 MOVETO        = 'MOVETO'
 HOME          = 'HOME'
+NOT           = 'NOT'
+AND           = 'AND'
+OR            = 'OR'
 
 #VAR TYPES
 ID            = 'ID'
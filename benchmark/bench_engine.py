@@ -0,0 +1,58 @@
+""" Execution time of the TREE walker against the CLOSURE engine.
+
+usage: python bench_engine.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SRC'))
+
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+
+
+def loop_program(iterations):
+    return f"""\
+PROGRAM Engine;
+VAR
+   count, total : INTEGER;
+   ratio        : REAL;
+BEGIN
+   count := 0;
+   total := 0;
+   LOOP:
+      total := (total + count * 3 - 7) DIV 2;
+      ratio := total / (count + 1);
+      IF count >= 5:
+         total := total + 1;
+      ELSE:
+         total := total - 1;
+      ENDIF;
+      count := count + 1;
+   UNTIL count >= {iterations};
+END.
+"""
+
+
+def time_engine(text, engine):
+    interpreter = Interpreter(Parser(Lexer(text)), engine=engine)
+    interpreter.gcode.send = lambda command: None
+    start = time.perf_counter()
+    interpreter.interpret()
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = loop_program(iterations)
+    results = {engine: min(time_engine(text, engine) for _ in range(3)) for engine in (TREE, CLOSURE)}
+    for engine, elapsed in results.items():
+        print(f'{engine:8} {iterations} iterations  {elapsed * 1000:8.1f} ms  '
+              f'{iterations / elapsed:10,.0f} iterations/s')
+    print(f'speedup {results[TREE] / results[CLOSURE]:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
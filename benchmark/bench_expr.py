@@ -0,0 +1,97 @@
+""" Expression benchmark: parsing and evaluating deeply nested and very long
+expressions, timed per size so the growth with size shows.
+
+usage: python bench_expr.py [--repeat 3] [--iterations 100]
+
+Parsing runs on every size. Evaluation runs the assignment in a LOOP with
+both engines; sizes whose tree is too deep for the recursive tree walks
+are reported as such.
+"""
+import argparse
+
+from progen import nested_expr
+from lexer import Lexer
+from parser import Parser
+from interpreter import TREE, CLOSURE
+from bench_suite import ReplayLexer, best_of, interpret, lex
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def long_expr(length):
+    """An integer expression of length operands mixing every arithmetic operator."""
+    ops = (' + ', ' * ', ' - ', ' DIV ')
+    parts = ['total']
+    for i in range(1, length):
+        parts.append(ops[i % len(ops)])
+        parts.append(str(i % 7 + 1))
+    return ''.join(parts)
+
+
+def logical_expr(length):
+    """A BOOL expression of length comparisons joined by AND, OR and NOT;
+    every third one is a chained comparison."""
+    parts = []
+    for i in range(length):
+        if i:
+            parts.append(' AND ' if i % 2 else ' OR ')
+        if i % 3 == 0:
+            parts.append(f'0 <= total < {i + 10}')
+        elif i % 3 == 1:
+            parts.append(f'NOT total > {i}')
+        else:
+            parts.append(f'total + {i} != count')
+    return ''.join(parts)
+
+
+SCENARIOS = {
+    'nested':  ('total', lambda size: nested_expr(size, 0)),
+    'long':    ('total', long_expr),
+    'logical': ('running', logical_expr),
+}
+
+
+def make_program(target, expr, iterations):
+    return (f'PROGRAM Expressions;\n'
+            f'VAR\n'
+            f'   count, total : INTEGER;\n'
+            f'   running      : BOOL;\n'
+            f'BEGIN\n'
+            f'   count := 0; total := 1; running := TRUE;\n'
+            f'   LOOP:\n'
+            f'      count := count + 1;\n'
+            f'      {target} := {expr};\n'
+            f'   UNTIL count >= {iterations};\n'
+            f'END.\n')
+
+
+def evaluate(text, engine, repeat):
+    try:
+        return best_of(repeat, lambda: Parser(Lexer(text)).parse(), lambda tree: interpret(tree, engine))
+    except RecursionError:
+        return None
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Time parsing and evaluating large expressions')
+    argparser.add_argument('--repeat', type=int, default=3, help='rounds per stage, the best counts')
+    argparser.add_argument('--iterations', type=int, default=100, help='evaluations per run')
+    argparser.add_argument('--size', type=int, action='append', help='operands or nesting depth')
+    args = argparser.parse_args()
+    for name, (target, generate) in SCENARIOS.items():
+        for size in args.size or SIZES:
+            expr = generate(size)
+            tokens = lex(expr)
+            parse = best_of(args.repeat, lambda: lex(expr), lambda tokens: Parser(ReplayLexer(tokens)).expr())
+            line = (f'{name:<8} {size:6d}  {len(tokens):7d} tokens  parse {parse * 1000:9.2f} ms '
+                    f'{parse / len(tokens) * 1e6:6.2f} us/token')
+            text = make_program(target, expr, args.iterations)
+            for engine in (TREE, CLOSURE):
+                elapsed = evaluate(text, engine, args.repeat)
+                line += (f'  {engine} too deep' if elapsed is None
+                         else f'  {engine} {elapsed / args.iterations * 1e6:9.1f} us/eval')
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+""" Tokens per second of the table driven Lexer against the CharLexer scanner
+it replaced, after checking that both give the same token stream.
+
+usage: python bench_lexer.py [statements]
+"""
+import sys
+import time
+
+from progen import make_program
+from token_types import *
+from lexer import Lexer, Token, RESERVED_KEYWORDS
+
+
+class CharLexer(object):
+    """The character-at-a-time scanner the table driven lexer.Lexer replaced,
+    kept as the baseline it is timed and cross-checked against."""
+    def __init__(self, text):
+        """Tokenize string, e.g. '(4 + 2) * 3 - 6 / 2'.
+           self.pos:  an index into self.text
+           self.line: the line number count used to report error location.
+           self.line_pos: index within active line used to report position of error.
+        """
+        self.text = text
+        # self.pos is an index into self.text
+        self.line_count = 0
+        self.line_pos = 0
+        self.pos = 0
+        self.current_char = self.text[self.pos]
+
+    def error(self):
+        """ Reports the location of an invalid character in the input text
+        """
+        raise ValueError(f"Invalid character '{self.current_char}' in line {self.line_count} at position {self.line_pos}")
+
+    def advance(self):
+        """Advance the `pos` pointer and set the `current_char` variable.
+           Also keeps track of where we are in the line
+        """
+        self.pos += 1
+        self.line_pos += 1
+
+        if self.pos > len(self.text) - 1:
+            self.current_char = None  # Indicates end of input
+        else:
+            self.current_char = self.text[self.pos]
+
+    def peek(self):
+        """Look at next character in text without consuming it.
+        """
+        peek_pos = self.pos + 1
+        if peek_pos > len(self.text) - 1:
+            return None
+        else:
+            return self.text[peek_pos]
+
+    def skip_whitespace(self):
+        while self.current_char is not None and self.current_char.isspace():
+            if self.current_char == '\n':
+                self.line_count += 1
+                self.line_pos = 0
+            self.advance()
+
+    def skip_comment(self):
+        """Scans text for closing brace. Raises exception on EOL.
+        """
+        while self.current_char != '}':
+            self.advance()
+            if self.current_char == '\n':
+                raise Exception(f'Missing closing brace at line {self.line_count} position {self.line_pos}')
+        self.advance()  # the closing curly brace
+
+    def number(self):
+        """Return a (multidigit) integer or float consumed from the input."""
+        result = ''
+        while self.current_char is not None and self.current_char.isdigit():
+            result += self.current_char
+            self.advance()
+        if self.current_char == '.':
+            result += self.current_char
+            self.advance()
+            while self.current_char is not None and self.current_char.isdigit():
+                result += self.current_char
+                self.advance()
+            token = Token('REAL_CONST', float(result))
+        else:
+            token = Token('INTEGER_CONST', int(result))
+        return token
+
+    def _id(self):
+        """Handle identifiers and reserved keywords"""
+        result = ''
+        while self.current_char is not None and self.current_char.isidentifier():
+            result += self.current_char
+            self.advance()
+
+        token = RESERVED_KEYWORDS.get(result, Token(ID, result))
+        return token
+
+    def get_next_token(self):
+        """Lexical analyzer (also known as scanner or tokenizer)
+
+        This method is responsible for breaking a sentence
+        apart into tokens. One token at a time.
+        """
+        while self.current_char is not None:
+
+            if self.current_char.isspace():
+                self.skip_whitespace()
+                continue
+
+            if self.current_char == '{':
+                self.advance()
+                self.skip_comment()
+                continue
+
+            if self.current_char.isidentifier():
+                return self._id()
+
+            if self.current_char.isdigit():
+                return self.number()
+
+            if self.current_char == ':' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(ASSIGN, ':=')
+
+            if self.current_char == '=' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(EQUAL, '==')
+
+            if self.current_char == '!' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(NEQUAL, '!=')
+
+            if self.current_char == '<' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(LTE, '<=')
+
+            if self.current_char == '>' and self.peek() == '=':
+                self.advance()
+                self.advance()
+                return Token(GTE, '>=')
+
+            if self.current_char == '<' and self.peek() != '=':
+                self.advance()
+                return Token(LT, '<')
+
+            if self.current_char == '>' and self.peek() != '=':
+                self.advance()
+                return Token(GT, '>')
+
+            if self.current_char == ';':
+                self.advance()
+                return Token(SEMI, ';')
+
+            if self.current_char == ':':
+                self.advance()
+                return Token(COLON, ':')
+
+            if self.current_char == ',':
+                self.advance()
+                return Token(COMMA, ',')
+
+            if self.current_char == '+':
+                self.advance()
+                return Token(PLUS, '+')
+
+            if self.current_char == '-':
+                self.advance()
+                return Token(MINUS, '-')
+
+            if self.current_char == '*':
+                self.advance()
+                return Token(MUL, '*')
+
+            if self.current_char == '/':
+                self.advance()
+                return Token(FLOAT_DIV, '/')
+
+            if self.current_char == '(':
+                self.advance()
+                return Token(LPAREN, '(')
+
+            if self.current_char == ')':
+                self.advance()
+                return Token(RPAREN, ')')
+
+            if self.current_char == '.':
+                self.advance()
+                return Token(DOT, '.')
+            else:
+                self.error()
+        return Token(EOF, None)
+
+
+def token_stream(lexer):
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append((token.type, token.value, lexer.line_count, lexer.line_pos))
+        if token.type == EOF:
+            return tokens
+
+
+def tokens_per_second(lexer_class, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        lexer = lexer_class(text)
+        count = 0
+        start = time.perf_counter()
+        while lexer.get_next_token().type != EOF:
+            count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, count / best
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    text = make_program(statements, waypoints=statements // 4)
+    if token_stream(Lexer(text)) != token_stream(CharLexer(text)):
+        sys.exit('Lexer and CharLexer token streams differ')
+    for lexer_class in (CharLexer, Lexer):
+        count, rate = tokens_per_second(lexer_class, text)
+        print(f'{lexer_class.__name__:10} {count} tokens  {rate:12,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+""" Memory of parsed programs: peak RSS and parse time of large generated
+programs, each parsed in a fresh process, and the bytes the tree holds.
+
+usage: python bench_memory.py [waypoints ...]
+"""
+import json
+import os
+import subprocess
+import sys
+
+from progen import make_program
+
+# runs in the child: parses the program on stdin and prints its measurements
+CHILD = '''
+import json, resource, sys, time, tracemalloc
+import progen
+from lexer import Lexer
+from parser import Parser
+text = sys.stdin.read()
+parser = Parser(Lexer(text))
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+tree = parser.parse()
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+del tree
+tracemalloc.start()
+tree = Parser(Lexer(text)).parse()
+held = tracemalloc.get_traced_memory()[0]
+print(json.dumps({'parse': elapsed, 'rss_before': before, 'rss_peak': peak, 'tree_bytes': held}))
+'''
+
+
+def measure(text):
+    result = subprocess.run([sys.executable, '-c', CHILD], input=text, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    print(f'{"waypoints":>9} {"statements":>10} {"parse ms":>9} {"peak RSS MB":>12} '
+          f'{"parse +MB":>10} {"tree MB":>8} {"bytes/wp":>9}')
+    for waypoints in sizes:
+        statements = waypoints // 4
+        text = make_program(statements, waypoints=waypoints)
+        result = measure(text)
+        print(f'{waypoints:9d} {statements:10d} {result["parse"] * 1000:9.1f} {result["rss_peak"] / 1024:12.1f} '
+              f'{(result["rss_peak"] - result["rss_before"]) / 1024:10.1f} {result["tree_bytes"] / 2 ** 20:8.1f} '
+              f'{result["tree_bytes"] / waypoints:9.0f}')
+
+
+if __name__ == '__main__':
+    main()
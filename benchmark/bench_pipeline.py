@@ -0,0 +1,48 @@
+""" End-to-end throughput against the firmware emulator: interpreter ->
+GCodeMaker -> SerialWorker -> GCodeStreamer -> pty -> emulated controller.
+
+usage: python bench_pipeline.py [program]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SRC'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test'))
+
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, CLOSURE
+from gcode_maker import open_serial_port
+from streamer import GCodeStreamer
+from serial_worker import SerialWorker
+from emulator import FirmwareEmulator
+from conftest import cliq_text
+
+
+def run(text, coordinated):
+    with FirmwareEmulator() as emulator:
+        with open_serial_port(emulator.port_name) as port:
+            interpreter = Interpreter(Parser(Lexer(text)), engine=CLOSURE, coordinated=coordinated)
+            streamer = GCodeStreamer(port)
+            start = time.perf_counter()
+            with SerialWorker(streamer) as worker:
+                interpreter.gcode.serial = worker
+                interpreter.interpret()
+            streamer.flush()
+            host = time.perf_counter() - start
+    cycles = interpreter.GLOBAL_SCOPE.get('count', 1)
+    simulated = emulator.firmware.finish_time()
+    print(f'coordinated={coordinated!s:5}  {streamer.sent} lines  host {host:6.2f} s  '
+          f'{streamer.sent / host:8,.0f} lines/s  simulated {simulated:8.1f} s  '
+          f'{cycles * 3600 / simulated:8.1f} cycles/hour  errors {len(streamer.errors)}')
+
+
+def main():
+    text = open(sys.argv[1], 'r').read() if len(sys.argv) > 1 else cliq_text()
+    for coordinated in (False, True):
+        run(text, coordinated)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+""" Cost of the node profiler: the same run unprofiled and profiled, per engine.
+
+usage: python bench_profiler.py [iterations]
+"""
+import sys
+import time
+
+import progen   # puts SRC on sys.path
+from bench_engine import loop_program
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+from profiler import NodeProfiler
+
+
+class NullSink(object):
+    def write(self, data):
+        pass
+
+
+def time_run(text, engine, profile):
+    best = None
+    for _ in range(3):
+        interpreter = Interpreter(Parser(Lexer(text)), engine=engine, backend=NullSink(),
+                                  profiler=NodeProfiler() if profile else None)
+        start = time.perf_counter()
+        interpreter.interpret()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = loop_program(iterations)
+    for engine in (TREE, CLOSURE):
+        off = time_run(text, engine, False)
+        on = time_run(text, engine, True)
+        print(f'{engine:8} off {off * 1000:8.1f} ms  on {on * 1000:8.1f} ms  profiling costs {on / off:4.1f}x')
+
+
+if __name__ == '__main__':
+    main()
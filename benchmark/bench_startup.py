@@ -0,0 +1,73 @@
+""" Startup time: cold (lex + parse) versus warm (program cache) parsing,
+and process start to first result for the check path and a real run's imports.
+
+usage: python bench_startup.py [statements]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from progen import make_program
+from lexer import Lexer
+from parser import Parser
+from program_cache import ProgramCache
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SRC')
+HARDWARE = ('serial', 'gpiozero')
+
+# each prints the hardware modules it ended up importing
+PROCESSES = {
+    'check':       'import main; main.check(open({path!r}).read())',
+    'interpreter': 'import interpreter',
+    'run imports': 'import main, interpreter, streamer, serial_worker, io_pins, gcode_maker; '
+                   'import serial, gpiozero',
+}
+
+
+def time_startup(text, cache):
+    start = time.perf_counter()
+    cache.parse(Parser(Lexer(text)))
+    return time.perf_counter() - start
+
+
+def time_process(code, repeat=5):
+    """Best wall time of a fresh interpreter running code, and the
+    hardware modules it imported."""
+    probe = code + f'; import sys; print(",".join(m for m in {HARDWARE!r} if m in sys.modules))'
+    best = None
+    loaded = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', probe], cwd=SRC, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    text = make_program(statements, waypoints=statements // 4)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ProgramCache(directory)
+        cold = time_startup(text, cache)
+        warm = min(time_startup(text, cache) for _ in range(3))
+        print(f'{statements} statements  cold {cold * 1000:8.1f} ms  warm {warm * 1000:8.1f} ms  '
+              f'speedup {cold / warm:5.1f}x')
+        path = os.path.join(directory, 'program.txt')
+        with open(path, 'w') as file:
+            file.write(make_program(200, waypoints=50))
+        baseline, _ = time_process('pass')
+        print(f'{"python -c pass":<14} {baseline * 1000:8.1f} ms')
+        for label, code in PROCESSES.items():
+            elapsed, loaded = time_process(code.format(path=path))
+            print(f'{label:<14} {elapsed * 1000:8.1f} ms  (+{(elapsed - baseline) * 1000:6.1f} ms)  '
+                  f'hardware modules: {loaded or "none"}')
+
+
+if __name__ == '__main__':
+    main()
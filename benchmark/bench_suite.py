@@ -0,0 +1,168 @@
+""" Per-stage benchmark suite: Lexer, Parser.parse() and Interpreter.interpret()
+timed separately on synthetic programs, with the G-code going to a null sink.
+
+usage: python bench_suite.py [--scale 0.1] [--output results.json] [--compare baseline.json]
+
+The results file is JSON, one entry per scenario and stage; --compare prints
+the change of every stage against an earlier results file and exits with
+status 1 when one got slower than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from progen import make_program
+from token_types import EOF
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+
+SCENARIOS = {
+    'statements':   dict(statements=4000, waypoints=100),
+    'declarations': dict(statements=200, waypoints=4000, variables=2000, ios=28),
+    'deep_expr':    dict(statements=400, waypoints=20, depth=60),
+    'loop':         dict(statements=40, waypoints=20, iterations=2000),
+}
+SCALED = ('statements', 'waypoints', 'variables', 'iterations')
+
+
+class NullSink(object):
+    """G-code backend that drops everything, so only host work is timed."""
+    def write(self, data):
+        pass
+
+
+class ReplayLexer(object):
+    """Hands the parser tokens lexed beforehand, so parsing is timed alone."""
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.line_count = 0
+        self.line_pos = 0
+
+    def get_next_token(self):
+        return next(self.tokens)
+
+
+class Parsed(object):
+    """Parser stand-in that returns a tree parsed beforehand."""
+    def __init__(self, tree):
+        self.tree = tree
+
+    def parse(self):
+        return self.tree
+
+
+def lex(text):
+    lexer = Lexer(text)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(token)
+        if token.type == EOF:
+            return tokens
+
+
+def best_of(repeat, setup, run):
+    """Least time of run(setup()) over repeat rounds; setup is not timed."""
+    best = None
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def interpret(tree, engine):
+    Interpreter(Parsed(tree), engine=engine, backend=NullSink()).interpret()
+
+
+def run_scenario(params, repeat):
+    text = make_program(**params)
+    tokens = lex(text)
+    result = {'params': params, 'bytes': len(text), 'tokens': len(tokens)}
+    result['lex'] = best_of(repeat, lambda: text, lex)
+    result['parse'] = best_of(repeat, lambda: lex(text), lambda tokens: Parser(ReplayLexer(tokens)).parse())
+    for engine in (TREE, CLOSURE):
+        result[f'interpret_{engine}'] = best_of(repeat, lambda: Parser(Lexer(text)).parse(),
+                                                lambda tree: interpret(tree, engine))
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def scaled(params, scale):
+    return {key: max(1, int(value * scale)) if key in SCALED else value for key, value in params.items()}
+
+
+def stages(result):
+    return [key for key in result if key in ('lex', 'parse') or key.startswith('interpret_')]
+
+
+def compare(results, baseline, threshold):
+    """Prints each stage against baseline; returns the regressions."""
+    regressions = []
+    for name, result in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None or old['params'] != result['params']:
+            print(f'{name:<14} not in the baseline with the same parameters')
+            continue
+        for stage in stages(result):
+            if stage not in old:
+                continue
+            change = result[stage] / old[stage] - 1.0
+            flag = '  REGRESSION' if change > threshold else ''
+            print(f'{name:<14} {stage:<20} {old[stage] * 1000:9.2f} -> {result[stage] * 1000:9.2f} ms '
+                  f'{change * 100:+7.1f}%{flag}')
+            if flag:
+                regressions.append((name, stage, change))
+    return regressions
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Time the lexer, parser and interpreter stages')
+    argparser.add_argument('--scale', type=float, default=1.0, help='multiplies the program sizes')
+    argparser.add_argument('--repeat', type=int, default=3, help='rounds per stage, the best counts')
+    argparser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='run only these')
+    argparser.add_argument('--output', help='write the results as JSON')
+    argparser.add_argument('--compare', help='JSON results of an earlier run')
+    argparser.add_argument('--threshold', type=float, default=0.10, help='slowdown reported as a regression')
+    args = argparser.parse_args()
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'scenarios': {},
+    }
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(scaled(SCENARIOS[name], args.scale), args.repeat)
+        results['scenarios'][name] = result
+        print(f'{name:<14} {result["tokens"]:7d} tokens  '
+              + '  '.join(f'{stage} {result[stage] * 1000:8.2f} ms' for stage in stages(result)))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f'against {args.compare} (commit {baseline.get("commit")})')
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+""" Synthetic CLIQ program generator for the benchmarks"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SRC'))
+
+
+def name(prefix, i):
+    """Identifiers are letters only, so the index is spelled in base 26."""
+    letters = ''
+    while True:
+        letters = chr(ord('a') + i % 26) + letters
+        i //= 26
+        if i == 0:
+            return prefix + letters
+
+
+def nested_expr(depth, i):
+    """An integer expression nested depth parentheses deep."""
+    expr = 'total'
+    for level in range(depth):
+        op = '+' if level % 2 == 0 else '-'
+        expr = f'({expr} {op} {(i + level) % 7 + 1})'
+    return expr
+
+
+def make_program(statements=1000, waypoints=100, variables=0, ios=0, depth=None, iterations=0):
+    """Returns program text with `waypoints` WAYPOINT declarations and
+    `statements` statements in the main block.
+    variables: extra INTEGER declarations, each assigned in the statements.
+    ios: IO declarations, alternately PININ and PINOUT; outputs are assigned.
+    depth: nesting of the arithmetic statements' expression, None for the
+    default mixed expression.
+    iterations: run the statements in a LOOP this many times, 0 runs them once.
+    """
+    lines = ['PROGRAM Generated;',
+             'VAR',
+             '   count, total : INTEGER;',
+             '   scale        : REAL;',
+             '   running      : BOOL;']
+    for i in range(variables):
+        lines.append(f'   {name("v", i)} : INTEGER;')
+    if ios:
+        lines.append('IO')
+        for i in range(ios):
+            lines.append(f'   {name("io", i)} : {"PININ" if i % 2 == 0 else "PINOUT"} {i % 28};')
+    lines.append('WAYPOINT {generated}')
+    for i in range(waypoints):
+        sign = '+' if i % 3 == 0 else ''
+        lines.append(f'   {name("wp", i)} := {sign}{i % 300}.5, {i % 360};')
+    lines.append('BEGIN')
+    lines.append('   count := 0; total := 0; scale := 1.5; running := FALSE;')
+    indent = '   '
+    if iterations:
+        lines.append('   LOOP:')
+        indent = '      '
+    outputs = [name('io', i) for i in range(1, ios, 2)]
+    for i in range(statements):
+        kind = i % 4
+        if kind == 0:
+            expr = f'(total + {i}) * 2 DIV 3 - count' if depth is None else nested_expr(depth, i)
+            lines.append(f'{indent}total := {expr};')
+        elif kind == 1:
+            lines.append(f'{indent}MOVETO {name("wp", i % max(waypoints, 1))};')
+        elif kind == 2:
+            lines.append(f'{indent}WAIT 0.5 * scale;  {{pause {i}}}')
+        else:
+            lines.append(f'{indent}IF total >= {i}: running := TRUE; ELSE: running := FALSE; ENDIF;')
+        if variables and i % 2 == 0:
+            lines.append(f'{indent}{name("v", (i // 2) % variables)} := total + {i};')
+        if outputs and i % 8 == 0:
+            lines.append(f'{indent}{outputs[(i // 8) % len(outputs)]} := running;')
+    if iterations:
+        lines.append('      count := count + 1;')
+        lines.append(f'   UNTIL count >= {iterations};')
+    else:
+        lines.append('   count := count + 1')
+    lines.append('END.')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,40 @@
+import os
+import pytest
+
+CLIQ_TEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cliq_test.txt')
+
+
+def cliq_text(runnable=True):
+    """The sample program cliq_test.txt. Its IF tests 'turned', which is not
+    declared; runnable: test 'running' instead, so it passes the checks."""
+    with open(CLIQ_TEST) as f:
+        text = f.read()
+    return text.replace('IF turned == TRUE', 'IF running == FALSE') if runnable else text
+
+
+@pytest.fixture
+def cliq_program():
+    """The runnable text of cliq_test.txt, see cliq_text()."""
+    return cliq_text()
+
+
+@pytest.fixture
+def factory():
+    """A gpiozero MockFactory to pass to a PinBank."""
+    from gpiozero.pins.mock import MockFactory
+    factory = MockFactory()
+    yield factory
+    factory.reset()
+
+
+@pytest.fixture
+def mock_pins():
+    """A MockFactory installed as gpiozero's default pin factory, for devices
+    made without one."""
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory
+    previous = Device.pin_factory
+    Device.pin_factory = MockFactory()
+    yield Device.pin_factory
+    Device.pin_factory.reset()
+    Device.pin_factory = previous
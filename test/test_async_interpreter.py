@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+import serial
+from gpiozero import DigitalInputDevice
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter
+from emulator import FirmwareEmulator
+from streamer import AsyncGCodeStreamer, StreamError
+from async_interpreter import AsyncInterpreter, AsyncInput
+
+
+PROGRAM = '''PROGRAM A;
+VAR
+   count : INTEGER;
+WAYPOINT
+   poised   := 250, 90;
+   inserted := +30, +0;
+BEGIN
+   count := 0;
+   HOME;
+   LOOP:
+      MOVETO poised;
+      MOVETO inserted;
+      WAIT 0.5;
+      count := count + 1;
+   UNTIL count > 4;
+END.'''
+
+
+def sync_output(text):
+    interpreter = Interpreter(Parser(Lexer(text)))
+    written = []
+    interpreter.gcode.write = written.append
+    interpreter.interpret()
+    return b''.join(written)
+
+
+class Recorder(object):
+    """Plain, non-async backend."""
+    def __init__(self):
+        self.data = []
+        self.flushed = False
+
+    def write(self, data):
+        self.data.append(data)
+
+    def flush(self):
+        self.flushed = True
+
+
+def test_same_gcode_as_tree_walk():
+    backend = Recorder()
+    interpreter = AsyncInterpreter(Parser(Lexer(PROGRAM)), backend=backend)
+    asyncio.run(interpreter.interpret())
+    assert b''.join(backend.data) == sync_output(PROGRAM)
+    assert backend.flushed
+    assert interpreter.GLOBAL_SCOPE['count'] == 5
+
+
+def test_loop_serves_other_tasks_while_streaming():
+    async def main(port_name):
+        port = serial.Serial(port_name, timeout=0)
+        ticks = []
+
+        async def monitor(streamer):
+            while True:
+                ticks.append(streamer.queue_depth())
+                await asyncio.sleep(0.005)
+
+        async with AsyncGCodeStreamer(port, rx_buffer=64, timeout=5) as streamer:
+            interpreter = AsyncInterpreter(Parser(Lexer(PROGRAM)), backend=streamer)
+            watcher = asyncio.ensure_future(monitor(streamer))
+            await interpreter.interpret()
+            watcher.cancel()
+        port.close()
+        return interpreter, streamer, ticks
+
+    with FirmwareEmulator(time_scale=0.005) as emulator:
+        interpreter, streamer, ticks = asyncio.run(main(emulator.port_name))
+        received = list(emulator.received)
+    assert interpreter.GLOBAL_SCOPE['count'] == 5
+    assert streamer.acknowledged == streamer.sent == len(received)
+    assert '\n'.join(received) + '\n' == sync_output(PROGRAM).decode('ascii')
+    assert streamer.queue_depth() == (0, 0)
+    # the program ran for over 100 ms; the monitor kept ticking meanwhile
+    assert interpreter.run_time > 0.1
+    assert len(ticks) > 10
+    assert any(lines > 1 for lines, size in ticks)
+
+
+def test_rejected_line_raises():
+    async def main(port_name):
+        port = serial.Serial(port_name, timeout=0)
+        async with AsyncGCodeStreamer(port, timeout=5) as streamer:
+            def check(line, response):
+                if response.startswith(b'error'):
+                    raise StreamError(response.decode())
+            streamer.on_ack = check
+            interpreter = AsyncInterpreter(Parser(Lexer('PROGRAM R; BEGIN MOVETO 10, 0; END.')),
+                                           backend=streamer)
+            try:
+                await interpreter.interpret()
+            finally:
+                port.close()
+
+    with FirmwareEmulator() as emulator:
+        with pytest.raises(StreamError, match='Not homed'):
+            asyncio.run(main(emulator.port_name))
+
+
+def test_home_awaits_limit_switches(mock_pins):
+    switches = [AsyncInput(DigitalInputDevice(pin, pull_up=False)) for pin in (5, 6)]
+    backend = Recorder()
+    interpreter = AsyncInterpreter(Parser(Lexer('PROGRAM H; BEGIN HOME; MOVETO 10, 0; END.')),
+                                   backend=backend, home_switches=switches, home_timeout=5)
+
+    async def main():
+        run = asyncio.ensure_future(interpreter.interpret())
+        await asyncio.sleep(0.02)
+        assert not run.done()
+        assert b''.join(backend.data) == b'G28 X,Z\n'   # waiting on the switches
+        mock_pins.pin(5).drive_high()
+        await asyncio.sleep(0.02)
+        assert not run.done()
+        mock_pins.pin(6).drive_high()
+        await asyncio.wait_for(run, 1)
+
+    asyncio.run(main())
+    assert b''.join(backend.data).startswith(b'G28 X,Z\nG90\nG1 X10')
+
+
+def test_input_wait_timeout(mock_pins):
+    switch = AsyncInput(DigitalInputDevice(5, pull_up=False))
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(switch.wait_for(True, timeout=0.05))
+    assert switch.waiters == []
+
+
+if __name__ == '__main__':
+    pytest.main()
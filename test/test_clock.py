@@ -0,0 +1,60 @@
+import time
+import pytest
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+from clock import RealClock, VirtualClock, SimulatedMachine
+
+
+def test_virtual_clock():
+    clock = VirtualClock()
+    clock.sleep(2.5)
+    clock.sleep(-1)
+    clock.advance_to(1)
+    assert clock.now() == 2.5
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_cliq_runs_in_virtual_time(engine, cliq_program):
+    clock = VirtualClock()
+    machine = SimulatedMachine(clock)
+    interpreter = Interpreter(Parser(Lexer(cliq_program)), engine=engine, clock=clock, backend=machine)
+    start = time.perf_counter()
+    interpreter.interpret()
+    assert time.perf_counter() - start < 2.0
+    assert interpreter.GLOBAL_SCOPE['fails'] == 101
+    assert machine.errors == []
+    # 101 cycles of about 29 s plus the approach
+    assert interpreter.run_time == pytest.approx(machine.firmware.finish_time())
+    assert 101 * 28 < interpreter.run_time < 101 * 30
+
+
+def test_host_sleep_advances_machine():
+    clock = VirtualClock()
+    machine = SimulatedMachine(clock)
+    machine.write(b'G28 X,Z\nG4 2\n')
+    clock.sleep(10)     # e.g. the host waiting for an input
+    machine.write(b'G90\nG1 X130 F1300.0\n')
+    machine.flush()
+    assert clock.now() == pytest.approx(2 + 10 + 6)
+
+
+def test_firmware_errors_collected():
+    clock = VirtualClock()
+    machine = SimulatedMachine(clock)
+    interpreter = Interpreter(Parser(Lexer('PROGRAM L; BEGIN HOME; MOVETO 400, 0; END.')),
+                              clock=clock, backend=machine)
+    interpreter.interpret()
+    assert machine.errors == [('G1 X400 F1300.0', 'error:X 400 outside 0..300')]
+
+
+def test_real_clock_default():
+    interpreter = Interpreter(Parser(Lexer('PROGRAM L; BEGIN WAIT 5; END.')))
+    interpreter.gcode.write = lambda data: None
+    interpreter.interpret()
+    assert isinstance(interpreter.clock, RealClock)
+    assert interpreter.run_time < 1.0
+
+
+if __name__ == '__main__':
+    pytest.main()
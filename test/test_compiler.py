@@ -0,0 +1,113 @@
+import pytest
+from interpreter import Interpreter, TREE, CLOSURE
+from lexer import Lexer
+from parser import Parser
+from test_interpreter import makeProgramSyntax, programResults, arithmetic_expressions, bool_expressions
+
+loop_program = """\
+PROGRAM Loops;
+VAR
+   count, passes : INTEGER;
+   ratio         : REAL;
+   done          : BOOL;
+WAYPOINT
+   approach := 250, 90;
+   inserted := +33.7, +0;
+   open     := +0, 90;
+BEGIN
+   count := 0;
+   passes := 0;
+   HOME;
+   MOVETO approach;
+   LOOP:
+      MOVETO inserted;
+      WAIT 0.5 * 2;
+      IF count >= 3:
+         passes := passes + 1;
+      ELSE:
+         MOVETO -10, 200;
+      ENDIF;
+      MOVETO open;
+      count := count + 1;
+      ratio := passes / count;
+   UNTIL count > 6;
+   done := count;
+END.
+"""
+
+
+def test_same_coordinated_gcode():
+    coordinated = programResults(loop_program, CLOSURE, coordinated=True)
+    assert coordinated == programResults(loop_program, TREE, coordinated=True)
+    assert coordinated[1].count(b'\n') < programResults(loop_program, CLOSURE)[1].count(b'\n')
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Interpreter(Parser(Lexer(loop_program)), engine='jit')
+
+
+def test_same_scope_and_gcode():
+    tree_scope, tree_gcode = programResults(loop_program, TREE)
+    closure_scope, closure_gcode = programResults(loop_program, CLOSURE)
+    assert closure_scope == tree_scope
+    assert closure_gcode == tree_gcode
+    assert closure_scope['passes'] == 4
+
+
+@pytest.mark.parametrize("expr, result", arithmetic_expressions + bool_expressions)
+def test_expressions(expr, result):
+    text = makeProgramSyntax(intAssign=expr) if isinstance(result, int) and not isinstance(result, bool) \
+        else makeProgramSyntax(boolAssign=expr)
+    assert programResults(text, CLOSURE) == programResults(text, TREE)
+
+
+def test_constant_statements_prerendered():
+    interpreter = Interpreter(Parser(Lexer(loop_program)), engine=CLOSURE)
+    writes = []
+    interpreter.gcode.write = writes.append
+    interpreter.interpret()
+    # one buffer per HOME, WAIT and constant MOVETO instead of a line per command
+    assert writes[0] == b'G28 X,Z\n'
+    assert writes[1] == b'G90\nG1 X250 F1300.0\nG1 Z90 F9000.0\n'
+    assert writes[2] == b'G91\nG1 X33.7 F1300.0\nG1 Z0 F9000.0\n'
+    assert writes[3] == b'G4 1.0\n'
+    assert interpreter.gcode.relative_mode is False
+
+
+def test_variable_moves_not_prerendered():
+    from semantic import SemanticAnalyzer
+    from compiler import Compiler
+    text = loop_program.replace('MOVETO -10, 200;', 'MOVETO -10, count;')
+    tree = Parser(Lexer(text)).parse()
+    compiler = Compiler(SemanticAnalyzer().analyze(tree), Interpreter(Parser(Lexer(text))).gcode)
+    compiler.compile(tree)
+    assert compiler.rendered == 5   # HOME, WAIT and three waypoint moves
+    assert programResults(text, CLOSURE) == programResults(text, TREE)
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_logical_short_circuit(engine):
+    # the right operands divide by zero, so they must not run
+    text = makeProgramSyntax(boolAssign='1 > 2 AND 1 / 0 > 0 OR 2 > 1 OR 1 / 0 > 0')
+    scope, _ = programResults(text, engine)
+    assert scope['turned'] is True
+    text = makeProgramSyntax(boolAssign='2 > 1 AND 1 / 0 > 0')
+    with pytest.raises(ZeroDivisionError):
+        programResults(text, engine)
+
+
+def test_undeclared_variable():
+    text = makeProgramSyntax(syntax='aa', breakcode='xx')
+    with pytest.raises(Exception, match='not declared'):
+        programResults(text, CLOSURE)
+
+
+def test_unassigned_variable():
+    text = loop_program.replace('passes := 0;', '')
+    with pytest.raises(NameError):
+        programResults(text, CLOSURE)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,73 @@
+import pytest
+from emulator import Firmware, FirmwareEmulator
+from gcode_maker import open_serial_port
+from streamer import GCodeStreamer
+
+
+def test_motion_time():
+    firmware = Firmware(planner_size=1)
+    assert firmware.process('G28 X,Z') == ('ok', 0.0)
+    assert firmware.process('G90')[0] == 'ok'
+    assert firmware.process('G1 X260 F1300.0') == ('ok', 0.0)     # queued
+    response, held = firmware.process('G1 Z90 F9000.0')           # planner full
+    assert response == 'ok'
+    assert held == pytest.approx(260 * 60 / 1300.0)
+    firmware.process('G1 Z0')
+    assert firmware.finish_time() == pytest.approx(12.0 + 0.6 + 0.6)
+    firmware.process('G4 0.5')
+    assert firmware.finish_time() == pytest.approx(13.7)
+
+
+def test_coordinated_move_and_feed_limit():
+    firmware = Firmware()
+    firmware.process('G28 X,Z')
+    firmware.process('G91')
+    firmware.process('G1 X130 Z90 F9000.0')
+    assert firmware.position == {'X': 130.0, 'Z': 90.0}
+    # X is held to its own 1300 mm/min
+    assert firmware.finish_time() == pytest.approx(6.0)
+    # F below both limits is the feed along the path: 50 mm at 500 mm/min
+    firmware.process('G1 X30 Z40 F500')
+    assert firmware.finish_time() == pytest.approx(6.0 + 6.0)
+
+
+limit_errors = [
+    'G1 X301 F1300.0',
+    'G1 Z361 F9000.0',
+    'G1 X-10 F1300.0',
+    'M999',
+]
+
+
+@pytest.mark.parametrize("line", limit_errors)
+def test_errors(line):
+    firmware = Firmware()
+    firmware.process('G28 X,Z')
+    assert firmware.process(line)[0].startswith('error:')
+    assert firmware.position == {'X': 0.0, 'Z': 0.0}
+
+
+def test_not_homed():
+    assert Firmware().process('G1 X10 F1300.0')[0] == 'error:Not homed'
+
+
+def test_pipeline_over_pty(cliq_program):
+    from interpreter import Interpreter, CLOSURE
+    from lexer import Lexer
+    from parser import Parser
+    with FirmwareEmulator() as emulator:
+        with open_serial_port(emulator.port_name) as port:
+            streamer = GCodeStreamer(port, timeout=5)
+            interpreter = Interpreter(Parser(Lexer(cliq_program)), engine=CLOSURE)
+            interpreter.gcode.serial = streamer
+            interpreter.interpret()
+            streamer.flush()
+    assert streamer.errors == []
+    assert streamer.acknowledged == len(emulator.received)
+    assert interpreter.GLOBAL_SCOPE['fails'] == 101
+    assert emulator.firmware.moves == 2 * (1 + 6 * 101)
+    assert emulator.firmware.finish_time() > 101 * 1.0
+
+
+if __name__ == '__main__':
+    pytest.main()
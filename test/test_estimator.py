@@ -0,0 +1,63 @@
+import pytest
+from lexer import Lexer
+from parser import Parser
+from estimator import CycleEstimator
+
+
+def estimate(text, coordinated=False):
+    estimator = CycleEstimator(coordinated=coordinated)
+    return estimator.estimate(Parser(Lexer(text)).parse())
+
+
+def test_cliq_iteration(cliq_program):
+    rows = estimate(cliq_program)
+    loop = rows[-1]
+    assert loop.description.startswith('LOOP UNTIL fails > 100')
+    assert [row.description for row in loop.children[:3]] == ['WAIT 0.5', 'MOVETO poised', 'MOVETO inserted']
+    # return := 0, 5 from X 288.7 at 1300 mm/min, then Z 90 -> 5 at 9000/min
+    assert loop.children[5].seconds == pytest.approx(288.7 * 60 / 1300 + 85 * 60 / 9000.0)
+    assert loop.seconds == pytest.approx(sum(row.seconds for row in loop.children))
+    assert '124.8 cycles/hour' in loop.description
+
+
+def test_home_and_absolute_moves():
+    rows = estimate('PROGRAM M; BEGIN MOVETO 100, 90; HOME; MOVETO 130, 90; MOVETO +13, -9; WAIT 1.5 * 2; END.')
+    assert rows[0].seconds is None      # start position unknown
+    assert rows[1].seconds == pytest.approx(100 * 60 / 1300.0)
+    assert rows[2].seconds == pytest.approx(6.0 + 0.6)
+    assert rows[3].seconds == pytest.approx(0.6 + 0.06)
+    assert rows[4].seconds == 3.0
+
+
+def test_coordinated():
+    text = 'PROGRAM M; BEGIN HOME; MOVETO 130, 90; MOVETO +0, 0; END.'
+    assert estimate(text, coordinated=True)[1].seconds == pytest.approx(6.0)
+    assert estimate(text, coordinated=True)[2].seconds == pytest.approx(0.6)    # mixed modes
+
+
+def test_variable_operands_unknown():
+    text = 'PROGRAM M; VAR t : REAL; BEGIN HOME; t := 2; WAIT t; MOVETO +t, 0; MOVETO 10, 0; END.'
+    rows = estimate(text)
+    assert [row.seconds for row in rows[1:3]] == [None, None]
+    assert rows[3].seconds is None      # X position unknown after MOVETO t
+    estimator = CycleEstimator()
+    assert '?' in estimator.report(rows)
+
+
+def test_matches_emulator(cliq_program):
+    from emulator import Firmware
+    from gcode_maker import GCodeMaker
+    from interpreter import Interpreter, CLOSURE
+    text = cliq_program.replace('fails > 100', 'fails > 9')
+    firmware = Firmware(planner_size=0)
+    interpreter = Interpreter(Parser(Lexer(text)), engine=CLOSURE)
+    interpreter.gcode = GCodeMaker(serial=None)
+    interpreter.gcode.write = lambda data: [firmware.process(line) for line in data.decode().splitlines()]
+    interpreter.interpret()
+    rows = estimate(text)
+    setup = sum(row.seconds for row in rows[1:4])
+    assert firmware.finish_time() == pytest.approx(setup + 10 * rows[4].seconds, rel=0.01)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,5 +1,6 @@
 
 
+import math
 import pytest
 import gcode_maker as gm
 from gcode_maker import GCodeMaker
@@ -18,6 +19,153 @@ def test_GCodeMaker_exception():
         pass
     assert GCM is not None
 
+def capture(GCM):
+    written = []
+    GCM.write = written.append
+    return written
+
+
+@pytest.mark.parametrize("modal", [True, False])
+def test_render_matches_send(modal):
+    GCM = GCodeMaker(modal)
+    written = capture(GCM)
+    GCM.move_lin(-10, True)
+    GCM.move_rot(200, False)
+    GCM.wait(1.5)
+    GCM.go_home()
+    sent = b''.join(written)
+    GCM = GCodeMaker(modal)
+    written = capture(GCM)
+    for rendered in [GCM.render_move(-10, True, 200, False), GCM.render_wait(1.5), GCM.render_home()]:
+        GCM.send_rendered(rendered)
+    assert b''.join(written) == sent
+
+
+def test_modal_state():
+    GCM = GCodeMaker()
+    written = capture(GCM)
+    GCM.go_home()
+    GCM.go_home()
+    GCM.move_lin(250)
+    GCM.move_lin(255)
+    GCM.move_rot(90)
+    GCM.move_rot(0, True)
+    GCM.go_home()
+    assert written == [b'G28 X,Z\n', b'G90\n', b'G1 X250 F1300.0\n', b'G1 X255\n', b'G1 Z90 F9000.0\n',
+                       b'G91\n', b'G1 Z0\n', b'G28 X,Z\n']
+    assert GCM.suppressed == 5
+    GCM.reset_state()
+    GCM.set_relative()
+    assert written[-1] == b'G91\n'
+
+
+def test_rendered_variants():
+    GCM = GCodeMaker()
+    written = capture(GCM)
+    move = GCM.render_move(250, False, 90, False)
+    GCM.send_rendered(move)
+    GCM.send_rendered(move)
+    GCM.move_lin(-5, True)
+    GCM.send_rendered(move)
+    assert written[1] == b'G1 X250 F1300.0\nG1 Z90 F9000.0\n'
+    assert written[-1] == b'G90\nG1 X250\nG1 Z90 F9000.0\n'
+    assert len(GCM.variants) == 3
+
+
+def test_rendered_not_changed_by_sending():
+    move = GCodeMaker().render_move(250, False, 90, False)
+    makers = [GCodeMaker(), GCodeMaker()]
+    for GCM in makers:
+        capture(GCM)
+    makers[1].set_relative()
+    for GCM in makers:
+        GCM.send_rendered(move)
+    assert vars(move) == {'steps': move.steps}
+    assert [len(GCM.variants) for GCM in makers] == [1, 1]
+
+
+def test_coordinated_moves():
+    GCM = GCodeMaker(coordinated=True)
+    written = capture(GCM)
+    GCM.go_home()
+    GCM.move(250, False, 90, False)     # approach := 250, 90
+    GCM.move(33.7, True, 0, True)       # inserted := +33.7, +0
+    GCM.move(0, True, 90, False)        # open := +0, 90
+    # approach: F along the vector (250, 90) that holds X to its 1300 mm/min
+    assert written == [b'G28 X,Z\n', b'G90\n', b'G1 X250 Z90 F1381.6\n',
+                       b'G91\n', b'G1 X33.7 Z0 F1300.0\n',
+                       b'G1 X0\n', b'G90\n', b'G1 Z90 F9000.0\n']
+    assert GCM.coordinated_moves == 2
+    assert GCM.moves == 4
+    # approach: X 250 mm at 1300 mm/min and Z 90 at 9000/min run together
+    assert GCM.coordinated_saving == pytest.approx(90 * 60 / 9000.0 + 0, abs=0.01)
+    assert GCM.position == {'MOVE_LIN': 283.7, 'MOVE_ROT': 90}
+    assert 'saved 0.6 s' in GCM.report()
+
+
+def test_coordinated_render_matches_move():
+    GCM = GCodeMaker(coordinated=True)
+    written = capture(GCM)
+    GCM.move(-10, True, -20, True)
+    sent = b''.join(written)
+    GCM = GCodeMaker(coordinated=True)
+    written = capture(GCM)
+    GCM.send_rendered(GCM.render_move(-10, True, -20, True))
+    assert b''.join(written) == sent == b'G91\nG1 X-10 Z-20 F2906.8\n'
+
+
+@pytest.mark.parametrize("offsets, feed", [
+    ((130, 90), '1581.1'),      # X at its limit
+    ((1, 90), '9000.5'),        # Z at its limit
+    ((-30, 0), '1300.0'),       # X alone
+    ((None, 90), '1300.0'),     # unknown vector: the slowest axis feed
+])
+def test_path_feed(offsets, feed):
+    assert GCodeMaker.path_feed(offsets, ('1300.0', '9000.0')) == feed
+    lin, rot = offsets
+    if lin is not None:
+        path = float(feed) / math.hypot(lin, rot)
+        assert abs(lin) * path <= 1300 and abs(rot) * path <= 9000
+
+
+def test_path_feed_follows_start_and_speed():
+    GCM = GCodeMaker(coordinated=True)
+    written = capture(GCM)
+    move = GCM.render_move(130, False, 90, False)
+    GCM.go_home()
+    GCM.send_rendered(move)
+    GCM.go_home()
+    GCM.move_lin(40, False)
+    GCM.send_rendered(move)
+    GCM.move(-10, True, -20, True, speed=20)
+    assert written[1:] == [b'G90\nG1 X130 Z90 F1581.1\n', b'G28 X,Z\n', b'G1 X40 F1300.0\n',
+                           b'G1 X130 Z90 F1838.4\n',      # from X40 the vector is steeper
+                           b'G91\n', b'G1 X-10 Z-20 F5813.7\n']
+    assert len(GCM.variants) == 2
+    # each coordinated move takes as long as its slower axis at its own feed,
+    # doubled by speed 20 for the last one
+    assert GCM.motion_time == pytest.approx((130 + 40 + 90) * 60 / 1300.0 + 10 * 60 / 2600.0, abs=0.01)
+
+
+def cliq_cycle_bytes(text, modal):
+    from interpreter import Interpreter, CLOSURE
+    from lexer import Lexer
+    from parser import Parser
+    interpreter = Interpreter(Parser(Lexer(text)), engine=CLOSURE)
+    interpreter.gcode = GCodeMaker(modal)
+    written = capture(interpreter.gcode)
+    interpreter.interpret()
+    return len(b''.join(written)), interpreter.gcode.suppressed
+
+
+def test_cliq_cycle_fewer_bytes(cliq_program):
+    modal_bytes, suppressed = cliq_cycle_bytes(cliq_program, True)
+    plain_bytes, none_suppressed = cliq_cycle_bytes(cliq_program, False)
+    assert none_suppressed == 0
+    assert suppressed > 0
+    assert modal_bytes < plain_bytes
+
+
 def test_open_serial_port():
     serial = gm.open_serial_port()
     assert serial is not None
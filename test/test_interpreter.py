@@ -1,4 +1,5 @@
 import pytest
+from collections.abc import Mapping
 from token_types import *
 from lexer import Token
 
@@ -29,13 +30,48 @@ def makeProgramSyntax(intAssign='345', realAssign='2.22', boolAssign='TRUE', syn
 
 
 def makeInterpreter(aprogram):
-    from interpreter import Lexer, Parser, Interpreter
+    from lexer import Lexer
+    from parser import Parser
+    from interpreter import Interpreter
     lexer = Lexer(aprogram)
     parser = Parser(lexer)
     interpreter = Interpreter(parser)
     return interpreter
 
 
+class GCodeSink(object):
+    """Backend that keeps the G-code written to it."""
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        self.data.append(data)
+
+    def output(self):
+        return b''.join(self.data)
+
+
+def runProgram(program, engine, backend=None, **options):
+    """Runs program, its text or a parser, and returns the interpreter and
+    the G-code it wrote; given a backend, the G-code goes there instead."""
+    from lexer import Lexer
+    from parser import Parser
+    from interpreter import Interpreter
+    sink = GCodeSink()
+    parser = Parser(Lexer(program)) if isinstance(program, str) else program
+    interpreter = Interpreter(parser, engine=engine, backend=backend if backend is not None else sink, **options)
+    interpreter.interpret()
+    return interpreter, sink.output()
+
+
+def programResults(program, engine, **options):
+    """Scope and G-code of a run, for comparing engines and options. The
+    waypoints are left out, their points hold the AST nodes of each parse."""
+    interpreter, output = runProgram(program, engine, **options)
+    scope = {name: value for name, value in interpreter.GLOBAL_SCOPE.items() if not isinstance(value, Mapping)}
+    return scope, output
+
+
 Wait_expressions = [
     ('WAIT  6 + 3;\n', 6 + 3),
     ('WAIT  5;\n', 5),
@@ -118,6 +154,16 @@ bool_expressions = [
     ('3 == 2', False),
     ('3 != 2', True),
     ('3 != 3', False),
+    ('1 + 2 < 2 + 2', True),
+    ('1 < 2 < 3', True),
+    ('3 > 2 > 2', False),
+    ('2 > 1 AND 3 > 2', True),
+    ('2 > 1 AND 3 < 2', False),
+    ('2 < 1 OR 3 > 2', True),
+    ('FALSE OR FALSE', False),
+    ('NOT 2 < 1', True),
+    ('NOT TRUE', False),
+    ('NOT 2 < 1 AND 1 == 2 OR 3 == 3', True),
 ]
 
 
@@ -220,6 +266,19 @@ END.  {Part10}
     pytest.approx(globals['y'], pytest.approx(20.0 / 7 + 3.14))  # 5.9971...
 
 
+def test_visit_logging(caplog, capsys):
+    import logging
+    from interpreter import TREE
+    text = makeProgramSyntax(syntax='cc := 1;', breakcode='cc := aa DIV 0;')
+    with caplog.at_level(logging.INFO):
+        with pytest.raises(ZeroDivisionError):
+            runProgram(text, TREE)
+    visits = [record.getMessage() for record in caplog.records if 'visit_Assign' in record.getMessage()]
+    assert "'left'" in visits[0] and "'right'" in visits[0]
+    assert 'DIV at line' in caplog.text
+    assert capsys.readouterr().out == ''
+
+
 if __name__ == '__main__':
     pytest.main()
 
@@ -0,0 +1,122 @@
+import pytest
+from lexer import Lexer
+from parser import Parser
+from interpreter import TREE, CLOSURE
+from semantic import SemanticAnalyzer, SemanticError
+from io_pins import PinBank, pin_level
+from token_types import PININ, PINOUT
+from test_interpreter import runProgram
+
+
+PROGRAM = '''PROGRAM P;
+VAR
+   count : INTEGER;
+   hits  : INTEGER;
+IO
+   linerLimit : PININ 6;
+   commands   : PINOUT 23;
+BEGIN
+   count := 0;
+   hits := 0;
+   commands := TRUE;
+   LOOP:
+      IF linerLimit:
+         hits := hits + 1;
+      ENDIF;
+      count := count + 1;
+   UNTIL count > 9;
+   commands := FALSE;
+END.'''
+
+
+def test_pin_level():
+    assert [pin_level(value) for value in (True, 1, 2.5)] == [True] * 3
+    assert [pin_level(value) for value in (False, 0, 0.0, None)] == [False] * 4
+
+
+def test_snapshot_follows_edges(factory):
+    pins = PinBank(factory)
+    pins.declare('limit', PININ, 6)
+    assert pins.read('limit') is False
+    factory.pin(6).drive_high()
+    assert pins.inputs['limit'].value is True
+    assert pins.read('limit') is True
+    factory.pin(6).drive_low()
+    factory.pin(6).drive_high()
+    assert pins.read('limit') is True
+    assert pins.callback_latency.count == 3
+    # two edges before one read count once, from the later edge
+    assert pins.read_latency.count == 2
+    assert 0 <= pins.read_latency.max < 1.0
+    assert 'edge to program 2 edges' in pins.report()
+
+
+def test_snapshot_read_does_not_touch_the_pin(factory):
+    pins = PinBank(factory)
+    pins.declare('limit', PININ, 6)
+    device = pins.inputs['limit'].device
+    factory.pin(6).drive_high()
+    reads = []
+    original = type(device.pin).state.fget
+    type(device.pin).state = property(lambda pin: reads.append(pin) or original(pin),
+                                      type(device.pin).state.fset)
+    try:
+        for _ in range(100):
+            assert pins.read('limit') is True
+    finally:
+        type(device.pin).state = property(original, type(device.pin).state.fset)
+    assert reads == []
+
+
+def test_output_written_directly(factory):
+    pins = PinBank(factory)
+    pins.declare('commands', PINOUT, 23)
+    pins.write('commands', True)
+    assert factory.pin(23).state is True
+    assert pins.read('commands') is True
+    pins.write('commands', False)
+    assert factory.pin(23).state is False
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_program_reads_and_writes_pins(factory, engine):
+    pins = PinBank(factory)
+    pins.declare('linerLimit', PININ, 6)    # the program's declaration reuses it
+    factory.pin(6).drive_high()
+    interpreter, _ = runProgram(PROGRAM, engine, pins=pins)
+    assert interpreter.GLOBAL_SCOPE['hits'] == 10
+    assert interpreter.GLOBAL_SCOPE['commands'] is False
+    assert factory.pin(23).state is False
+    states = [state for _, state in factory.pin(23).states]
+    assert states == [False, True, False]
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+@pytest.mark.parametrize("high", [True, False])
+def test_pin_compared_to_literal(factory, engine, high):
+    pins = PinBank(factory)
+    pins.declare('linerLimit', PININ, 6)
+    if high:
+        factory.pin(6).drive_high()
+    for literal, hits in (('TRUE', 10 if high else 0), ('FALSE', 0 if high else 10)):
+        text = PROGRAM.replace('IF linerLimit:', f'IF linerLimit == {literal}:')
+        interpreter, _ = runProgram(text, engine, pins=pins)
+        assert interpreter.GLOBAL_SCOPE['hits'] == hits
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_without_pins(engine):
+    interpreter, _ = runProgram(PROGRAM.replace('IF linerLimit:', 'IF commands:'), engine)
+    assert interpreter.GLOBAL_SCOPE['hits'] == 10
+    assert interpreter.GLOBAL_SCOPE['commands'] is False
+    with pytest.raises(NameError):
+        runProgram(PROGRAM, engine)
+
+
+def test_input_pin_not_assignable():
+    with pytest.raises(SemanticError, match='input pin linerLimit'):
+        SemanticAnalyzer().analyze(Parser(Lexer(PROGRAM.replace('commands := TRUE', 'linerLimit := TRUE'))).parse())
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -4,8 +4,8 @@ from token_types import *
 
 token_list = [
     ('WAIT', WAIT, 'WAIT'),
-    ('TRUE', BOOL_CONST, TRUE),
-    ('FALSE', BOOL_CONST, FALSE),
+    ('TRUE', BOOL_CONST, True),
+    ('FALSE', BOOL_CONST, False),
     ('234', INTEGER_CONST, 234),
     ('3.14', REAL_CONST, 3.14),
     ('*', MUL, '*'),
@@ -40,7 +40,7 @@ token_list = [
 
 
 def makeLexer(text):
-    from interpreter import Lexer
+    from lexer import Lexer
     lexer = Lexer(text)
     return lexer
 
@@ -91,5 +91,29 @@ def test_get_next_token():
     assert lexer.line_count == 0
     assert lexer.line_pos == 2
 
+def test_error_position_after_newline():
+    lexer = makeLexer('VAR\n  aa @')
+    with pytest.raises(ValueError):
+        while lexer.get_next_token().type != EOF:
+            pass
+    assert lexer.line_count == 1
+    assert lexer.line_pos == 6
+
+
+
+def test_token_positions():
+    lexer = makeLexer('PROGRAM p;\n{ comment }\n  x := 12.5 + y;\nEND.')
+    positions = []
+    while True:
+        token = lexer.get_next_token()
+        positions.append((token.value, token.line, token.column))
+        if token.type == EOF:
+            break
+    assert positions == [('PROGRAM', 1, 1), ('p', 1, 9), (';', 1, 10), ('x', 3, 3), (':=', 3, 5), (12.5, 3, 8),
+                         ('+', 3, 13), ('y', 3, 15), (';', 3, 16), ('END', 4, 1), ('.', 4, 4), (None, 4, 5)]
+    from lexer import Token
+    assert Token(ID, 'x', 3, 3) == Token(ID, 'x')
+
+
 if __name__ == '__main__':
     pytest.main()
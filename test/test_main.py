@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from semantic import SemanticError
+from conftest import CLIQ_TEST, cliq_text
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'SRC')
+
+
+def imported_hardware(code):
+    """The hardware and POSIX-only modules code imports."""
+    probe = code + '; import sys; print([m for m in ("serial", "gpiozero", "emulator") if m in sys.modules])'
+    result = subprocess.run([sys.executable, '-c', probe], cwd=SRC, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_check(cliq_program):
+    import main
+    tree, symbols = main.check(cliq_program)
+    assert tree.name == 'CLIQ_cycle_test'
+    assert 'approach' in symbols.names
+    with pytest.raises(SemanticError, match='turned'):
+        main.check(cliq_text(runnable=False))
+
+
+@pytest.mark.parametrize("code", [
+    'import main; main.check(open({path!r}).read())',
+    'import interpreter, compiler, estimator, orchestrator, safety, sweep',
+])
+def test_no_hardware_imports(code, tmp_path, cliq_program):
+    path = tmp_path / 'cliq_test.txt'
+    path.write_text(cliq_program)
+    assert imported_hardware(code.format(path=str(path))) == '[]'
+
+
+def test_check_command_line():
+    result = subprocess.run([sys.executable, 'main.py', os.path.abspath(CLIQ_TEST), '--check'],
+                            cwd=SRC, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert 'Variable turned not declared' in result.stdout
+
+
+def test_safety_trip_exits_with_report(tmp_path, monkeypatch, mock_pins, capsys):
+    import main
+    from emulator import FirmwareEmulator
+    from test_safety import ENDLESS
+    path = tmp_path / 'endless.txt'
+    path.write_text(ENDLESS)
+    with FirmwareEmulator(time_scale=0.01) as emulator:
+        monkeypatch.setattr(sys, 'argv', ['main.py', str(path), '--port', emulator.port_name, '--gpio'])
+        timer = threading.Timer(0.3, mock_pins.pin(5).drive_high)
+        timer.start()
+        with pytest.raises(SystemExit) as exit:
+            main.main()
+        timer.join()
+    assert exit.value.code == 1
+    output = capsys.readouterr().out
+    assert 'aborted, safety input linlimit tripped' in output
+    assert 'linlimit: halt sent after' in output and 'program stopped after' in output
+    assert 'lines dropped' in output
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,96 @@
+import math
+import pytest
+from token_types import *
+from lexer import Lexer
+from parser import Parser
+from optimizer import Optimizer, count_nodes
+from interpreter import TREE, CLOSURE
+from test_interpreter import makeProgramSyntax, programResults, arithmetic_expressions, float_expressions
+from test_compiler import loop_program
+
+
+def optimize(text):
+    optimizer = Optimizer()
+    tree = Parser(Lexer(text)).parse()
+    return optimizer, optimizer.optimize(tree)
+
+
+@pytest.mark.parametrize("expr, result", arithmetic_expressions)
+def test_fold_arithmetic(expr, result):
+    optimizer, tree = optimize(makeProgramSyntax(intAssign=expr))
+    assign = tree.block.compound_statement.children[0]
+    assert type(assign.right).__name__ == 'Num'
+    assert math.trunc(assign.right.value) == result
+    assert optimizer.folded > 0 or expr.isdigit()
+
+
+def test_fold_unary_chain():
+    optimizer, tree = optimize(makeProgramSyntax(realAssign='5.5 - - - + - (3 + 4)'))
+    assign = tree.block.compound_statement.children[1]
+    assert assign.right.value == 12.5
+    assert optimizer.nodes_after < optimizer.nodes_before
+
+
+def test_fold_logical():
+    optimizer, tree = optimize(makeProgramSyntax(boolAssign='NOT 1 > 2 AND (3 < 2 OR TRUE)'))
+    assign = tree.block.compound_statement.children[2]
+    assert type(assign.right).__name__ == 'Bool'
+    assert assign.right.value is True
+    _, tree = optimize(makeProgramSyntax(boolAssign='aa > 2 AND NOT FALSE'))
+    assign = tree.block.compound_statement.children[2]
+    assert assign.right.op.type == AND
+    assert assign.right.right.value is True
+
+
+def test_fold_wait():
+    _, tree = optimize('PROGRAM W; BEGIN WAIT 1.5 * 2; END.')
+    wait = tree.block.compound_statement.children[0]
+    assert type(wait.token.value).__name__ == 'Num'
+    assert wait.token.value.value == 3.0
+
+
+def test_moveto_keeps_relative_axes():
+    _, tree = optimize('PROGRAM M; BEGIN MOVETO -10, 200; MOVETO +(3 + 4), (5 - 3); END.')
+    first, second = tree.block.compound_statement.children
+    assert type(first.value['distance']).__name__ == 'UnaryOp'
+    assert type(first.value['angle']).__name__ == 'Num'
+    assert second.value['distance'].expr.value == 7
+    assert type(second.value['angle']).__name__ == 'BinOp'
+
+
+def test_dead_branches():
+    text = makeProgramSyntax(syntax='IF turned == TRUE:', breakcode='IF 3 > 2:')
+    optimizer, tree = optimize(text)
+    children = tree.block.compound_statement.children
+    assert 'IfNode' not in [type(child).__name__ for child in children]
+    assert children[-1].right.value == 100
+    assert optimizer.branches == 1
+    assert 'removed 1 constant branches' in optimizer.report()
+
+
+def test_noop_dropped():
+    _, tree = optimize('PROGRAM N; BEGIN ; ; HOME; ; END.')
+    assert [type(child).__name__ for child in tree.block.compound_statement.children] == ['Home']
+
+
+def test_tree_left_untouched():
+    tree = Parser(Lexer(makeProgramSyntax())).parse()
+    before = count_nodes(tree)
+    Optimizer().optimize(tree)
+    assert count_nodes(tree) == before
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_same_results(engine):
+    for text in [loop_program, makeProgramSyntax(syntax='IF turned == TRUE:', breakcode='IF 2 < 1:')] + \
+            [makeProgramSyntax(realAssign=expr) for expr, _ in float_expressions]:
+        assert programResults(text, engine, optimize=True) == programResults(text, engine, optimize=False)
+
+
+def test_division_by_zero_not_folded():
+    with pytest.raises(ZeroDivisionError):
+        programResults(makeProgramSyntax(intAssign='1 DIV 0'), CLOSURE, optimize=True)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,84 @@
+import pytest
+from emulator import FirmwareEmulator
+from orchestrator import Orchestrator, CompiledProgram, DONE, FAULT, PENDING
+from streamer import StreamError
+
+
+PROGRAM = '''PROGRAM F;
+VAR
+   count : INTEGER;
+WAYPOINT
+   poised   := 250, 90;
+   inserted := +30, +0;
+BEGIN
+   count := 0;
+   HOME;
+   LOOP:
+      MOVETO poised;
+      MOVETO inserted;
+      WAIT 0.5;
+      count := count + 1;
+   UNTIL count > 9;
+END.'''
+
+OUT_OF_LIMITS = PROGRAM.replace('+30, +0', '+80, +0')
+
+
+@pytest.fixture
+def emulators():
+    started = [FirmwareEmulator() for _ in range(3)]
+    for emulator in started:
+        emulator.start()
+    yield started
+    for emulator in started:
+        emulator.stop()
+
+
+def test_program_parsed_once():
+    program = CompiledProgram(PROGRAM)
+    assert program.parse() is program.parse()
+    assert program.parses == 1
+    broken = CompiledProgram('PROGRAM F; BEGIN MOVETO ; END.')
+    for _ in range(2):
+        with pytest.raises(Exception):
+            broken.parse()
+    assert broken.parses == 1
+
+
+def test_fixtures_run_concurrently(emulators):
+    orchestrator = Orchestrator()
+    for i, emulator in enumerate(emulators):
+        orchestrator.add(f'f{i}', PROGRAM, emulator.port_name)
+    assert [fixture.status for fixture in orchestrator.fixtures] == [PENDING] * 3
+    assert orchestrator.run(timeout=30)
+    assert [fixture.status for fixture in orchestrator.fixtures] == [DONE] * 3
+    assert len(orchestrator.programs) == 1
+    assert orchestrator.programs[PROGRAM].parses == 1
+    for fixture, emulator in zip(orchestrator.fixtures, emulators):
+        assert fixture.interpreter.GLOBAL_SCOPE['count'] == 10
+        assert fixture.lines() == len(emulator.received)
+        assert emulator.firmware.errors == 0
+    assert orchestrator.throughput() > 0
+    assert '3 fixtures: 0 pending, 0 running, 3 done, 0 fault' in orchestrator.report()
+
+
+def test_fault_stops_only_its_fixture(emulators):
+    orchestrator = Orchestrator()
+    good = orchestrator.add('good', PROGRAM, emulators[0].port_name)
+    bad = orchestrator.add('bad', OUT_OF_LIMITS, emulators[1].port_name)
+    missing = orchestrator.add('missing', PROGRAM, '/dev/no-such-port')
+    assert orchestrator.run(timeout=30)
+    assert good.status == DONE
+    assert good.interpreter.GLOBAL_SCOPE['count'] == 10
+    assert bad.status == FAULT
+    assert isinstance(bad.error, StreamError)
+    assert 'outside 0..300' in str(bad.error)
+    # the faulted fixture stopped at the rejected move
+    assert bad.lines() < good.lines()
+    assert missing.status == FAULT
+    assert orchestrator.faults() == [bad, missing]
+    assert 'fault' in bad.report()
+
+
+if __name__ == '__main__':
+    pytest.main()
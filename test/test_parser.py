@@ -3,7 +3,7 @@ import pytest
 from token_types import *
 from lexer import Lexer
 from lexer import Token
-from parser import Parser
+from parser import Parser, AST
 from test_lexer import makeLexer
 
 
@@ -16,8 +16,6 @@ If_expressions = [
 ]
 @pytest.mark.parametrize("expr, truestat, falsestat", If_expressions)
 def test_parse_if(expr, falsestat, truestat):
-    #TODO IF should handle compound boolean statements
-    #TODO Needs to handle nested IF
     lexer = Lexer(expr)
     parser = Parser(lexer)
     node = parser.statement()
@@ -31,7 +29,6 @@ def test_parse_if(expr, falsestat, truestat):
         assert result == falsestat
 
 def test_nested_if():
-    #TODO IF should handle compound boolean statements (and, or)
     expr = ';IF 3 == 3:  \n aa := -22; \n IF 4 > 3: \n bb := 2; \n ENDIF;\n ELSE: \n cc := 66; \n ENDIF;'
     lexer = Lexer(expr)
     parser = Parser(lexer)
@@ -49,7 +46,6 @@ def test_nested_if():
     assert nodes[1].false.children[0].right.value == 66
 
 def test_parse_loop():
-    #TODO UNTIL should handle compound boolean statements
     lexer = makeLexer('LOOP:  \n count := count + 1; \n UNTIL (count > 100);\n')
     parser = Parser(lexer)
     node = parser.statement()
@@ -100,14 +96,47 @@ def test_IO_declarations():
     mylist = []
     for i in range(3):
         results = []
-        for property, value in vars(node[i]).items():
-            results.append(value)
+        for cls in reversed(type(node[i]).__mro__[:type(node[i]).__mro__.index(AST)]):
+            for name in cls.__slots__:     # the node's own fields, not AST's
+                results.append(getattr(node[i], name))
         mylist.append(results)
     assert mylist[0] == [Token(IO, 'limitx'), 'limitx', PININ, 6]
     assert mylist[1] == [Token(IO, 'limity'), 'limity', PINOUT, 7]
     assert mylist[2] == [Token(IO, 'limitz'), 'limitz', PININ, 8]
 
 
+def test_node_positions():
+    text = 'PROGRAM p;\nVAR\n   a, b : INTEGER;\nBEGIN\n   a := 1 + 2;\n   LOOP:\n      WAIT a;\n   UNTIL b > 3;\nEND.'
+    tree = Parser(Lexer(text)).parse()
+    assert (tree.line, tree.column) == (1, 1)
+    assert [(decl.line, decl.column) for decl in tree.block.declarations] == [(3, 4), (3, 7)]
+    assign, loop = tree.block.compound_statement.children[:2]
+    assert (assign.line, assign.column) == (5, 4)
+    assert (assign.right.line, assign.right.column) == (5, 9)
+    assert assign.right.right.line is None      # literals are shared
+    assert (loop.line, loop.statements.children[0].line, loop.logicNode.line) == (6, 7, 8)
+
+
+def test_optimized_nodes_keep_positions():
+    from optimizer import Optimizer
+    tree = Parser(Lexer('PROGRAM p;\nVAR a : INTEGER;\nBEGIN\n   a := 1 +\n      2;\nEND.')).parse()
+    folded = Optimizer().optimize(tree).block.compound_statement.children[0].right
+    assert (type(folded).__name__, folded.value, folded.line, folded.column) == ('Num', 3, 4, 9)
+
+
+def test_compact_nodes():
+    import pickle
+    text = 'PROGRAM p;\nVAR a : REAL;\nIO s : PININ 5;\nWAYPOINT\n   w := 1.5, 90;\n   v := 1.5, 90;\nBEGIN\n   a := 1.5;\nEND.'
+    tree = Parser(Lexer(text)).parse()
+    first, second = tree.block.waypoint_list
+    assert not hasattr(first, '__dict__') and not hasattr(first.token, '__dict__')
+    assert first.point['distance'] is second.point['distance']
+    assert tree.block.compound_statement.children[0].right is first.point['distance']
+    copy = pickle.loads(pickle.dumps(tree))
+    assert copy.block.waypoint_list[1].point['angle'].value == 90
+    assert (copy.block.waypoint_list[1].line, copy.block.waypoint_list[1].token) == (6, Token(WAYPOINT, 'v'))
+
+
 def get_UnaryOp_value(node):
     pass
     if type(node).__name__ == 'UnaryOp':
@@ -139,8 +168,9 @@ def test_waypoint_declarations():
     mylist = []
     for i in range(3):
         results = []
-        for property, value in vars(node[i]).items():
-            results.append(value)
+        for cls in reversed(type(node[i]).__mro__[:type(node[i]).__mro__.index(AST)]):
+            for name in cls.__slots__:     # the node's own fields, not AST's
+                results.append(getattr(node[i], name))
         mylist.append(results)
     truth = waypoint_compare(mylist[0], (Token(WAYPOINT, 'approach'), 250, 90))
     assert truth
@@ -179,6 +209,65 @@ def test_moveto():
             assert False
         index += 1
 
+def show(node):
+    """Fully parenthesized text of an expression tree."""
+    name = type(node).__name__
+    if name == 'BinOp':
+        return f'({show(node.left)} {node.op.value} {show(node.right)})'
+    if name == 'UnaryOp':
+        return f'({node.op.value} {show(node.expr)})'
+    return str(node.value)
+
+
+Precedence_expressions = [
+    ('a + b < c + d', '((a + b) < (c + d))'),
+    ('1 + 2 * 3 - 4 DIV 2', '((1 + (2 * 3)) - (4 DIV 2))'),
+    ('a - b - c', '((a - b) - c)'),
+    ('-a * b', '((- a) * b)'),
+    ('a < b < c', '((a < b) AND (b < c))'),
+    ('a < b + c <= d', '((a < (b + c)) AND ((b + c) <= d))'),
+    ('(a < b) == c', '((a < b) == c)'),
+    ('NOT a < b AND c OR d', '(((NOT (a < b)) AND c) OR d)'),
+    ('a OR b AND NOT NOT c', '(a OR (b AND (NOT (NOT c))))'),
+    ('a * NOT b + c', '((a * (NOT b)) + c)'),
+]
+
+
+@pytest.mark.parametrize("expr, tree", Precedence_expressions)
+def test_precedence(expr, tree):
+    parser = Parser(makeLexer(expr))
+    assert show(parser.expr()) == tree
+    assert parser.current_token.type == EOF
+
+
+@pytest.mark.parametrize("expr, tree, rest", [('NOT a == b', '(NOT a)', EQUAL), ('-a * b', '(- a)', MUL),
+                                               ('NOT (a == b) OR c', '(NOT (a == b))', OR)])
+def test_prefix_in_factor(expr, tree, rest):
+    parser = Parser(makeLexer(expr))
+    assert show(parser.factor()) == tree
+    assert parser.current_token.type == rest
+
+
+def test_deep_and_long_expressions():
+    depth = 5000
+    parser = Parser(makeLexer('(' * depth + 'x' + ')' * depth + ' + 1'))
+    node = parser.expr()
+    assert node.left.value == 'x' and node.right.value == 1
+    node = Parser(makeLexer(' + '.join(['x'] * depth))).expr()
+    for _ in range(depth - 1):
+        assert node.op.type == PLUS and node.right.value == 'x'
+        node = node.left
+    assert node.value == 'x'
+
+
+@pytest.mark.parametrize("expr", ['(a + b', 'a +', 'a + )', 'NOT', 'a < b)'])
+def test_bad_expressions(expr):
+    with pytest.raises(Exception, match='Parse error'):
+        parser = Parser(makeLexer(expr))
+        parser.expr()
+        parser.eat(EOF)
+
+
 def test_home():
     lexer = makeLexer('HOME;')
     parser = Parser(lexer)
@@ -0,0 +1,130 @@
+import io
+import os
+import signal
+import time
+import pytest
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+from profiler import NodeProfiler, LineProfiler, SEND
+from clock import VirtualClock, SimulatedMachine
+from test_interpreter import runProgram
+
+
+PROGRAM = '''PROGRAM P;
+VAR
+   count, total : INTEGER;
+BEGIN
+   count := 0;
+   total := 0;
+   LOOP:
+      total := total + count * 2;
+      MOVETO (count + 1), 0;
+      count := count + 1;
+   UNTIL count >= 10;
+END.'''
+
+
+class SlowSink(object):
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        time.sleep(self.delay)
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_counts(engine):
+    profiler = NodeProfiler()
+    interpreter, _ = runProgram(PROGRAM, engine, profiler=profiler)
+    assert interpreter.GLOBAL_SCOPE['total'] == 90
+    counts = profiler.counts
+    assert counts['Loop'] == 1
+    assert counts['Moveto'] == 10
+    assert counts['Assign'] == 2 + 10 * 2
+    assert counts['BinOp'] == 10 * 4 + 10    # 4 per body, 10 UNTIL tests
+    for label in profiler.exclusive:
+        assert profiler.exclusive[label] <= profiler.inclusive[label] + 1e-9
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_send_split_out(engine):
+    profiler = NodeProfiler()
+    sink = SlowSink(0.002)
+    runProgram(PROGRAM, engine, sink, profiler=profiler)
+    assert profiler.counts[SEND] == sink.writes
+    assert profiler.exclusive[SEND] >= sink.writes * 0.002
+    # the sleeping writes are not charged to the statements that sent them
+    assert profiler.exclusive['Moveto'] < profiler.exclusive[SEND] / 4
+    assert profiler.inclusive['Moveto'] >= profiler.exclusive[SEND] * 0.9
+    assert profiler.host_time() < profiler.exclusive[SEND]
+
+
+def test_disabled_adds_nothing():
+    interpreter = Interpreter(Parser(Lexer(PROGRAM)))
+    assert 'visit' not in interpreter.__dict__
+    assert 'write' not in interpreter.gcode.__dict__
+
+
+def test_report_at_end_and_on_signal():
+    output = io.StringIO()
+    profiler = NodeProfiler(output=output)
+    runProgram(PROGRAM, TREE, profiler=profiler)
+    report = output.getvalue()
+    assert report.splitlines()[0].split() == ['node', 'calls', 'inclusive', 'ms', 'exclusive', 'ms', 'us/call']
+    assert 'Moveto' in report and SEND in report
+    assert 'host evaluation' in report
+    output.truncate(0)
+    previous = profiler.install_signal()
+    try:
+        os.kill(os.getpid(), signal.SIGUSR1)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert 'Moveto' in output.getvalue()
+
+
+CYCLE = '''PROGRAM C;
+VAR
+   count : INTEGER;
+BEGIN
+   HOME;
+   count := 0;
+   LOOP:
+      MOVETO (count + 1), 0;
+      WAIT 2;
+      count := count + 1;
+   UNTIL count >= 5;
+END.'''
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_lines(engine):
+    clock = VirtualClock()
+    machine = SimulatedMachine(clock)
+    profiler = LineProfiler(CYCLE, clock=clock, machine=machine.finish_time)
+    interpreter = Interpreter(Parser(Lexer(CYCLE)), engine=engine, clock=clock, backend=machine, profiler=profiler)
+    interpreter.interpret()
+    assert not machine.errors
+    assert [profiler.counts[line] for line in (5, 6, 7, 8, 9, 10, 11)] == [1, 1, 1, 5, 5, 5, 5]
+    assert profiler.machine_time[9] == pytest.approx(10.0)
+    assert profiler.machine_time[8] > 0
+    assert sum(profiler.machine_time.values()) == pytest.approx(interpreter.run_time)
+    assert profiler.hotspots(2) == [9, 8]
+    report = profiler.report()
+    assert report.splitlines()[0].split() == ['line', 'hits', 'host', 'ms', 'machine', 's', 'source']
+    assert 'WAIT 2;' in report and 'UNTIL count >= 5;' in report
+
+
+def test_lines_without_machine_charge_blocked_writes():
+    sink = SlowSink(0.002)
+    profiler = LineProfiler(PROGRAM)
+    runProgram(PROGRAM, TREE, sink, profiler=profiler)
+    assert profiler.counts[9] == 10
+    assert profiler.machine_time[9] >= sink.writes * 0.002
+    assert profiler.exclusive[9] < profiler.machine_time[9] / 4
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,112 @@
+import pickle
+import threading
+from types import MappingProxyType
+import pytest
+from lexer import Lexer, Token, RESERVED_KEYWORDS
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+from program import CompiledProgram
+from test_interpreter import runProgram
+
+
+PROGRAM = '''PROGRAM P;
+VAR
+   count, total : INTEGER;
+IO
+   sensor : PININ 5;
+WAYPOINT
+   start := 10, 0;
+BEGIN
+   HOME;
+   count := 0;
+   total := 0;
+   LOOP:
+      total := total + count * 2;
+      MOVETO (count + 1), 0;
+      WAIT 0.5;
+      count := count + 1;
+   UNTIL count >= 10;
+   MOVETO start;
+END.'''
+
+
+def test_tokens_and_nodes_are_immutable():
+    tree = Parser(Lexer(PROGRAM)).parse()
+    wait = tree.block.compound_statement.children[3].statements.children[2]
+    with pytest.raises(AttributeError):
+        wait.token.value = None
+    with pytest.raises(AttributeError):
+        wait.line = 1
+    with pytest.raises(AttributeError):
+        del tree.block
+    with pytest.raises(AttributeError):
+        tree.block.compound_statement.children.append(wait)
+    moveto = tree.block.compound_statement.children[-2]
+    for point in (tree.block.waypoint_list[0].point, moveto.value, moveto.token.value):
+        with pytest.raises(TypeError):
+            point['distance'] = None
+    copy = pickle.loads(pickle.dumps(tree))
+    assert copy.block.waypoint_list[0].token == Token('WAYPOINT', 'start')
+    moveto = copy.block.compound_statement.children[-2]
+    for point in (copy.block.waypoint_list[0].point, moveto.value, moveto.token.value):
+        with pytest.raises(TypeError):
+            point['angle'] = None
+    assert moveto.value is moveto.token.value
+    assert moveto.value['distance'].value == 'start'
+    assert copy.block.waypoint_list[0].point['distance'].value == 10
+    # the nodes pickle their mappings themselves, read-only views in general do not
+    with pytest.raises(TypeError):
+        pickle.dumps(MappingProxyType({}))
+
+
+def test_keywords_are_not_changed_by_parsing():
+    before = {word: (token.type, token.value) for word, token in RESERVED_KEYWORDS.items()}
+    Parser(Lexer(PROGRAM)).parse()
+    assert {word: (token.type, token.value) for word, token in RESERVED_KEYWORDS.items()} == before
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_shared_program_runs_like_a_parsed_one(engine):
+    program = CompiledProgram(PROGRAM)
+    _, output = runProgram(Parser(Lexer(PROGRAM)), engine)
+    for _ in range(3):
+        interpreter, shared = runProgram(program, engine)
+        assert shared == output
+        assert (interpreter.GLOBAL_SCOPE['count'], interpreter.GLOBAL_SCOPE['total']) == (10, 90)
+    assert program.parses == 1
+    assert len(program.compiled) == (1 if engine == CLOSURE else 0)
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_shared_program_across_threads(engine):
+    program = CompiledProgram(PROGRAM, optimize=True)
+    _, expected = runProgram(Parser(Lexer(PROGRAM)), engine)
+    results = []
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(5):
+                results.append(runProgram(program, engine)[1])
+        except Exception as ex:
+            errors.append(ex)
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert results == [expected] * 40
+    assert program.parses == 1
+
+
+def test_program_error_raised_every_time():
+    program = CompiledProgram('PROGRAM F; BEGIN MOVETO ; END.')
+    for _ in range(2):
+        with pytest.raises(Exception):
+            Interpreter(program).interpret()
+    assert program.parses == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,86 @@
+import os
+import pytest
+from lexer import Lexer
+from parser import Parser
+from program_cache import ProgramCache, FORMAT_VERSION, source_hash
+from test_interpreter import makeProgramSyntax
+
+
+def makeParser(text):
+    return Parser(Lexer(text))
+
+
+def test_cache_miss_then_hit(tmp_path):
+    text = makeProgramSyntax()
+    cache = ProgramCache(str(tmp_path))
+    tree = cache.parse(makeParser(text))
+    assert cache.misses == 1
+    cached = cache.parse(makeParser(text))
+    assert cache.hits == 1
+    assert cached is not tree
+    assert cached.name == tree.name == 'Test'
+    assert len(cached.block.compound_statement.children) == len(tree.block.compound_statement.children)
+
+
+def test_cache_key_changes():
+    text = makeProgramSyntax()
+    assert ProgramCache('x').key(text) != ProgramCache('x').key(makeProgramSyntax(intAssign='7'))
+    assert ProgramCache('x', version='0.0').key(text) != ProgramCache('x', version='0.1').key(text)
+
+
+def test_other_version_misses(tmp_path):
+    text = makeProgramSyntax()
+    ProgramCache(str(tmp_path), version='0.0+old').parse(makeParser(text))
+    cache = ProgramCache(str(tmp_path))
+    cache.parse(makeParser(text))
+    assert cache.misses == 1 and cache.hits == 0
+    cache.parse(makeParser(text))
+    assert cache.hits == 1
+
+
+def test_format_version_follows_sources(tmp_path):
+    paths = [tmp_path / 'lexer.py', tmp_path / 'parser.py']
+    for path in paths:
+        path.write_text('# grammar\n')
+    before = source_hash(paths)
+    paths[1].write_text('# grammar with NOT\n')
+    assert source_hash(paths) != before
+    assert ProgramCache('x').version == FORMAT_VERSION
+
+
+def test_corrupt_entry_is_reparsed(tmp_path):
+    text = makeProgramSyntax()
+    cache = ProgramCache(str(tmp_path))
+    with open(cache.path(text), 'wb') as f:
+        f.write(b'not a pickle')
+    tree = cache.parse(makeParser(text))
+    assert cache.misses == 1
+    assert tree.name == 'Test'
+    assert cache.load(text) is not None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='no file owners')
+def test_shared_directory_not_loaded(tmp_path):
+    text = makeProgramSyntax()
+    cache = ProgramCache(str(tmp_path / 'cache'))
+    cache.parse(makeParser(text))
+    assert cache.load(text) is not None
+    os.chmod(cache.directory, 0o777)
+    assert cache.load(text) is None
+    cache.parse(makeParser(text))
+    assert cache.misses == 2
+
+
+def test_interpreter_uses_cache(tmp_path):
+    from interpreter import Interpreter
+    text = makeProgramSyntax()
+    cache = ProgramCache(str(tmp_path))
+    for _ in range(2):
+        interpreter = Interpreter(makeParser(text), cache=cache)
+        interpreter.interpret()
+        assert interpreter.GLOBAL_SCOPE['aa'] == 345
+    assert cache.hits == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
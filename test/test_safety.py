@@ -0,0 +1,128 @@
+import random
+import sys
+import threading
+import time
+import pytest
+import serial
+from lexer import Lexer
+from parser import Parser
+from interpreter import Interpreter, TREE, CLOSURE
+from emulator import FirmwareEmulator
+from streamer import GCodeStreamer
+from serial_worker import SerialWorker
+from io_pins import PinBank
+from safety import SafetyMonitor, ProgramAborted, HALT_LINE
+
+
+ENDLESS = '''PROGRAM E;
+VAR
+   count : INTEGER;
+IO
+   linerLimit : PININ 6;
+WAYPOINT
+   poised   := 250, 90;
+   inserted := +30, +0;
+BEGIN
+   count := 0;
+   HOME;
+   LOOP:
+      MOVETO poised;
+      MOVETO inserted;
+      WAIT 0.5;
+      count := count + 1;
+   UNTIL count < 0;
+END.'''
+
+
+def test_trip_halts_and_flags(factory):
+    pins = PinBank(factory)
+    sent = []
+    discarded = []
+    monitor = SafetyMonitor(pins, halt=sent.append, on_trip=[lambda: discarded.append(True)])
+    interpreter = Interpreter(Parser(Lexer(ENDLESS)), pins=pins)
+    monitor.attach(interpreter)
+    assert monitor.check()
+    factory.pin(5).drive_high()
+    assert sent == [HALT_LINE]
+    assert discarded == [True]
+    assert interpreter.abort is monitor.tripped
+    factory.pin(6).drive_high()     # a second input while tripped does not halt again
+    assert sent == [HALT_LINE]
+    with pytest.raises(ProgramAborted, match='linlimit'):
+        interpreter.interpret()
+    assert len(monitor.trips) == 1
+    with pytest.raises(ProgramAborted):
+        monitor.reset()
+    factory.pin(5).drive_low()
+    factory.pin(6).drive_low()
+    monitor.reset()
+    assert interpreter.abort is None
+    # the program's linerLimit shares the rotatlimit pin 6 device
+    assert pins.inputs['linerLimit'] is pins.inputs['rotatlimit']
+
+
+@pytest.mark.parametrize("engine", [TREE, CLOSURE])
+def test_worst_case_latency(factory, engine):
+    pins = PinBank(factory)
+    halts = []
+    monitor = SafetyMonitor(pins, halt=halts.append)
+    rng = random.Random(18)
+    for _ in range(20):
+        interpreter = Interpreter(Parser(Lexer(ENDLESS)), engine=engine, pins=pins)
+        interpreter.gcode.write = lambda data: None
+        monitor.attach(interpreter)
+        errors = []
+
+        def run():
+            try:
+                interpreter.interpret()
+            except ProgramAborted as ex:
+                errors.append(ex)
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(rng.uniform(0.002, 0.02))
+        factory.pin(5).drive_high()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert len(errors) == 1
+        factory.pin(5).drive_low()
+        monitor.reset()
+        monitor.interpreters.remove(interpreter)
+    assert len(halts) == len(monitor.trips) == 20
+    # the halt goes out from the edge callback, before the program is flagged
+    assert all(trip.halt_latency() <= trip.abort_latency() for trip in monitor.trips)
+    # both take well under a millisecond; the bounds allow for the callback
+    # and the interpreter each waiting a few GIL switch intervals
+    switch = sys.getswitchinterval()
+    assert max(trip.halt_latency() for trip in monitor.trips) < 4 * switch
+    assert max(trip.abort_latency() for trip in monitor.trips) < 10 * switch
+    assert 'program stopped after' in monitor.report()
+
+
+def test_halt_overtakes_queued_gcode(factory):
+    pins = PinBank(factory)
+    with FirmwareEmulator(time_scale=0.01) as emulator:
+        port = serial.Serial(emulator.port_name, timeout=0.1)
+        streamer = GCodeStreamer(port, timeout=5)
+        interpreter = Interpreter(Parser(Lexer(ENDLESS)), engine=CLOSURE, pins=pins)
+        with pytest.raises(ProgramAborted):
+            with SerialWorker(streamer) as worker:
+                interpreter.gcode.serial = worker
+                monitor = SafetyMonitor(pins, halt=streamer.halt, on_trip=[worker.discard])
+                monitor.attach(interpreter)
+                timer = threading.Timer(0.2, factory.pin(6).drive_high)
+                timer.start()
+                interpreter.interpret()
+        timer.join()
+        time.sleep(0.1)
+        firmware = emulator.firmware
+        assert firmware.halted
+        # the halt was acted on while planned moves were still in the queue
+        assert firmware.finish_time() < 100
+        assert 'M112' in emulator.received
+        assert any(response.startswith(b'error:Halted') for line, response in streamer.errors)
+        port.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,65 @@
+import pytest
+from token_types import *
+from lexer import Lexer
+from parser import Parser
+from semantic import SemanticAnalyzer, SemanticError
+from test_interpreter import makeProgramSyntax, makeInterpreter
+from conftest import cliq_text
+
+
+def analyze(text):
+    return SemanticAnalyzer().analyze(Parser(Lexer(text)).parse())
+
+
+def test_slots_in_declaration_order():
+    symbols = analyze(makeProgramSyntax())
+    assert symbols.names == ['turned', 'aa', 'BB', 'x', 'cc']
+    aa = symbols.lookup('aa')
+    assert (aa.kind, aa.type, aa.slot) == (VAR, INTEGER, 1)
+
+
+def test_io_and_waypoint_symbols(cliq_program):
+    symbols = analyze(cliq_program)
+    limit = symbols.lookup('linerLimit')
+    assert (limit.kind, limit.type) == (IO, PININ)
+    assert symbols.lookup('approach').kind == WAYPOINT
+    assert len(symbols) == 4 + 4 + 5
+
+
+def test_undeclared_name_in_cliq_test():
+    with pytest.raises(SemanticError, match='turned'):
+        analyze(cliq_text(runnable=False))
+
+
+def test_rejected_before_first_statement():
+    interpreter = makeInterpreter(makeProgramSyntax(syntax='cc := 1;', breakcode='cc := undeclared;'))
+    sent = []
+    interpreter.gcode.write = sent.append
+    with pytest.raises(SemanticError):
+        interpreter.interpret()
+    assert sent == []
+    assert interpreter.GLOBAL_SCOPE == {}
+
+
+bad_names = [
+    ('cc : INTEGER;', 'cc : INTEGER; aa : REAL;'),  # duplicate declaration
+    ('cc := 1;', 'MOVETO aa;'),  # moveto a variable
+    ('BEGIN', 'WAYPOINT wp := 1, 2; BEGIN wp := 3;'),  # assign to a waypoint
+]
+
+
+@pytest.mark.parametrize("expr, repl", bad_names)
+def test_semantic_errors(expr, repl):
+    with pytest.raises(SemanticError):
+        analyze(makeProgramSyntax(syntax=expr, breakcode=repl))
+
+
+def test_scope_from_store():
+    symbols = analyze(makeProgramSyntax())
+    store = symbols.new_store()
+    store[symbols.lookup('cc').slot] = 3
+    assert symbols.scope(store) == {'cc': 3}
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,78 @@
+import time
+import pytest
+from serial_worker import SerialWorker
+from test_streamer import commands
+
+
+class SlowSink(object):
+    def __init__(self, delay=0.002, fail_after=None):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.writes = []
+
+    def write(self, data):
+        if self.fail_after is not None and len(self.writes) >= self.fail_after:
+            raise IOError('port gone')
+        time.sleep(self.delay)
+        self.writes.append(data)
+
+
+def test_order_and_drain():
+    sink = SlowSink()
+    lines = commands(500)
+    with SerialWorker(sink, maxsize=32) as worker:
+        for line in lines:
+            worker.write(line)
+    assert not worker.is_alive()
+    assert b''.join(sink.writes) == b''.join(lines)
+    assert worker.writes < len(lines)       # coalesced
+    assert worker.max_depth <= 32
+    assert '500 commands queued' in worker.report()
+
+
+def test_backpressure():
+    sink = SlowSink(delay=0.01)
+    with SerialWorker(sink, maxsize=2, coalesce=1) as worker:
+        for line in commands(10):
+            worker.write(line)
+    assert worker.max_enqueue_latency > 0.005
+    assert worker.writes == 10
+
+
+def test_writer_does_not_block_interpreter():
+    sink = SlowSink(delay=0.05)
+    with SerialWorker(sink) as worker:
+        start = time.perf_counter()
+        for line in commands(5):
+            worker.write(line)
+        assert time.perf_counter() - start < 0.05
+    assert len(b''.join(sink.writes).splitlines()) == 5
+
+
+def test_write_error_reported():
+    sink = SlowSink(delay=0, fail_after=0)
+    worker = SerialWorker(sink, coalesce=1)
+    worker.start()
+    worker.write(b'G28 X,Z\n')
+    for _ in range(100):
+        if worker.error is not None:
+            break
+        time.sleep(0.01)
+    with pytest.raises(IOError):
+        worker.write(b'G90\n')
+    with pytest.raises(IOError):
+        worker.close()
+
+
+def test_with_gcode_maker():
+    from gcode_maker import GCodeMaker
+    sink = SlowSink(delay=0)
+    with SerialWorker(sink) as worker:
+        GCM = GCodeMaker(serial=worker)
+        GCM.go_home()
+        GCM.move(250, False, 90, False)
+    assert b''.join(sink.writes) == b'G28 X,Z\nG90\nG1 X250 F1300.0\nG1 Z90 F9000.0\n'
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+import pytest
+import serial
+from collections import deque
+from streamer import GCodeStreamer, StreamError, dwell_seconds
+
+
+class PtyFirmware(threading.Thread):
+    """Firmware stand-in on the master side of a pty. It works through its
+    receive buffer one line at a time and answers each line with 'ok'."""
+    def __init__(self, master, rx_buffer, delay=0.0005, reject=b''):
+        super().__init__(daemon=True)
+        self.master = master
+        self.rx_buffer = rx_buffer
+        self.delay = delay
+        self.reject = reject
+        self.received = []
+        self.max_buffered = 0
+        self.running = True
+
+    def run(self):
+        pending = b''
+        while self.running:
+            try:
+                pending += os.read(self.master, 1024)
+            except OSError:
+                return
+            self.max_buffered = max(self.max_buffered, len(pending))
+            while b'\n' in pending:
+                line, pending = pending.split(b'\n', 1)
+                time.sleep(self.delay)
+                self.received.append(line)
+                answer = b'error:1\n' if self.reject and line.startswith(self.reject) else b'ok\n'
+                os.write(self.master, b'echo: busy\n' + answer if len(self.received) % 7 == 0 else answer)
+
+
+@pytest.fixture
+def pty_port():
+    master, slave = os.openpty()
+    port = serial.Serial(os.ttyname(slave), timeout=0.2)
+    yield master, port
+    port.close()
+    os.close(slave)
+    os.close(master)
+
+
+def commands(count):
+    return [f'G1 X{i}.5 F1300.0\n'.encode() for i in range(count)]
+
+
+def test_stream_keeps_within_buffer(pty_port):
+    master, port = pty_port
+    firmware = PtyFirmware(master, rx_buffer=64)
+    firmware.start()
+    streamer = GCodeStreamer(port, rx_buffer=64, timeout=5)
+    acknowledged = []
+    streamer.on_ack = lambda line, response: acknowledged.append(line)
+    lines = commands(200)
+    streamer.write(b''.join(lines))
+    streamer.flush()
+    firmware.running = False
+    assert streamer.queue_depth() == (0, 0)
+    assert firmware.received == [line.rstrip(b'\n') for line in lines]
+    assert acknowledged == lines
+    assert firmware.max_buffered <= 64
+    assert streamer.max_depth > 1
+    assert '200 lines sent, 200 acknowledged' in streamer.report()
+
+
+def test_error_acknowledges_line(pty_port):
+    master, port = pty_port
+    firmware = PtyFirmware(master, rx_buffer=128, reject=b'G4')
+    firmware.start()
+    streamer = GCodeStreamer(port, timeout=5)
+    streamer.write(b'G28 X,Z\nG4 -1\nG90\n')
+    streamer.flush()
+    firmware.running = False
+    assert streamer.errors == [(b'G4 -1\n', b'error:1')]
+    assert streamer.acknowledged == 3
+
+
+def test_timeout_without_firmware(pty_port):
+    _, port = pty_port
+    streamer = GCodeStreamer(port, rx_buffer=16, timeout=0.3)
+    with pytest.raises(StreamError):
+        streamer.write(b''.join(commands(3)))
+
+
+class DwellPort(object):
+    """Answers every line with 'ok', a G4 one only when its pause is over."""
+    def __init__(self):
+        self.ready = deque()
+
+    def write(self, line):
+        pause = float(line.split()[1]) if line.startswith(b'G4') else 0.0
+        self.ready.append(time.monotonic() + pause)
+
+    def readline(self):
+        time.sleep(0.01)
+        if self.ready and self.ready[0] <= time.monotonic():
+            self.ready.popleft()
+            return b'ok\n'
+        return b''
+
+
+@pytest.mark.parametrize("line, seconds", [
+    (b'G4 2.5\n', 2.5),
+    (b'G4 P500\n', 0.5),
+    (b'G4 S3\n', 3.0),
+    (b'G1 X10 F1300.0\n', 0.0),
+])
+def test_dwell_seconds(line, seconds):
+    assert dwell_seconds(line) == seconds
+
+
+def test_dwell_longer_than_timeout():
+    streamer = GCodeStreamer(DwellPort(), timeout=0.1)
+    streamer.write(b'G1 X10 F1300.0\nG4 0.4\nG1 X0\n')
+    assert streamer.ack_timeout() == pytest.approx(0.5)
+    streamer.flush()
+    assert streamer.acknowledged == 3
+
+
+def test_abort_wakes_blocked_writer(pty_port):
+    _, port = pty_port
+    streamer = GCodeStreamer(port, rx_buffer=64)    # nothing answers, the ack timeout is 60 s
+    lines = commands(20)
+    fits = 64 // len(lines[0])
+    writer = threading.Thread(target=streamer.write, args=(b''.join(lines),))
+    writer.start()
+    while streamer.sent < fits:
+        time.sleep(0.01)
+    streamer.abort()
+    writer.join(5)
+    assert not writer.is_alive()
+    assert streamer.sent == fits
+    assert streamer.dropped == len(lines)
+    assert streamer.queue_depth() == (0, 0)
+    streamer.flush()
+    assert streamer.handle_response(b'ok') is None
+    assert 'aborted, 20 lines dropped' in streamer.report()
+
+
+class SlowPort(object):
+    """Writes a byte at a time and acknowledges every line, so a write from
+    another thread could land inside a line."""
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        for byte in data:
+            self.data.append(byte)
+            time.sleep(0.0001)
+
+    def readline(self):
+        return b'ok\n'
+
+
+def test_halt_lands_between_lines():
+    port = SlowPort()
+    streamer = GCodeStreamer(port)
+    lines = commands(40)
+    writer = threading.Thread(target=streamer.write, args=(b''.join(lines),))
+    writer.start()
+    for _ in range(5):
+        time.sleep(0.003)
+        streamer.halt(b'\nM112\n')
+    writer.join(5)
+    received = bytes(port.data).split(b'\n')
+    assert received.count(b'M112') == 5
+    assert [line + b'\n' for line in received if line not in (b'', b'M112')] == lines
+
+
+def test_line_too_long():
+    streamer = GCodeStreamer(None, rx_buffer=8)
+    with pytest.raises(StreamError):
+        streamer.write(b'G1 X100 F1300.0\n')
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,72 @@
+import os
+import csv
+import pytest
+from sweep import Sweep, grid, substitute, simulate, parse_values, COORDINATED, OK, LIMIT, FAILED
+
+
+TEMPLATE = '''PROGRAM S;
+VAR
+   count : INTEGER;
+WAYPOINT
+   poised   := $poised, 90;
+   inserted := +$depth, +0;
+   back     := 100, 0;
+BEGIN
+   count := 0;
+   HOME;
+   LOOP:
+      MOVETO poised;
+      MOVETO inserted;
+      WAIT $dwell;
+      MOVETO back;
+      count := count + 1;
+   UNTIL count > 4;
+END.'''
+
+
+def test_grid():
+    combos = grid({'a': [1, 2], 'b': [True, False]})
+    assert combos == [{'a': 1, 'b': True}, {'a': 1, 'b': False}, {'a': 2, 'b': True}, {'a': 2, 'b': False}]
+
+
+def test_substitute():
+    text = substitute('WAIT $dwell; MOVETO ${x}0, 0;', {'dwell': 0.5, 'x': 1, COORDINATED: True})
+    assert text == 'WAIT 0.5; MOVETO 10, 0;'
+    with pytest.raises(KeyError):
+        substitute('WAIT $dwell;', {})
+
+
+def test_parse_values():
+    assert parse_values('1, 2.5,3') == [1, 2.5, 3]
+
+
+def test_simulate_outcomes():
+    assert simulate(TEMPLATE, {'poised': 250, 'depth': 10, 'dwell': 1}).outcome == OK
+    over = simulate(TEMPLATE, {'poised': 250, 'depth': 60, 'dwell': 1})
+    assert over.outcome == LIMIT
+    assert 'outside 0..300' in over.detail
+    assert simulate(TEMPLATE, {'poised': 250, 'depth': 10, 'dwell': 'x'}).outcome == FAILED
+
+
+def test_sweep_ranks_fastest_within_limits(tmp_path):
+    parameters = {'poised': [200, 250], 'depth': [10, 60], 'dwell': [0.5, 1], COORDINATED: [False, True]}
+    sweep = Sweep(TEMPLATE, parameters, workers=2)
+    ranked = sweep.run()
+    assert len(ranked) == 16
+    assert [result.outcome for result in ranked] == [OK] * 12 + [LIMIT] * 4
+    times = [result.seconds for result in ranked[:12]]
+    assert times == sorted(times)
+    assert ranked[0].params == {'poised': 200, 'depth': 10, 'dwell': 0.5, COORDINATED: True}
+    # the process pool gives the same answers as running in-process
+    serial = Sweep(TEMPLATE, parameters, workers=0)
+    assert [(r.params, r.seconds) for r in serial.run()] == [(r.params, r.seconds) for r in ranked]
+    path = os.path.join(tmp_path, 'ranked.csv')
+    sweep.write_csv(path)
+    rows = list(csv.reader(open(path)))
+    assert rows[0] == ['rank', 'poised', 'depth', 'dwell', COORDINATED, 'outcome', 'seconds', 'detail']
+    assert rows[1][:5] == ['1', '200', '10', '0.5', 'True']
+    assert 'ok' in sweep.report(3)
+
+
+if __name__ == '__main__':
+    pytest.main()